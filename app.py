@@ -1,6 +1,5 @@
 import streamlit as st
 import time
-import concurrent.futures
 import json
 import base64
 from datetime import datetime
@@ -15,33 +14,87 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-from meeting_proofreader.utils.diff_view import generate_diff_html
-import re
-import streamlit.components.v1 as components
+from meeting_proofreader.startup import STARTUP, start_warm_up
+with STARTUP.phase("app imports"):
+    from meeting_proofreader.utils.diff_view import generate_diff_html
+    from meeting_proofreader.cpu_pool import run_cpu_bound
+    from meeting_proofreader.instrumentation import TRACE
+    from meeting_proofreader.metrics import METRICS
+    from meeting_proofreader import registry
+    import re
+    import streamlit.components.v1 as components
+
+# 무거운 백엔드(LLM 클라이언트, 그래프, Firestore, 임베딩 저장소)는 백그라운드에서 로드
+# → 로그인 화면은 바로 렌더링되고, 필요한 시점에 아직 로드 중이면 그때만 대기
+start_warm_up()
+
+@st.cache_resource
+def get_metrics_endpoint():
+    """Prometheus-style /metrics endpoint on PROOFREADER_METRICS_PORT (None when unset)"""
+    from meeting_proofreader.metrics import start_from_env
+    return start_from_env()
+
+get_metrics_endpoint()
 
 # --- Server-Side Session Cache (Hybrid: Memory + Firestore) ---
+from meeting_proofreader.session_store import SessionStore
+
+# SessionStore.stats()의 누적 값 (나머지는 현재 값 게이지)
+CACHE_COUNTERS = ("hits", "misses", "evictions", "expirations")
+
 @st.cache_resource
 def get_server_session_cache():
-    return {}
+    import os
+    # 인스턴스 메모리 보호: 용량 상한(MB)과 유휴 만료 시간(초)을 환경변수로 조정
+    store = SessionStore(
+        max_bytes=int(os.environ.get("SESSION_CACHE_MAX_MB", "256")) * 1024 * 1024,
+        ttl_seconds=float(os.environ.get("SESSION_CACHE_TTL", str(6 * 3600))),
+    )
+    METRICS.register_stats("session_cache", store.stats, counters=CACHE_COUNTERS, help_text="Server session cache")
+    return store
 
 SERVER_SESSION_CACHE = get_server_session_cache()
 
-# Firestore Init (Safe Failover)
-# Firestore Init (Safe Failover) -> Cached Resource
+# Firestore 클라이언트와 이를 쓰는 리소스는 처음 필요할 때 생성 (워밍업 스레드가 먼저 만들어 두었으면 재사용)
 @st.cache_resource
-def get_firestore_client():
-    try:
-        from google.cloud import firestore
-        # On Cloud Run, this uses default service account. 
-        # Locally, it will look for ADC. If it hangs, user might need to set creds.
-        db = firestore.Client()
-        print("[System] Firestore Client Initialized.")
-        return db
-    except Exception as e:
-        print(f"[System] Firestore Init Failed (Using Memory Only): {e}")
+def get_session_persister():
+    """Background write-behind persister (None when Firestore is unavailable)"""
+    db = registry.get_firestore_client()
+    if db is None:
         return None
+    from meeting_proofreader.persistence import SessionPersister
+    persister = SessionPersister(db)
+    METRICS.register_stats("firestore", persister.stats, counters=("writes", "coalesced", "errors"),
+                           help_text="Session write-behind persister")
+    return persister
+
+@st.cache_resource
+def get_job_manager():
+    """Process-wide proofreading job runner (checkpoints to Firestore, or memory when unavailable)"""
+    from meeting_proofreader.jobs import JobStore, JobManager
+    from meeting_proofreader.persistence import InMemoryFirestore
+    from meeting_proofreader.chunker import SlidingWindowChunker
+
+    db = registry.get_firestore_client()
+    store = JobStore(db if db is not None else InMemoryFirestore())
+    manager = JobManager(store, SlidingWindowChunker(), registry.get_workflow, max_workers=5)
+    METRICS.register_stats("jobs", manager.stats, help_text="Proofreading jobs on this instance")
+    return manager
 
-DB_CLIENT = get_firestore_client()
+@st.cache_resource
+def get_governor():
+    """Process-wide LLM call governor: one concurrency/token budget for every session on this instance"""
+    return registry.get_governor()
+
+@st.cache_resource
+def get_parse_cache():
+    """Content-hash cache of parsed uploads (normalized text + chunk boundaries)"""
+    from meeting_proofreader.parse_cache import ParsedUploadCache
+    cache = ParsedUploadCache()
+    METRICS.register_stats("parse_cache", cache.stats, counters=CACHE_COUNTERS, help_text="Parsed upload cache")
+    return cache
+
+PARSE_CACHE = get_parse_cache()
 
 
 def get_session_id():
@@ -58,6 +111,14 @@ def create_session_id():
     st.query_params["session"] = new_id
     return new_id
 
+def _restore_state(data):
+    """Copy persisted session fields into st.session_state"""
+    st.session_state.job_id = data.get("job_id")
+    st.session_state.authenticated = data.get("authenticated", False)
+    st.session_state.original_text = data.get("original_text", "")
+    st.session_state.corrected_text = data.get("corrected_text", "")
+    st.session_state.processing_complete = data.get("processing_complete", False)
+
 def save_session(session_id):
     """Save critical state to server cache (Memory + Firestore)"""
     if not session_id:
@@ -68,48 +129,37 @@ def save_session(session_id):
         "original_text": st.session_state.get("original_text", ""),
         "corrected_text": st.session_state.get("corrected_text", ""),
         "processing_complete": st.session_state.get("processing_complete", False),
+        "job_id": st.session_state.get("job_id"),
         "timestamp": datetime.now().isoformat()
     }
     
-    # 1. Memory Cache
-    SERVER_SESSION_CACHE[session_id] = data
+    # 1. Memory Cache (bounded, compressed at rest)
+    SERVER_SESSION_CACHE.put(session_id, data)
     
-    # 2. Firestore Persistence
-    if DB_CLIENT:
-        try:
-            doc_ref = DB_CLIENT.collection('meeting_sessions').document(session_id)
-            doc_ref.set(data)
-            # print(f"[Firestore] Saved session {session_id}")
-        except Exception as e:
-            print(f"[Firestore] Save Error: {e}")
+    # 2. Firestore Persistence (write-behind: returns immediately, flushed in background)
+    persister = get_session_persister()
+    if persister:
+        persister.submit(session_id, data)
 
 def load_session(session_id):
     """Load critical state from server cache (Memory -> Firestore)"""
     # 1. Try Memory first (Fastest)
-    if session_id in SERVER_SESSION_CACHE:
-        data = SERVER_SESSION_CACHE[session_id]
-        st.session_state.authenticated = data.get("authenticated", False)
-        st.session_state.original_text = data.get("original_text", "")
-        st.session_state.corrected_text = data.get("corrected_text", "")
-        st.session_state.processing_complete = data.get("processing_complete", False)
+    data = SERVER_SESSION_CACHE.get(session_id)
+    if data is not None:
+        _restore_state(data)
         return True
     
     # 2. Try Firestore (Persistence)
-    if DB_CLIENT:
+    persister = get_session_persister()
+    if persister:
         try:
-            doc_ref = DB_CLIENT.collection('meeting_sessions').document(session_id)
-            doc = doc_ref.get()
-            if doc.exists:
-                data = doc.to_dict()
-                
+            data = persister.load(session_id)
+            if data is not None:
                 # Restore to Memory for next time
-                SERVER_SESSION_CACHE[session_id] = data
+                SERVER_SESSION_CACHE.put(session_id, data)
                 
                 # Restore to State
-                st.session_state.authenticated = data.get("authenticated", False)
-                st.session_state.original_text = data.get("original_text", "")
-                st.session_state.corrected_text = data.get("corrected_text", "")
-                st.session_state.processing_complete = data.get("processing_complete", False)
+                _restore_state(data)
                 print(f"[Firestore] Restored session {session_id}")
                 return True
         except Exception as e:
@@ -137,6 +187,18 @@ def highlight_search(text: str, search_term: str, container_id: str) -> tuple[st
     return highlighted, count
 
 
+def _original_focus_offset():
+    """Character offset of the current original-text search match (None without an active search)."""
+    query = st.session_state.get("search_orig_input")
+    text = st.session_state.get("original_text") or ""
+    if not query or not text:
+        return None
+    positions = [m.start() for m in re.finditer(re.escape(query), text, re.IGNORECASE)]
+    if not positions:
+        return None
+    return positions[st.session_state.get("orig_search_idx", 0) % len(positions)]
+
+
 def render_scrollable_content(content_html: str, container_id: str, match_index: int = 0, match_count: int = 0, height: int = 600):
     """스크롤 가능한 HTML 컨테이너 렌더링"""
     scroll_script = ""
@@ -288,6 +350,7 @@ def main():
                 st.rerun()
             else:
                 st.error("비밀번호가 올바르지 않습니다.")
+        STARTUP.mark("login page rendered")
         st.stop()
     
     # --- Sidebar: File Upload & Metadata (Reordered) ---
@@ -305,9 +368,9 @@ def main():
                 return {}
         return {}
     
-    def save_config(rules: str, metadata: str):
+    def save_config(rules: str, metadata: str, namespace: str = ""):
         CONFIG_FILE.write_text(
-            json.dumps({"rules": rules, "metadata": metadata}, ensure_ascii=False, indent=2),
+            json.dumps({"rules": rules, "metadata": metadata, "namespace": namespace}, ensure_ascii=False, indent=2),
             encoding="utf-8"
         )
     
@@ -317,8 +380,8 @@ def main():
         st.subheader("1. 의사록 파일 업로드")
         uploaded_file = st.file_uploader(
             "검수할 파일을 선택하세요.", 
-            type=["txt", "hwp"],
-            help="지원 형식: TXT, HWP"
+            type=["txt", "hwp", "hwpx", "docx", "pdf"],
+            help="지원 형식: TXT, HWP, HWPX, DOCX, PDF"
         )
         
         st.divider()
@@ -336,6 +399,13 @@ def main():
         
         st.subheader("3. 회의 메타데이터 입력")
         st.info("회의명, 참석자, 주요 용어 등을 자유롭게 입력하세요. 이 정보는 오타 검수 정확도를 높이는 데 사용됩니다.")
+
+        namespace_text = st.text_input(
+            "기관/위원회 (용어 메모리 구분)",
+            value=saved_config.get("namespace", ""),
+            placeholder="예: 서울시의회/행정자치위원회",
+            help="입력한 기관/위원회의 용어집에만 용어를 저장하고 검색합니다. 비워두면 공통 메모리를 사용합니다."
+        )
         
         metadata_text = st.text_area(
             "메타데이터 (줄바꿈이나 콤마로 구분)", 
@@ -349,7 +419,7 @@ def main():
         col1, col2 = st.columns(2)
         with col1:
             if st.button("설정 저장", use_container_width=True):
-                save_config(rules_text, metadata_text)
+                save_config(rules_text, metadata_text, namespace_text)
                 st.success("저장됨!")
         with col2:
             start_btn = st.button("검수 시작", type="primary", use_container_width=True)
@@ -379,20 +449,21 @@ def main():
         except:
             pass
 
-    # --- Initialize Backend ---
-    if "workflow" not in st.session_state:
-        try:
-            from meeting_proofreader.graph import ProofreadingWorkflow
-            from meeting_proofreader.chunker import SlidingWindowChunker
-            st.session_state.workflow = ProofreadingWorkflow()
-            st.session_state.chunker = SlidingWindowChunker()
-        except Exception as e:
-            st.error(f"시스템 초기화 오류: {e}")
-
     # --- Main Logic ---
     if start_btn:
-        if uploaded_file and st.session_state.get("workflow"):
+        workflow = None
+        if uploaded_file:
+            # 워크플로우(LLM 클라이언트, 컴파일된 그래프, 의미 계층)는 프로세스 전역에서 공유
+            # 백그라운드 워밍업이 아직 끝나지 않았으면 여기서만 대기
+            with st.spinner("검수 엔진 준비 중..."):
+                try:
+                    workflow = registry.get_workflow()
+                except Exception as e:
+                    st.error(f"시스템 초기화 오류: {e}")
+
+        if uploaded_file and workflow:
             # 1. Update Semantic Layer with Metadata
+            term_list = []
             if metadata_text:
                 # Simple parsing: split by newlines or commas
                 # Ideally, we pass the raw text to a smart extractor, but for now simple terms extraction
@@ -400,124 +471,102 @@ def main():
                 raw_terms = metadata_text.replace("\n", ",").split(",")
                 term_list = [t.strip() for t in raw_terms if t.strip()]
                 
-                # Add to semantic memory
-                st.session_state.workflow.semantic_layer.add_terms(term_list)
-            
-            # 2. 파일에서 텍스트 추출 (TXT/PDF/HWP 지원)
-            from meeting_proofreader.file_parser import extract_text_from_file
+                # Add to semantic memory (기관/위원회 네임스페이스가 있으면 그쪽에만 저장)
+                workflow.memory.add_terms(term_list, namespace_text)
             
-            raw_data = uploaded_file.read()
+            # 2. 파일에서 텍스트 추출 + 청크 분할 (TXT/HWP/HWPX/DOCX/PDF 지원)
+            # 같은 내용의 파일은 해시 캐시에서 바로 가져옴 (파싱/정규화/청킹 생략)
+            raw_data = uploaded_file.getvalue()
             try:
-                raw_text = extract_text_from_file(raw_data, uploaded_file.name)
+                raw_text, chunks, cache_hit = PARSE_CACHE.get_or_parse(
+                    raw_data, uploaded_file.name, get_job_manager().chunker
+                )
             except ValueError as e:
                 st.error(str(e))
                 st.stop()
             except ImportError as e:
                 st.error(str(e))
                 st.stop()
+            if cache_hit:
+                print(f"[App] Parse cache hit for {uploaded_file.name}")
                 
-            # Normalize line endings
-            raw_text = raw_text.replace("\r\n", "\n")
             st.session_state.original_text = raw_text
             
-            # UI Components for Progress
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            
+            # 3. 작업 등록 (처리는 백그라운드 워커에서 진행)
             try:
-                # 3. Chunking
-                status_text.text("텍스트 분석 및 청크 분할 중...")
-                chunks = st.session_state.chunker.chunk_text(raw_text)
-                total_chunks = len(chunks)
-                
-                # Parallel Processing (ThreadPoolExecutor)
-                results_dict = {}
-                completed_count = 0
-                full_corrected_text = [] # Will be filled after sorting
-                
-                # 스레드에서 session_state 접근 불가하므로 미리 추출
-                workflow = st.session_state.workflow
-                
-                # Worker function for threading
-                def process_chunk_task(chunk_data, rules):
-                    # Pure python logic (no st calls here)
-                    return workflow.process_chunk(chunk_data, global_rules=rules)
-
-                max_workers = 5
-                print(f"[App] Starting parallel processing of {total_chunks} chunks with {max_workers} workers.")
-                status_text.text(f"병렬 처리 시작 ({max_workers} 스레드)...")
-                
-                with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-                    # Submit all tasks
-                    # Map future to chunk index for tracking
-                    future_to_index = {
-                        executor.submit(process_chunk_task, chunk, rules_text): chunk['index'] 
-                        for chunk in chunks
-                    }
-                    
-                    for future in concurrent.futures.as_completed(future_to_index):
-                        idx = future_to_index[future]
-                        try:
-                            result = future.result()
-                            final_text = result['final_text']
-                            results_dict[idx] = final_text
-                            print(f"[App] Finished chunk {idx}")
-                        except Exception as exc:
-                            print(f"[App] Chunk {idx} generated an exception: {exc}")
-                            # Fallback: maintain original text or error message
-                            # Retrieve original text from chunk list if possible, or just fail safely
-                            # Finding the original chunk text is expensive unless we have it handy.
-                            # We can just put a placeholder or re-raise
-                            st.error(f"Error in chunk {idx}: {exc}")
-                            results_dict[idx] = f"[Error Processing Chunk {idx}]"
-
-                        completed_count += 1
-                        progress = completed_count / total_chunks
-                        progress_bar.progress(progress)
-                        status_text.text(f"진행 중: {completed_count} / {total_chunks} 구역 완료")
-                
-                # 순서대로 정렬하여 합치기
-                full_corrected_text = []
-                for i in range(total_chunks):
-                    if i in results_dict:
-                        full_corrected_text.append(results_dict[i])
-                    else:
-                        full_corrected_text.append("") # Should not happen if all futures complete
+                job_id = get_job_manager().submit(
+                    session_id, raw_text, chunks, rules_text, workflow=workflow, glossary=term_list,
+                    namespace=namespace_text
+                )
+                st.session_state.job_id = job_id
+                st.session_state.corrected_text = ""
+                st.session_state.processing_complete = False
+                print(f"[App] Submitted job {job_id} with {len(chunks)} chunks.")
+                save_session(session_id)
+            except Exception as e:
+                import traceback
+                st.error(f"검수 중 오류 발생: {e}")
+                st.code(traceback.format_exc())
                 
-                # Finish
+        elif not uploaded_file:
+            st.warning("파일을 먼저 업로드해주세요.")
+        else:
+            st.error("백엔드 연결 실패.")
+
+    # --- Job Progress (재실행/새로고침 후에도 진행 중인 작업에 다시 연결) ---
+    job_id = st.session_state.get("job_id")
+    job_polling = False
+    if job_id and not st.session_state.processing_complete:
+        job_manager = get_job_manager()
+        # 소유 인스턴스가 사라진 작업이면 이 인스턴스에서 마지막 체크포인트부터 이어서 실행
+        job_manager.attach(session_id, job_id)
+        progress = job_manager.progress(job_id)
+        if progress is None:
+            st.session_state.job_id = None
+        else:
+            if progress["status"] in ("queued", "running"):
+                # 중지 버튼: 누르면 스크립트가 다시 실행되면서 여기서 True → 대기/진행 중인 청크 호출 취소
+                if st.button("⏹️ 검수 중지", help="남은 구역의 검수를 취소합니다. 완료된 구역의 결과는 유지됩니다."):
+                    job_manager.cancel(job_id)
+                    progress = job_manager.progress(job_id)
+            if progress["status"] in ("queued", "running"):
+                # 블로킹 루프 대신 한 번 그리고 페이지 끝에서 다시 실행 → 진행 중에도 검색/초기화 사용 가능
+                total = max(progress["total"], 1)
+                st.progress(progress["completed"] / total)
+                load = get_governor().stats()
+                waiting = f" · 전체 대기 {load['queued']}건" if load["queued"] else ""
+                st.text(f"진행 중: {progress['completed']} / {progress['total']} 구역 완료{waiting}")
+                job_polling = True
+            else:
+                progress_bar = st.progress(0)
+                status_text = st.empty()
                 progress_bar.progress(100)
-                status_text.text("완료: 모든 검수 작업이 끝났습니다.")
+                if progress["status"] == "cancelled":
+                    status_text.text(f"중지됨: {progress['completed']} / {progress['total']} 구역만 검수되었습니다.")
+                else:
+                    status_text.text("완료: 모든 검수 작업이 끝났습니다.")
                 time.sleep(1)
                 status_text.empty()
                 progress_bar.empty()
-                
-                st.session_state.corrected_text = "".join(full_corrected_text)
+
+                for idx, exc in progress["errors"].items():
+                    st.error(f"Error in chunk {idx}: {exc}")
+
+                # 실패한 작업도 완료된 청크까지의 부분 결과를 보여줌
+                st.session_state.corrected_text = job_manager.result(job_id)
                 st.session_state.processing_complete = True
+                if TRACE.enabled:
+                    st.session_state.trace_summary = TRACE.summary(prefix=job_id)
+                    st.session_state.trace_jsonl = TRACE.to_jsonl(prefix=job_id)
+                    from meeting_proofreader.routing import routing_summary
+                    st.session_state.routing_summary = routing_summary(TRACE.events(prefix=job_id))
                 print(f"[App] Processing complete. Final text length: {len(st.session_state.corrected_text)}")
-                
+            
                 # Save session after processing
                 save_session(session_id)
-                
+            
                 # Force rerun to update UI
                 st.rerun()
-                
-                # --- Save to localStorage ---
-
-                
-            except Exception as e:
-                import traceback
-                st.error(f"검수 중 오류 발생: {e}")
-                st.code(traceback.format_exc())
-                
-                # Still show partial results if any
-                if full_corrected_text:
-                    st.session_state.corrected_text = "".join(full_corrected_text)
-                    st.session_state.processing_complete = True
-                
-        elif not uploaded_file:
-            st.warning("파일을 먼저 업로드해주세요.")
-        else:
-            st.error("백엔드 연결 실패.")
 
     # --- Result View (Left: Original / Right: Diff) ---
     col1, col2 = st.columns(2)
@@ -612,7 +661,7 @@ def main():
 
             if should_compute:
                 with st.spinner("비교 화면 생성 중... (잠시만 기다려주세요)"):
-                    diff_html, diff_change_count = generate_diff_html(st.session_state.original_text, st.session_state.corrected_text)
+                    diff_html, diff_change_count = run_cpu_bound(generate_diff_html, st.session_state.original_text, st.session_state.corrected_text)
                     
                     st.session_state.cached_diff_html = diff_html
                     st.session_state.cached_diff_count = diff_change_count
@@ -675,9 +724,11 @@ def main():
         render_scrollable_content(diff_html, container_id_for_scroll, current_scroll_idx, match_count)
 
         # --- Footer Export ---
-        if st.session_state.processing_complete:
+        # 초기화는 검수 중에도 표시 (진행 중인 작업을 중지해 비용이 더 들지 않도록)
+        if st.session_state.processing_complete or job_polling:
             st.divider()
             col_dl, col_reset = st.columns([3, 1])
+        if st.session_state.processing_complete:
             with col_dl:
                 st.download_button(
                     label="수정된 파일 다운로드 (.txt)",
@@ -686,13 +737,45 @@ def main():
                     mime="text/plain",
                     use_container_width=True
                 )
+            if st.session_state.get("trace_summary"):
+                with st.expander("⏱️ 단계별 처리 통계 (Instrumentation)"):
+                    st.table(st.session_state.trace_summary)
+                    if st.session_state.get("routing_summary"):
+                        st.caption("모델 티어별 라우팅 (승급 횟수, 지연, 추정 비용)")
+                        st.table(st.session_state.routing_summary)
+                    st.download_button(
+                        label="계측 로그 다운로드 (.jsonl)",
+                        data=st.session_state.trace_jsonl,
+                        file_name=f"proofreading_trace_{datetime.now().strftime('%Y%m%d_%H%M')}.jsonl",
+                        mime="application/x-ndjson",
+                    )
+        if st.session_state.processing_complete or job_polling:
             with col_reset:
                 if st.button("🗑️ 초기화", use_container_width=True, help="검수 결과를 삭제하고 새로 시작합니다."):
+                    if st.session_state.get("job_id"):
+                        # 이 인스턴스나 다른 인스턴스에서 아직 돌고 있는 작업이면 비용이 더 들지 않도록 중지
+                        get_job_manager().cancel(st.session_state.job_id)
                     st.session_state.original_text = ""
                     st.session_state.corrected_text = ""
                     st.session_state.processing_complete = False
+                    st.session_state.job_id = None
+                    st.session_state.trace_summary = None
+                    st.session_state.routing_summary = None
+                    save_session(session_id)
 
                     st.rerun()
 
+    # --- Job Polling ---
+    # 검색 입력이 반영된 뒤(위에서 orig_search_idx 갱신) 화면에 보이는 위치 근처 구역부터 처리하도록 갱신
+    if job_polling:
+        focus = _original_focus_offset()
+        if focus is not None and (job_id, focus) != st.session_state.get("job_focus"):
+            get_job_manager().set_focus(job_id, focus)
+            st.session_state.job_focus = (job_id, focus)
+        time.sleep(1)
+        st.rerun()
+
+    STARTUP.mark("main page rendered")
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,97 @@
+"""
+TXT 인코딩 감지 벤치마크
+기존 순차 시도 디코딩과 샘플 기반 감지(detect_encoding)의 속도/정확도를 비교.
+
+사용법:
+    python bench_encoding.py                 # 합성 코퍼스
+    python bench_encoding.py ./corpus_dir    # + 실제 파일 (파일명: <이름>.<인코딩>.txt, 예: minutes.cp949.txt)
+"""
+import sys
+import time
+from pathlib import Path
+
+from meeting_proofreader.file_parser import _extract_txt, detect_encoding
+
+SIZES = [10 * 1024, 1024 * 1024, 5 * 1024 * 1024]
+ENCODINGS = ["utf-8", "utf-8-sig", "cp949", "euc-kr", "utf-16", "utf-16-le"]
+
+LINES = [
+    "○위원장 김철수  의사일정 제1항 2024년도 제1회 추가경정예산안을 상정합니다.\n",
+    "○기획예산담당관 박영희  네, 답변드리겠습니다. 결재 절차는 다음 주에 마무리됩니다.\n",
+    "○위원 이민수  미지급금 규모가 1,250만 원인데 이 부분 설명해 주시기 바랍니다.\n",
+    "(11시 20분 정회)\n",
+]
+# CP949 확장 영역 글자 (EUC-KR 완성형에 없음)
+CP949_ONLY_LINE = "○위원 똠방각하 쌰갸 뷁 관련 질의입니다.\n"
+
+
+def legacy_extract_txt(data: bytes) -> str:
+    """기존 구현: 전체 버퍼를 인코딩별로 순차 디코딩"""
+    for enc in ["utf-8", "euc-kr", "cp949", "utf-16"]:
+        try:
+            return data.decode(enc)
+        except UnicodeDecodeError:
+            continue
+    raise ValueError("파일 인코딩을 인식할 수 없습니다.")
+
+
+def build_text(size: int, encoding: str) -> str:
+    block = "".join(LINES)
+    text = (block * (size // len(block.encode("utf-8")) + 1))[:size // 2]
+    if encoding == "cp949":
+        # 확장 글자가 문서 뒤쪽에 처음 나오는 경우 (기존 방식은 euc-kr 전체 디코딩 후에야 실패)
+        text += CP949_ONLY_LINE
+    return text
+
+
+def synthetic_corpus():
+    for encoding in ENCODINGS:
+        for size in SIZES:
+            text = build_text(size, encoding)
+            yield f"synthetic-{size // 1024}KB", encoding, text, text.encode(encoding)
+
+
+def file_corpus(directory: Path):
+    for path in sorted(directory.glob("*.*.txt")):
+        encoding = path.suffixes[-2].lstrip(".")
+        data = path.read_bytes()
+        yield path.name, encoding, data.decode(encoding), data
+
+
+def measure(fn, data: bytes, expected: str, repeat: int = 3):
+    best = float("inf")
+    ok = False
+    for _ in range(repeat):
+        start = time.perf_counter()
+        try:
+            ok = fn(data) == expected
+        except ValueError:
+            ok = False
+        best = min(best, time.perf_counter() - start)
+    return best, ok
+
+
+def main():
+    corpus = list(synthetic_corpus())
+    if len(sys.argv) > 1:
+        corpus += list(file_corpus(Path(sys.argv[1])))
+
+    print(f"{'sample':<28}{'encoding':<11}{'detected':<11}{'legacy ms':>11}{'new ms':>9}{'legacy':>8}{'new':>6}")
+    totals = {"legacy": [0.0, 0], "new": [0.0, 0]}
+    for name, encoding, expected, data in corpus:
+        legacy_time, legacy_ok = measure(legacy_extract_txt, data, expected)
+        new_time, new_ok = measure(_extract_txt, data, expected)
+        totals["legacy"][0] += legacy_time
+        totals["legacy"][1] += legacy_ok
+        totals["new"][0] += new_time
+        totals["new"][1] += new_ok
+        print(f"{name:<28}{encoding:<11}{detect_encoding(data):<11}"
+              f"{legacy_time * 1000:>11.2f}{new_time * 1000:>9.2f}{str(legacy_ok):>8}{str(new_ok):>6}")
+
+    print()
+    for label, (elapsed, correct) in totals.items():
+        print(f"{label:<7} total {elapsed * 1000:9.1f} ms, accuracy {correct}/{len(corpus)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+오프라인 파이프라인 벤치마크
+네트워크 없이 FakeChatModel / FakeEmbeddingsClient로 전체 경로를 실행:
+    합성 속기록 + 오타 주입 → SlidingWindowChunker → JobManager(ProofreadingWorkflow) → generate_diff_html
+
+측정: 처리량(chars/s, chunks/s), 청크 지연 p50/p99, 메모리 피크, 오타 교정률, 프롬프트 캐시 입력 토큰 비율
+  - 메모리는 기본적으로 프로세스 최대 RSS (작은 크기부터 실행하므로 크기별 증가분 확인 가능)
+  - --tracemalloc: 파이썬 힙 피크를 정확히 측정하지만 순수 파이썬 CER/Diff가 수십 배 느려져 지연 값은 무의미
+
+사용법:
+    python bench_pipeline.py                                  # 10KB, 100KB
+    python bench_pipeline.py --sizes 10KB 10MB --time-scale 0.01
+    python bench_pipeline.py --latency-ms 1200 --sigma 0.8 --rate-429 0.02 --workers 8
+    python bench_pipeline.py --sigma 1.0 --rate-429 0.02 --rate-5xx 0.02 --hedge     # 재시도/헤징
+    python bench_pipeline.py --sizes 100KB --trace-dir traces                     # 단계별 이벤트 JSONL 저장
+"""
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+
+from meeting_proofreader.agents import ProofreaderAgents
+from meeting_proofreader.call_policy import CallPolicy
+from meeting_proofreader.chunker import SlidingWindowChunker
+from meeting_proofreader.embeddings import HashingEmbeddingProvider
+from meeting_proofreader.fakes import (
+    TYPO_PAIRS, FakeChatModel, FakeEmbeddingsClient, LatencyModel, TypoInjector, generate_transcript
+)
+from meeting_proofreader.graph import ProofreadingWorkflow
+from meeting_proofreader.instrumentation import TRACE, _percentile, cache_ratio
+from meeting_proofreader.jobs import JobManager, JobStore
+from meeting_proofreader.persistence import InMemoryFirestore
+from meeting_proofreader.routing import routing_summary
+from meeting_proofreader.semantic_layer import SemanticLayer
+from meeting_proofreader.utils.diff_view import generate_diff_html
+
+
+def parse_size(value: str) -> int:
+    units = {"KB": 1024, "MB": 1024 * 1024}
+    value = value.upper()
+    for suffix, factor in units.items():
+        if value.endswith(suffix):
+            return int(float(value[:-len(suffix)]) * factor)
+    return int(value)
+
+
+def build_workflow(args, persist_directory: str):
+    llm = FakeChatModel(
+        latency_kind=args.latency, latency_ms=args.latency_ms, latency_sigma=args.sigma,
+        time_scale=args.time_scale, rate_limit_prob=args.rate_429, server_error_prob=args.rate_5xx,
+        linebreak_error_prob=args.linebreak_errors, seed=args.seed,
+    )
+
+    def policy():
+        # 백오프/마감 시간도 시뮬레이션 지연과 같은 비율로 축소
+        return CallPolicy(deadline=args.deadline * args.time_scale, attempt_timeout=args.deadline * args.time_scale,
+                          hedge=args.hedge, hedge_min_samples=10, time_scale=args.time_scale, seed=args.seed)
+
+    tiers = [ProofreaderAgents(model_name="gpt-4o-mini", llm=llm, policy=policy())]
+    if args.tiered:
+        # 저렴한 티어는 2배 빠르지만 일부 청크에서 MODIFY를 내서 상위 티어로 승급
+        cheap = FakeChatModel(
+            latency_kind=args.latency, latency_ms=args.latency_ms / 2, latency_sigma=args.sigma,
+            time_scale=args.time_scale, rate_limit_prob=args.rate_429, server_error_prob=args.rate_5xx,
+            linebreak_error_prob=args.linebreak_errors, modify_prob=args.cheap_modify_rate, seed=args.seed + 7,
+        )
+        tiers.insert(0, ProofreaderAgents(model_name="gpt-4.1-nano", llm=cheap, policy=policy()))
+    if args.embeddings == "hashing":
+        semantic_layer = SemanticLayer(persist_directory=persist_directory, embedding_function=HashingEmbeddingProvider())
+    else:
+        embeddings = FakeEmbeddingsClient(
+            latency=LatencyModel("lognormal", args.embed_latency_ms, 0.3, args.time_scale, args.seed)
+        )
+        semantic_layer = SemanticLayer(persist_directory=persist_directory, client=embeddings)
+    workflow = ProofreadingWorkflow(
+        persist_directory=persist_directory,
+        tiers=tiers,
+        semantic_layer=semantic_layer,
+    )
+    return workflow, [t.llm for t in tiers]
+
+
+def run_once(size: int, args, persist_directory: str, meeting: int = 0) -> dict:
+    # 회의마다 다른 내용, 같은 종류의 반복 오타 (교정 학습 효과 측정)
+    clean = generate_transcript(size, seed=args.seed + meeting)
+    noisy, injected = TypoInjector(rate=args.typo_rate, seed=args.seed + meeting).inject(clean)
+
+    TRACE.enabled = True
+    TRACE.reset()
+    if args.tracemalloc:
+        tracemalloc.start()
+    start = time.perf_counter()
+
+    with open(os.devnull, "w") as devnull:
+        with redirect_stdout(devnull):
+            workflow, llms = build_workflow(args, persist_directory)
+            chunker = SlidingWindowChunker()
+            chunks = chunker.chunk_text(noisy)
+            manager = JobManager(JobStore(InMemoryFirestore()), chunker, lambda: workflow, max_workers=args.workers,
+                                 batch_chars=args.batch_chars, batch_size=args.batch_size)
+            job_id = manager.submit("bench", noisy, chunks, rules="", workflow=workflow)
+            while manager.progress(job_id)["status"] not in ("done", "failed"):
+                time.sleep(0.05)
+            corrected = manager.result(job_id)
+            # 이력 적재는 완료 후 백그라운드에서 진행: 측정에 포함되도록 기다림
+            manager.wait_history(job_id)
+            errors = manager.progress(job_id)["errors"]
+            diff_start = time.perf_counter()
+            generate_diff_html(noisy, corrected)
+            diff_seconds = time.perf_counter() - diff_start
+
+    elapsed = time.perf_counter() - start
+    if args.tracemalloc:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    else:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # Linux: KB
+
+    events = TRACE.events(job_id)
+    if args.trace_dir:
+        os.makedirs(args.trace_dir, exist_ok=True)
+        TRACE.export_jsonl(os.path.join(args.trace_dir, f"trace_{size // 1024}KB_{meeting}.jsonl"), prefix=job_id)
+    chunk_events = [e for e in events if e["stage"] == "chunk"]
+    latencies = sorted(e["duration_ms"] for e in chunk_events)
+    call_stats = [e for e in events if e["stage"] in ("correct", "correct_batch", "verify", "repair_line_breaks")]
+    routing = routing_summary(events)
+    history = [e for e in events if e["stage"] == "history"]
+    remaining = sum(corrected.count(typo) for _, typo in TYPO_PAIRS)
+    llm_events = [e for e in events if e["stage"] != "route"]
+    input_tokens = sum(e.get("input_tokens", 0) for e in llm_events)
+    return {
+        "size": size,
+        "chars": len(noisy),
+        "chunks": len(chunks),
+        "elapsed": elapsed,
+        "chars_per_s": len(noisy) / elapsed,
+        "chunks_per_s": len(chunks) / elapsed,
+        "p50_ms": _percentile(latencies, 0.50),
+        "p99_ms": _percentile(latencies, 0.99),
+        "diff_ms": diff_seconds * 1000,
+        "peak_mb": peak / (1024 * 1024),
+        "typos": injected,
+        "fixed": injected - remaining,
+        "llm_calls": sum(llm.stats["calls"] for llm in llms),
+        "rate_limited": sum(llm.stats["rate_limited"] + llm.stats["server_errors"] for llm in llms),
+        "llm_retries": sum(e.get("llm_retries", 0) for e in call_stats),
+        "hedges": sum(e.get("hedges", 0) for e in call_stats),
+        "errors": len(errors),
+        "cache_ratio": cache_ratio(input_tokens, sum(e.get("cached_tokens", 0) for e in llm_events)) or 0.0,
+        "local_only": sum(1 for e in chunk_events if e.get("local_only")),
+        "local_fixes": sum(e.get("local_fixes", 0) for e in chunk_events),
+        "history_segments": sum(e.get("segments", 0) for e in history),
+        "history_ms": sum(e["duration_ms"] for e in history),
+        "routing": routing,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline proofreading pipeline benchmark")
+    parser.add_argument("--sizes", nargs="+", default=["10KB", "100KB"])
+    parser.add_argument("--latency", choices=["constant", "uniform", "lognormal"], default="lognormal")
+    parser.add_argument("--latency-ms", type=float, default=800.0, help="median LLM latency")
+    parser.add_argument("--sigma", type=float, default=0.5, help="lognormal sigma / uniform spread")
+    parser.add_argument("--embeddings", choices=["fake", "hashing"], default="fake",
+                        help="fake: simulated OpenAI round trips, hashing: local n-gram provider")
+    parser.add_argument("--embed-latency-ms", type=float, default=150.0)
+    parser.add_argument("--time-scale", type=float, default=0.01, help="multiplier for all simulated latencies")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="probability of a simulated 429 per LLM call")
+    parser.add_argument("--rate-5xx", type=float, default=0.0, help="probability of a simulated 500 per LLM call")
+    parser.add_argument("--deadline", type=float, default=120.0, help="per-call deadline in seconds (before --time-scale)")
+    parser.add_argument("--hedge", action="store_true", help="duplicate calls slower than the observed p95")
+    parser.add_argument("--linebreak-errors", type=float, default=0.05,
+                        help="probability the fake corrector drops a line break (exercises repair)")
+    parser.add_argument("--typo-rate", type=float, default=0.3)
+    parser.add_argument("--tiered", action="store_true", help="route through a faster cheap tier first")
+    parser.add_argument("--cheap-modify-rate", type=float, default=0.1,
+                        help="with --tiered: share of chunks the cheap tier is unsure about (escalated)")
+    parser.add_argument("--batch-chars", type=int, default=0, help="batched corrector mode: chars per request (0=off)")
+    parser.add_argument("--batch-size", type=int, default=4, help="batched corrector mode: max chunks per request")
+    parser.add_argument("--workers", type=int, default=5)
+    parser.add_argument("--meetings", type=int, default=1,
+                        help="consecutive transcripts per size sharing one memory directory (learned corrections)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tracemalloc", action="store_true", help="report Python heap peak instead of max RSS")
+    parser.add_argument("--trace-dir", help="write each run's stage events to <dir>/trace_<size>KB_<meeting>.jsonl")
+    args = parser.parse_args()
+
+    print(f"{'size':>8}{'chunks':>8}{'sec':>8}{'chars/s':>10}{'chunks/s':>10}{'p50 ms':>9}{'p99 ms':>9}"
+          f"{'diff ms':>9}{'peak MB':>9}{'fixed':>13}{'calls':>7}{'4/5xx':>6}{'retry':>6}{'hedge':>6}{'err':>5}"
+          f"{'cached':>8}{'local':>11}{'history':>16}")
+    for size in map(parse_size, args.sizes):
+        with tempfile.TemporaryDirectory() as persist_directory:
+            for meeting in range(args.meetings):
+                r = run_once(size, args, persist_directory, meeting)
+                # local: LLM 없이 처리된 청크 수 / 로컬에서 적용된 학습 교정 수
+                print(f"{r['size'] // 1024:>6}KB{r['chunks']:>8}{r['elapsed']:>8.2f}{r['chars_per_s']:>10.0f}"
+                      f"{r['chunks_per_s']:>10.1f}{r['p50_ms']:>9.1f}{r['p99_ms']:>9.1f}{r['diff_ms']:>9.1f}"
+                      f"{r['peak_mb']:>9.1f}{r['fixed']:>7}/{r['typos']:<5}{r['llm_calls']:>7}{r['rate_limited']:>6}"
+                      f"{r['llm_retries']:>6}{r['hedges']:>6}{r['errors']:>5}{r['cache_ratio']:>8.0%}"
+                      f"{r['local_only']:>5}/{r['local_fixes']:<5}"
+                      f"{r['history_segments']:>6} in {r['history_ms']:>5.0f}ms")
+                if args.tiered:
+                    for row in r["routing"]:
+                        print(f"{'':>8}tier {row['tier']}: {row['attempts']} attempts, {row['escalated']} escalated, "
+                              f"p50 {row['p50_ms']} ms, p95 {row['p95_ms']} ms, cost ${row['cost_usd']}")
+                sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+임베딩 저장 형식 벤치마크
+float32 / float16 / int8 (재채점 유무) 인덱스의 메모리 사용량, 검색 지연, float32 대비 recall 비교
+
+원본 벡터는 실제 저장 형식과 같이 float32 .npy로 기록한 뒤 메모리 매핑으로 읽음
+(압축 형식의 재채점은 후보 행만 디스크에서 읽음)
+
+사용법:
+    python bench_quantization.py                         # 20,000개 x 1536차원 (text-embedding-3-small 크기)
+    python bench_quantization.py --rows 100000 --k 5
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from meeting_proofreader.instrumentation import _percentile
+from meeting_proofreader.vector_index import PoolIndex
+
+MODES = [
+    ("float32", False),
+    ("float16", False),
+    ("float16", True),
+    ("int8", False),
+    ("int8", True),
+]
+
+
+def synthetic_vectors(rows: int, dim: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    """Unit vectors around random cluster centres (similar terms share a neighbourhood, like a glossary)."""
+    centres = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centres[rng.integers(0, clusters, rows)] + 0.8 * rng.standard_normal((rows, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def list_heap_bytes(vectors: np.ndarray, sample: int = 500) -> int:
+    """Heap used by the previous in-memory form (one Python list of floats per item), extrapolated from a sample."""
+    sample = min(sample, len(vectors))
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    lists = [row.tolist() for row in vectors[:sample]]
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del lists
+    return size * len(vectors) // sample
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quantized embedding storage benchmark")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    vectors = synthetic_vectors(args.rows, args.dim, args.clusters, rng)
+    # 쿼리: 저장된 항목에 잡음을 섞은 것 (오타가 섞인 용어 검색)
+    picks = rng.integers(0, args.rows, args.queries)
+    queries = vectors[picks] + 0.05 * rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    truth = [set(np.argsort(-(vectors @ q))[:args.k]) for q in queries]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "vectors.npy")
+        np.save(path, vectors)
+        mapped = np.load(path, mmap_mode="r")
+
+        print(f"{args.rows:,} vectors x {args.dim} dims, {args.queries} queries, recall@{args.k} vs float32 exact")
+        print(f"previous list-of-floats heap: {list_heap_bytes(vectors) / 2**20:,.1f} MB")
+        print(f"{'storage':<18} {'resident':>10} {'p50 ms':>8} {'p95 ms':>8} {'recall':>8} {'top-1':>7}")
+        for dtype, rescore in MODES:
+            index = PoolIndex.build(mapped, dtype, rescore)
+            latencies, hits, top1 = [], 0, 0
+            for query, expected in zip(queries, truth):
+                started = time.perf_counter()
+                found, _ = index.search(query, args.k)
+                latencies.append(time.perf_counter() - started)
+                hits += len(expected & set(found.tolist()))
+                top1 += int(found[0] == max(expected, key=lambda i: float(vectors[i] @ query)))
+            latencies.sort()
+            label = dtype + (" + rescore" if rescore else "")
+            print(f"{label:<18} {index.resident_bytes() / 2**20:>8.1f}MB "
+                  f"{_percentile(latencies, 0.50) * 1000:>8.2f} {_percentile(latencies, 0.95) * 1000:>8.2f} "
+                  f"{hits / (args.k * len(queries)):>8.3f} {top1 / len(queries):>7.3f}")
+            del index
+        del mapped
+
+
+if __name__ == "__main__":
+    main()
@@ -1,50 +1,85 @@
-from typing import TypedDict, List, Optional, Dict, Any
-from langchain_openai import ChatOpenAI
+from typing import TypedDict, List, Optional, Dict, Any, Tuple
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from pydantic import BaseModel, Field
-import os
+import json
 
 try:
     from .prompts import CORRECTOR_SYSTEM, CORRECTOR_HUMAN, VERIFIER_SYSTEM, VERIFIER_HUMAN
+    from .prompts import CORRECTOR_BATCH_FORMAT, CORRECTOR_BATCH_HUMAN
+    from .prompt_layout import build_prompt, session_context
+    from .text_metrics import levenshtein_distance, calculate_cer as _calculate_cer
+    from .cpu_pool import run_cpu_bound
+    from .instrumentation import TRACE, add_usage
+    from .registry import get_chat_model
+    from .call_policy import CallPolicy
 except ImportError:
     from prompts import CORRECTOR_SYSTEM, CORRECTOR_HUMAN, VERIFIER_SYSTEM, VERIFIER_HUMAN
+    from prompts import CORRECTOR_BATCH_FORMAT, CORRECTOR_BATCH_HUMAN
+    from prompt_layout import build_prompt, session_context
+    from text_metrics import levenshtein_distance, calculate_cer as _calculate_cer
+    from cpu_pool import run_cpu_bound
+    from instrumentation import TRACE, add_usage
+    from registry import get_chat_model
+    from call_policy import CallPolicy
 
 
 
-def levenshtein_distance(s1: str, s2: str) -> int:
-    """Calculates Levenshtein distance between two strings."""
-    if len(s1) < len(s2):
-        return levenshtein_distance(s2, s1)
-    if len(s2) == 0:
-        return len(s1)
-    previous_row = range(len(s2) + 1)
-    for i, c1 in enumerate(s1):
-        current_row = [i + 1]
-        for j, c2 in enumerate(s2):
-            insertions = previous_row[j + 1] + 1
-            deletions = current_row[j] + 1
-            substitutions = previous_row[j] + (c1 != c2)
-            current_row.append(min(insertions, deletions, substitutions))
-        previous_row = current_row
-    return previous_row[-1]
-
 def calculate_cer(s1: str, s2: str) -> float:
-    """Calculates Character Error Rate (CER)."""
-    dist = levenshtein_distance(s1, s2)
-    return dist / max(len(s1), len(s2), 1)
+    """Calculates Character Error Rate (CER), offloaded to the CPU pool when enabled."""
+    return run_cpu_bound(_calculate_cer, s1, s2)
+
+
+def cer_threshold(length: int) -> float:
+    """
+    Maximum CER accepted for a correction of a text of `length` characters.
+    Very short (Word only): < 10 chars -> 60% (Allow 1 char fix in 2-char word: 50%)
+    Short phrase: < 50 chars -> 40%
+    Long sentence: >= 50 chars -> 20%
+    """
+    if length < 10:
+        return 0.60
+    if length < 50:
+        return 0.40
+    return 0.20
+
+
+def format_context(terms: List[str], meta_context: List[str], history: Optional[List[str]] = None) -> str:
+    """Retrieved-context block of the corrector prompt (past meetings only when the history pool had hits)."""
+    context = f"Specific Terms/Jargon identified: {terms}\nMeeting Context: {meta_context}"
+    if history:
+        context += f"\nRelated Past Meetings (for names/terms only - DO NOT COPY): {history}"
+    return context
 
 
 class AgentState(TypedDict):
     chunk_id: str
     original_text: str
     global_rules: str
+    glossary: List[str]
+    # 검색할 메모리 네임스페이스 ("기관/위원회", 빈 문자열이면 전역만)
+    namespace: str
+    # 학습된 교정표(corrections.py)를 로컬에서 먼저 적용한 결과: 교정 에이전트는 local_text를 입력으로 사용
+    local_text: Optional[str]
+    local_fixes: List[Tuple[str, str]]
+    local_only: bool
     context_data: Dict[str, Any]
     corrected_text: Optional[str]
     verification_result: Optional[Dict[str, Any]]
     final_text: Optional[str]
     pre_context: Optional[str]
     post_context: Optional[str]
+    # Tiered routing (routing.py)
+    tier: int
+    usage: Dict[str, int]
+    attempt_start: float
+    cer_guard: bool
+    correct_error: Optional[str]
+    routing: List[Dict[str, Any]]
+
+
+# 호출당 고정 system 프롬프트 + 세션 블록의 토큰 추정치 (전역 토큰 예산 차감용)
+PROMPT_TOKEN_ALLOWANCE = 1500
 
 
 class CorrectorOutput(BaseModel):
@@ -59,20 +94,33 @@ class VerifierOutput(BaseModel):
 
 
 class ProofreaderAgents:
-    def __init__(self, model_name: str = "gpt-4o-mini"):
-        api_key = os.environ.get("OPENAI_API_KEY")
-        if not api_key:
-            print("[Warning] OPENAI_API_KEY missing in Agents.")
-        # gpt-4o-mini의 경우 JSON 모드를 명시하면 더 안정적임
-        self.llm = ChatOpenAI(
-            model=model_name, 
-            temperature=0, 
-            openai_api_key=api_key,
-            model_kwargs={"response_format": {"type": "json_object"}},
-            request_timeout=60
+    def __init__(self, model_name: str = "gpt-4o-mini", llm=None, policy: Optional[CallPolicy] = None):
+        self.model_name = model_name
+        # llm: 테스트/벤치마크용 대체 채팅 모델 (예: fakes.FakeChatModel)
+        # 없으면 프로세스 전역에서 공유되는 ChatOpenAI (연결 풀 재사용)
+        self.llm = llm if llm is not None else get_chat_model(model_name)
+        # 마감 시간/재시도/헤징 (모델별 지연 분포를 따로 추적)
+        self.policy = policy or CallPolicy.from_env()
+
+        # 고정 system(역할+출력 형식) → 세션 블록(규칙+용어집) → 청크별 human 순서 (prompt_layout 참고)
+        self.corrector_parser = JsonOutputParser(pydantic_object=CorrectorOutput)
+        self.verifier_parser = JsonOutputParser(pydantic_object=VerifierOutput)
+        self.corrector_prompt = build_prompt(
+            CORRECTOR_SYSTEM + "\n\n" + self.corrector_parser.get_format_instructions(), CORRECTOR_HUMAN
         )
+        self.batch_prompt = build_prompt(CORRECTOR_SYSTEM + "\n\n" + CORRECTOR_BATCH_FORMAT, CORRECTOR_BATCH_HUMAN)
+        self.verifier_prompt = build_prompt(
+            VERIFIER_SYSTEM + "\n\n" + self.verifier_parser.get_format_instructions(), VERIFIER_HUMAN
+        )
+
+    def _invoke(self, span: Dict[str, Any], chain, inputs: Dict[str, Any]):
+        """chain.invoke under the call policy; retry/hedge counts and queue wait are recorded on the span."""
+        # 전역 토큰 예산용 추정치: 입력(글자 수 / 2) + 응답(입력과 비슷) ≈ 글자 수, 고정 프롬프트 몫 별도
+        chars = sum(len(str(value)) for value in inputs.values())
+        return self.policy.call(lambda: chain.invoke(inputs), span, tokens=chars + PROMPT_TOKEN_ALLOWANCE)
 
-    def _repair_line_breaks(self, original: str, corrected: str) -> str:
+    def _repair_line_breaks(self, original: str, corrected: str, chunk_id: Optional[str] = None,
+                            usage: Optional[Dict[str, int]] = None) -> str:
         """
         Attempts to fix line breaks in corrected text to match original text exactly.
         """
@@ -95,21 +143,36 @@ The value should be the **Corrected Text** but reformatted so it has the **EXACT
 """)
         ])
         
-        chain = repair_prompt | self.llm | JsonOutputParser()
-        try:
-            result = chain.invoke({"original": original, "corrected": corrected})
-            return result.get('corrected_text', corrected).strip()
-        except:
-             return corrected
+        chain = repair_prompt | self.llm
+        with TRACE.stage("repair_line_breaks", chunk_id) as span:
+            try:
+                message = self._invoke(span, chain, {"original": original, "corrected": corrected})
+                add_usage(span, message, usage)
+                result = JsonOutputParser().invoke(message)
+                return result.get('corrected_text', corrected).strip()
+            except:
+                 span["status"] = "failed"
+                 return corrected
 
     def corrector_agent(self, state: AgentState) -> Dict[str, Any]:
         """Agent A: 오타 교정"""
+        with TRACE.stage("correct", state.get("chunk_id")) as span:
+            span["model"] = self.model_name
+            usage = dict(state.get("usage") or {})
+            result = self._correct(state, span, usage)
+            result["usage"] = usage
+            return result
+
+    def _correct(self, state: AgentState, span: Dict[str, Any], usage: Dict[str, int]) -> Dict[str, Any]:
         print(f"--- [Agent A] Correcting Chunk {state.get('chunk_id')} ---")
-        original_text = state['original_text']
+        # 학습된 교정이 이미 적용된 텍스트에서 시작 (검증은 진짜 원문과 비교)
+        original_text = state.get('local_text') or state['original_text']
         context = state.get('context_data', {})
         
         terms = context.get('relevant_terms', [])
         meta_context = context.get('relevant_context', [])
+        # 이전 회의록(history 풀)에서 찾은 구간: 같은 이름/용어의 표기 참고용
+        history = context.get('relevant_history', [])
         
         # New: Get Neighbor Context from Chunker
         pre_ctx = state.get('pre_context', "")
@@ -119,29 +182,22 @@ The value should be the **Corrected Text** but reformatted so it has the **EXACT
         if pre_ctx or post_ctx:
              neighbor_context = f"\n[Surrounding Text for Reference - DO NOT EDIT THIS]\n(Previous): ...{pre_ctx}\n(Next): {post_ctx}..."
 
-        rules = state.get('global_rules', "오타를 수정하세요.")
-        context_str = f"Specific Terms/Jargon identified: {terms}\nMeeting Context: {meta_context}{neighbor_context}"
-        
-        parser = JsonOutputParser(pydantic_object=CorrectorOutput)
-        
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", CORRECTOR_SYSTEM),
-            ("human", CORRECTOR_HUMAN)
-        ])
-        
-        chain = prompt | self.llm | parser
+        context_str = format_context(terms, meta_context, history) + neighbor_context
+        parser = self.corrector_parser
+        chain = self.corrector_prompt | self.llm
         
         try:
-            result = chain.invoke({
-                "rules": rules,
+            message = self._invoke(span, chain, {
+                "session": session_context(state.get('global_rules'), state.get('glossary')),
                 "context": context_str,
-                "text": original_text,
-                "format_instructions": parser.get_format_instructions()
+                "text": original_text
             })
+            add_usage(span, message, usage)
+            result = parser.invoke(message)
             
             if 'corrected_text' not in result:
                 print(f"[Agent A] Error: Key 'corrected_text' missing. Raw result: {result}")
-                return {"corrected_text": original_text}
+                return {"corrected_text": original_text, "correct_error": "missing corrected_text"}
                 
             corrected = result['corrected_text']
             
@@ -155,7 +211,8 @@ The value should be the **Corrected Text** but reformatted so it has the **EXACT
                  orig_cnt = orig_strip.count('\n')
                  corr_cnt = corr_strip.count('\n')
                  print(f"[Agent A] Warning: Line break count mismatch ({orig_cnt} vs {corr_cnt}). Attempting repair...")
-                 corrected = self._repair_line_breaks(original_text, corrected)
+                 span["retries"] = span.get("retries", 0) + 1
+                 corrected = self._repair_line_breaks(original_text, corrected, state.get('chunk_id'), usage)
                  corr_strip = corrected.strip()
                  
                  # Re-check after repair - 실패해도 경고만 출력하고 계속 진행
@@ -172,29 +229,84 @@ The value should be the **Corrected Text** but reformatted so it has the **EXACT
                  corrected = left_ws + corr_strip + right_ws
             
             # 2. CER (Character Error Rate) Check
-            # Very short (Word only): < 10 chars -> 60% (Allow 1 char fix in 2-char word: 50%)
-            # Short phrase: < 50 chars -> 40%
-            # Long sentence: >= 50 chars -> 20%
-            orig_len = len(original_text)
-            if orig_len < 10:
-                cer_threshold = 0.60
-            elif orig_len < 50:
-                cer_threshold = 0.40
-            else:
-                cer_threshold = 0.20
-            
+            threshold = cer_threshold(len(original_text))
             cer = calculate_cer(original_text, corrected)
-            if cer > cer_threshold:
-                 print(f"[Agent A] Warning: CER {cer*100:.1f}% > {cer_threshold*100:.0f}%, reverting.")
-                 return {"corrected_text": original_text}
+            span["cer"] = cer
+            if cer > threshold:
+                 print(f"[Agent A] Warning: CER {cer*100:.1f}% > {threshold*100:.0f}%, reverting.")
+                 span["status"] = "cer_reverted"
+                 return {"corrected_text": original_text, "cer_guard": True}
             
             return {"corrected_text": corrected}
         except Exception as e:
             print(f"[Agent A] Error: {e}")
-            return {"corrected_text": original_text}
+            span["error"] = str(e)
+            return {"corrected_text": original_text, "correct_error": str(e)}
+
+    def batch_corrector(self, items: List[Dict[str, str]], rules: str, context_str: str,
+                        batch_id: Optional[str] = None,
+                        glossary: Optional[List[str]] = None) -> Tuple[Dict[str, str], Dict[str, int]]:
+        """
+        Agent A (batch mode): corrects several chunks in one request.
+        items: [{"id", "text"}]. Returns ({id: corrected_text} for items that passed validation, usage).
+        Items missing from the result failed validation and should be corrected individually.
+        """
+        print(f"--- [Agent A] Batch-correcting {len(items)} chunks ({batch_id}) ---")
+        usage: Dict[str, int] = {}
+        accepted: Dict[str, str] = {}
+        chain = self.batch_prompt | self.llm
+
+        with TRACE.stage("correct_batch", batch_id) as span:
+            span["model"] = self.model_name
+            span["items"] = len(items)
+            try:
+                message = self._invoke(span, chain, {
+                    "session": session_context(rules, glossary),
+                    "context": context_str,
+                    "items": json.dumps(items, ensure_ascii=False, indent=1)
+                })
+                add_usage(span, message, usage)
+                results = JsonOutputParser().invoke(message).get("results", [])
+            except Exception as e:
+                print(f"[Agent A] Batch Error: {e}")
+                span["error"] = str(e)
+                return accepted, usage
+
+            originals = {item["id"]: item["text"] for item in items}
+            for result in results:
+                if not isinstance(result, dict):
+                    continue
+                item_id = str(result.get("id"))
+                corrected = result.get("corrected_text")
+                original = originals.get(item_id)
+                if original is None or not isinstance(corrected, str) or item_id in accepted:
+                    continue
+                # 단건 교정과 같은 기준으로 검증: 줄바꿈 수 일치 + CER 가드 (실패 시 단건으로 재시도)
+                if original.strip().count('\n') != corrected.strip().count('\n'):
+                    continue
+                if original.count('\n') != corrected.count('\n'):
+                    left_ws = original[:len(original) - len(original.lstrip())]
+                    right_ws = original[len(original.rstrip()):]
+                    corrected = left_ws + corrected.strip() + right_ws
+                if calculate_cer(original, corrected) > cer_threshold(len(original)):
+                    continue
+                accepted[item_id] = corrected
+
+            span["accepted"] = len(accepted)
+            span["retries"] = len(items) - len(accepted)
+        return accepted, usage
 
     def verifier_agent(self, state: AgentState) -> Dict[str, Any]:
         """Agent B: 과도 수정 검증"""
+        with TRACE.stage("verify", state.get("chunk_id")) as span:
+            span["model"] = self.model_name
+            usage = dict(state.get("usage") or {})
+            result = self._verify(state, span, usage)
+            span["status"] = result["verification_result"]["status"]
+            result["usage"] = usage
+            return result
+
+    def _verify(self, state: AgentState, span: Dict[str, Any], usage: Dict[str, int]) -> Dict[str, Any]:
         print(f"--- [Agent B] Verifying Chunk {state.get('chunk_id')} ---")
         original = state['original_text']
         corrected = state['corrected_text']
@@ -205,23 +317,19 @@ The value should be the **Corrected Text** but reformatted so it has the **EXACT
                 "final_text": original
             }
 
-        rules = state.get('global_rules', "오타 수정 여부를 검증하세요.")
-        parser = JsonOutputParser(pydantic_object=VerifierOutput)
-        
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", VERIFIER_SYSTEM),
-            ("human", VERIFIER_HUMAN)
-        ])
-        
-        chain = prompt | self.llm | parser
+        parser = self.verifier_parser
+        chain = self.verifier_prompt | self.llm
         
         try:
-            result = chain.invoke({
-                "rules": rules,
+            message = self._invoke(span, chain, {
+                "session": session_context(state.get('global_rules'), state.get('glossary'),
+                                           default_rules="오타 수정 여부를 검증하세요.",
+                                           rules_header="사용자 추가 규칙 (참고용)"),
                 "original": original,
-                "corrected": corrected,
-                "format_instructions": parser.get_format_instructions()
+                "corrected": corrected
             })
+            add_usage(span, message, usage)
+            result = parser.invoke(message)
             
             status = result['status']
             final = result['final_text']
@@ -253,16 +361,11 @@ The value should be the **Corrected Text** but reformatted so it has the **EXACT
                 
                 # 2. CER Check
                 # Same threshold logic as Corrector
-                orig_len = len(original)
-                if orig_len < 10:
-                    cer_threshold = 0.60
-                elif orig_len < 50:
-                    cer_threshold = 0.40
-                else:
-                    cer_threshold = 0.20
-                
-                if not should_revert and calculate_cer(original, final) > cer_threshold:
-                     print(f"[Agent B] MODIFY Result CER too high ({calculate_cer(original, final)*100:.1f}% > {cer_threshold*100:.0f}%).")
+                threshold = cer_threshold(len(original))
+                cer = calculate_cer(original, final)
+                span["cer"] = cer
+                if not should_revert and cer > threshold:
+                     print(f"[Agent B] MODIFY Result CER too high ({cer*100:.1f}% > {threshold*100:.0f}%).")
                      should_revert = True
                 
                 if should_revert:
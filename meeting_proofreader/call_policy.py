@@ -0,0 +1,317 @@
+"""
+LLM 호출 정책 모듈
+호출별 마감 시간(deadline), 오류 종류별 지수 백오프 재시도, 선택적 헤징(hedged request)으로
+느린 응답 하나가 문서 전체를 붙잡지 않도록 함
+
+- 429(Rate limit): Retry-After 헤더가 있으면 따르고, 없으면 긴 백오프
+- 5xx / 연결 오류: 짧은 백오프 후 재시도
+- 타임아웃: 바로 재시도 (마감 시간 안에서). 시도 하나는 min(attempt_timeout, 남은 마감 시간)까지만 기다림
+  (응답 없이 멈춘 요청이 마감 시간 전체를 쓰지 않도록, 멈춘 요청의 결과는 버려짐)
+- 그 밖의 4xx / 파싱 오류: 재시도하지 않음
+- 헤징: 모델별 최근 지연의 p95가 지나도 응답이 없으면 같은 요청을 한 번 더 보내고 먼저 온 응답을 사용
+- 취소: 작업 스레드에 걸린 CancelToken이 설정되면 대기 중인 호출/백오프를 CANCEL_POLL 이내에 중단
+  (이미 전송된 HTTP 요청의 응답은 버려짐)
+- 전역 동시성: 각 시도는 governor.Governor의 허가를 받은 뒤 전송 (모든 시도의 허가 대기 시간은 마감 시간에 포함하지 않음)
+
+환경변수:
+- PROOFREADER_LLM_DEADLINE: 호출 하나(재시도 포함)의 마감 시간(초) (기본 120)
+- PROOFREADER_LLM_ATTEMPT_TIMEOUT: 시도 1회의 최대 대기 시간(초), HTTP 타임아웃으로도 사용 (기본 60)
+- PROOFREADER_LLM_MAX_ATTEMPTS: 최대 시도 횟수 (기본 4)
+- PROOFREADER_HEDGE=1: 헤징 활성화 (기본 비활성화, 헤징된 호출만큼 요청 수 증가)
+- PROOFREADER_HEDGE_QUANTILE: 헤징 기준 지연 분위수 (기본 0.95)
+"""
+import concurrent.futures
+import contextvars
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+try:
+    from .instrumentation import _percentile
+except ImportError:
+    from instrumentation import _percentile
+
+# 헤징/재시도 요청을 실행하는 공유 스레드 풀 (진 쪽 요청은 취소할 수 없어 끝날 때까지 여기서 실행됨)
+_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> concurrent.futures.ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = int(os.environ.get("PROOFREADER_HTTP_MAX_CONNECTIONS", "32"))
+            _executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm-call")
+        return _executor
+
+
+class DeadlineExceeded(TimeoutError):
+    """The call (including retries and hedges) did not finish before its deadline."""
+
+
+class AttemptTimeout(TimeoutError):
+    """One attempt got no response within attempt_timeout (retried while the deadline allows)."""
+
+
+class Cancelled(Exception):
+    """The job this call belongs to was cancelled."""
+
+
+# 취소 신호를 확인하는 최대 간격(초)
+CANCEL_POLL = 0.2
+
+
+class CancelToken:
+    """Cooperative cancellation flag shared by every task of a job."""
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def wait(self, seconds: float) -> bool:
+        """Sleeps up to `seconds`; returns True (early) when cancelled."""
+        return self._event.wait(seconds)
+
+
+# 현재 스레드(컨텍스트)가 처리 중인 작업의 취소 토큰 (LangGraph 노드 실행 시에도 전파됨)
+_current_token: contextvars.ContextVar[Optional[CancelToken]] = contextvars.ContextVar("cancel_token", default=None)
+
+
+@contextmanager
+def cancel_scope(token: CancelToken):
+    """Binds `token` to the current context, so nested agent calls observe cancellation."""
+    reset = _current_token.set(token)
+    try:
+        yield token
+    finally:
+        _current_token.reset(reset)
+
+
+def check_cancelled():
+    """Raises Cancelled if the current context's job was cancelled."""
+    token = _current_token.get()
+    if token is not None and token.cancelled:
+        raise Cancelled("job cancelled")
+
+
+def classify_error(error: BaseException) -> Optional[str]:
+    """'rate_limit' | 'server' | 'timeout' for retryable errors, None for everything else."""
+    if isinstance(error, (TimeoutError, concurrent.futures.TimeoutError)):
+        return "timeout"
+    name = type(error).__name__
+    if name in ("APITimeoutError", "ReadTimeout", "WriteTimeout", "ConnectTimeout", "PoolTimeout", "TimeoutException"):
+        return "timeout"
+    if name in ("APIConnectionError", "ConnectError", "RemoteProtocolError", "ReadError"):
+        return "server"
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if status == 429:
+        return "rate_limit"
+    if isinstance(status, int) and status >= 500:
+        return "server"
+    return None
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _used_tokens(future: concurrent.futures.Future) -> Optional[int]:
+    """Actual token usage of a finished call (None if it failed or reported none)."""
+    if future.cancelled() or future.exception() is not None:
+        return None
+    message, _ = future.result()
+    usage = getattr(message, "usage_metadata", None) or {}
+    return usage.get("total_tokens")
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies (seconds) for one model."""
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float, min_samples: int = 20) -> Optional[float]:
+        """None until `min_samples` latencies were observed."""
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return None
+            samples = sorted(self._samples)
+        return _percentile(samples, q)
+
+
+class CallPolicy:
+    """
+    Deadline + retry + hedging wrapper around a blocking call (e.g. `chain.invoke`).
+    Delays are in seconds; `time_scale` shrinks them for offline benchmarks.
+    """
+    BASE_DELAYS = {"rate_limit": 2.0, "server": 0.5, "timeout": 0.0}
+
+    def __init__(self, deadline: float = 120.0, attempt_timeout: float = 60.0, max_attempts: int = 4,
+                 max_delay: float = 20.0, hedge: bool = False, hedge_quantile: float = 0.95,
+                 hedge_min_samples: int = 20, time_scale: float = 1.0, seed: Optional[int] = None,
+                 governor=None):
+        self.deadline = deadline
+        self.attempt_timeout = attempt_timeout
+        self.max_attempts = max(1, max_attempts)
+        self.max_delay = max_delay
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.time_scale = time_scale
+        # governor.Governor: 프로세스 전역 동시 호출/토큰 예산 (None이면 제한 없음)
+        self.governor = governor
+        self.latency = LatencyTracker()
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "CallPolicy":
+        try:
+            from .registry import get_governor
+        except ImportError:
+            from registry import get_governor
+        return cls(
+            governor=get_governor(),
+            deadline=float(os.environ.get("PROOFREADER_LLM_DEADLINE", "120")),
+            attempt_timeout=float(os.environ.get("PROOFREADER_LLM_ATTEMPT_TIMEOUT", "60")),
+            max_attempts=int(os.environ.get("PROOFREADER_LLM_MAX_ATTEMPTS", "4")),
+            hedge=os.environ.get("PROOFREADER_HEDGE", "").lower() not in ("", "0", "false", "no"),
+            hedge_quantile=float(os.environ.get("PROOFREADER_HEDGE_QUANTILE", "0.95")),
+        )
+
+    def backoff(self, kind: str, attempt: int, error: Optional[BaseException] = None) -> float:
+        """Full-jitter exponential backoff; a 429's Retry-After header wins when present."""
+        retry_after = _retry_after(error) if error is not None and kind == "rate_limit" else None
+        if retry_after is not None:
+            return min(retry_after, self.max_delay) * self.time_scale
+        cap = min(self.BASE_DELAYS.get(kind, 1.0) * (2 ** attempt), self.max_delay)
+        with self._rng_lock:
+            return self._rng.uniform(cap / 2, cap) * self.time_scale
+
+    def _timed(self, fn: Callable[[], Any]):
+        start = time.perf_counter()
+        result = fn()
+        return result, time.perf_counter() - start
+
+    def _admit(self, tokens: int, stats: Dict[str, Any]):
+        """Waits for a global call slot (governor.py); queue time does not count against the deadline."""
+        if self.governor is None:
+            return None
+        token = _current_token.get()
+        start = time.monotonic()
+        permit = self.governor.acquire(tokens, should_abort=(lambda: token.cancelled) if token is not None else None)
+        stats["queue_wait_ms"] = round(stats.get("queue_wait_ms", 0.0) + (time.monotonic() - start) * 1000, 1)
+        if permit is None:
+            raise Cancelled("job cancelled")
+        return permit
+
+    def _submit(self, fn: Callable[[], Any], permit):
+        future = _get_executor().submit(self._timed, fn)
+        if permit is not None:
+            # 진 쪽 헤지 요청도 끝날 때까지 연결을 쓰므로 완료 시점에 반납 (실제 토큰으로 정산)
+            future.add_done_callback(lambda f: self.governor.release(permit, _used_tokens(f)))
+        return future
+
+    def _attempt(self, fn: Callable[[], Any], permit, tokens: int, deadline_at: float, stats: Dict[str, Any]):
+        """One attempt, hedged once after the tracked latency quantile. Returns the first successful result."""
+        token = _current_token.get()
+        primary = self._submit(fn, permit)
+        futures = [primary]
+        hedge_after = self.latency.quantile(self.hedge_quantile, self.hedge_min_samples) if self.hedge else None
+        started = time.monotonic()
+        timeout_at = started + self.attempt_timeout
+        last_error: Optional[BaseException] = None
+
+        while futures:
+            now = time.monotonic()
+            remaining = deadline_at - now
+            if remaining <= 0:
+                raise DeadlineExceeded(f"LLM call exceeded its {self.deadline:.0f}s deadline")
+            if now >= timeout_at:
+                # 멈춘 요청은 취소할 수 없으므로 결과를 버리고 새 시도로 재시도 (call()에서 timeout으로 분류)
+                raise AttemptTimeout(f"LLM attempt got no response within {self.attempt_timeout:g}s")
+            wait = min(remaining, timeout_at - now)
+            if hedge_after is not None:
+                wait = min(wait, max(started + hedge_after - now, 0.0))
+            if token is not None:
+                wait = min(wait, CANCEL_POLL)
+            done, _ = concurrent.futures.wait(futures, timeout=wait, return_when=concurrent.futures.FIRST_COMPLETED)
+            if token is not None and token.cancelled:
+                raise Cancelled("job cancelled")
+            for future in done:
+                futures.remove(future)
+                try:
+                    result, seconds = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                self.latency.record(seconds)
+                if future is not primary:
+                    stats["hedge_wins"] = stats.get("hedge_wins", 0) + 1
+                return result
+            if not done and hedge_after is not None and time.monotonic() - started >= hedge_after:
+                # p95가 지나도록 응답이 없으면 중복 요청 1회 (먼저 도착한 응답 사용)
+                # 전역 동시성 여유가 있을 때만 (대기 중인 다른 세션의 몫을 빼앗지 않음)
+                hedge_after = None
+                hedge_permit = self.governor.try_acquire(tokens) if self.governor is not None else None
+                if self.governor is None or hedge_permit is not None:
+                    stats["hedges"] = stats.get("hedges", 0) + 1
+                    futures.append(self._submit(fn, hedge_permit))
+        raise last_error
+
+    def call(self, fn: Callable[[], Any], stats: Optional[Dict[str, Any]] = None, tokens: int = 0) -> Any:
+        """
+        Runs `fn` under the policy. `stats` (e.g. a trace span) receives llm_retries / hedges / queue_wait_ms.
+        `tokens` is the estimated token use charged against the governor's budget until the real usage is known.
+        Raises the last error when it is not retryable or attempts run out, DeadlineExceeded on deadline,
+        Cancelled when the current job is cancelled (see cancel_scope).
+        """
+        stats = stats if stats is not None else {}
+        deadline_at = None
+        for attempt in range(self.max_attempts):
+            check_cancelled()
+            admit_start = time.monotonic()
+            permit = self._admit(tokens, stats)
+            if deadline_at is None:
+                deadline_at = time.monotonic() + self.deadline
+            else:
+                # 재시도의 허가 대기도 첫 시도와 같이 마감 시간에서 제외
+                deadline_at += time.monotonic() - admit_start
+            try:
+                return self._attempt(fn, permit, tokens, deadline_at, stats)
+            except (DeadlineExceeded, Cancelled):
+                raise
+            except Exception as e:
+                kind = classify_error(e)
+                if kind is None or attempt + 1 >= self.max_attempts:
+                    raise
+                delay = self.backoff(kind, attempt, e)
+                if time.monotonic() + delay >= deadline_at:
+                    raise
+                stats["llm_retries"] = stats.get("llm_retries", 0) + 1
+                print(f"[CallPolicy] {kind} ({type(e).__name__}), retrying in {delay:.2f}s "
+                      f"(attempt {attempt + 2}/{self.max_attempts})")
+                token = _current_token.get()
+                if token is not None:
+                    token.wait(delay)
+                else:
+                    time.sleep(delay)
@@ -1,6 +1,9 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Tuple
 import uuid
 
+# Context window size (how much to look back/ahead)
+CONTEXT_WINDOW = 200
+
 class SlidingWindowChunker:
     """
     Splits long text into overlapping chunks for processing.
@@ -23,51 +26,10 @@ class SlidingWindowChunker:
         text_len = len(text)
         start = 0
         chunk_index = 0
-        
-        # Context window size (how much to look back/ahead)
-        context_window = 200
 
         while start < text_len:
-            # Determine potential end of chunk
-            end = min(start + self.window_size, text_len)
-            
-            # If we are not at the end of the text, try to find a natural break point (newline/space)
-            if end < text_len:
-                # Look for last newline in the last 10% of the window
-                search_limit = max(start, end - int(self.window_size * 0.1))
-                
-                # Priority 1: Newline
-                last_newline = text.rfind('\n', search_limit, end)
-                if last_newline != -1:
-                    end = last_newline + 1 # Include the newline
-                else:
-                    # Priority 2: Space
-                    last_space = text.rfind(' ', search_limit, end)
-                    if last_space != -1:
-                        end = last_space + 1 # Include the space
-            
-            chunk_text = text[start:end]
-            
-            # --- Get Context ---
-            # Pre-context: ensure we don't go below 0
-            pre_start = max(0, start - context_window)
-            pre_context = text[pre_start:start]
-            
-            # Post-context: ensure we don't go beyond text_len
-            post_end = min(text_len, end + context_window)
-            post_context = text[end:post_end]
-            # -------------------
-            
-            chunk_data = {
-                "id": str(uuid.uuid4()),
-                "index": chunk_index,
-                "text": chunk_text,
-                "pre_context": pre_context,   # Previous text (for reference only)
-                "post_context": post_context, # Next text (for reference only)
-                "start_char": start,
-                "end_char": end,
-            }
-            chunks.append(chunk_data)
+            end = self._find_end(text, start, text_len)
+            chunks.append(self._make_chunk(text, chunk_index, start, end))
             
             chunk_index += 1
             
@@ -75,3 +37,92 @@ class SlidingWindowChunker:
             start = end
             
         return chunks
+
+    def chunk_stream(self, paragraphs: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        """
+        Streaming variant of chunk_text for paragraph iterators (see file_parser.iter_paragraphs_from_file).
+        Yields exactly the chunks chunk_text("\\n".join(paragraphs)) would produce, emitting each one
+        as soon as its break point and post-context are known, while buffering only
+        about window_size + 2 * CONTEXT_WINDOW characters.
+        """
+        buf = ""        # text[offset:]
+        offset = 0      # absolute position of buf[0]
+        start = 0       # absolute start of the next chunk
+        chunk_index = 0
+        first = True
+        lookahead = self.window_size + CONTEXT_WINDOW
+
+        def emit(text_len: int) -> Dict[str, Any]:
+            rel_start = start - offset
+            rel_end = self._find_end(buf, rel_start, text_len)
+            chunk = self._make_chunk(buf, chunk_index, rel_start, rel_end)
+            chunk["start_char"] += offset
+            chunk["end_char"] += offset
+            return chunk
+
+        for paragraph in paragraphs:
+            buf += paragraph if first else "\n" + paragraph
+            first = False
+            while offset + len(buf) - start > lookahead:
+                chunk = emit(len(buf))
+                yield chunk
+                chunk_index += 1
+                start = chunk["end_char"]
+                # 다음 청크의 pre_context에 필요한 만큼만 남기고 버림
+                keep_from = max(0, start - CONTEXT_WINDOW - offset)
+                buf = buf[keep_from:]
+                offset += keep_from
+
+        while start < offset + len(buf):
+            chunk = emit(len(buf))
+            yield chunk
+            chunk_index += 1
+            start = chunk["end_char"]
+
+    def chunks_from_boundaries(self, text: str, boundaries: List[Tuple[int, int]]) -> List[Dict[str, Any]]:
+        """
+        Rebuilds chunk dicts from previously computed (start_char, end_char) boundaries,
+        e.g. when resuming a persisted job.
+        """
+        return [self._make_chunk(text, i, start, end) for i, (start, end) in enumerate(boundaries)]
+
+    def _find_end(self, text: str, start: int, text_len: int) -> int:
+        # Determine potential end of chunk
+        end = min(start + self.window_size, text_len)
+        
+        # If we are not at the end of the text, try to find a natural break point (newline/space)
+        if end < text_len:
+            # Look for last newline in the last 10% of the window
+            search_limit = max(start, end - int(self.window_size * 0.1))
+            
+            # Priority 1: Newline
+            last_newline = text.rfind('\n', search_limit, end)
+            if last_newline != -1:
+                end = last_newline + 1 # Include the newline
+            else:
+                # Priority 2: Space
+                last_space = text.rfind(' ', search_limit, end)
+                if last_space != -1:
+                    end = last_space + 1 # Include the space
+        return end
+
+    def _make_chunk(self, text: str, index: int, start: int, end: int) -> Dict[str, Any]:
+        # --- Get Context ---
+        # Pre-context: ensure we don't go below 0
+        pre_start = max(0, start - CONTEXT_WINDOW)
+        pre_context = text[pre_start:start]
+        
+        # Post-context: ensure we don't go beyond text_len
+        post_end = min(len(text), end + CONTEXT_WINDOW)
+        post_context = text[end:post_end]
+        # -------------------
+        
+        return {
+            "id": str(uuid.uuid4()),
+            "index": index,
+            "text": text[start:end],
+            "pre_context": pre_context,   # Previous text (for reference only)
+            "post_context": post_context, # Next text (for reference only)
+            "start_char": start,
+            "end_char": end,
+        }
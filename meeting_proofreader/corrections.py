@@ -0,0 +1,384 @@
+"""
+교정 학습 모듈
+검증 에이전트가 ACCEPT한 수정(원문 구간 → 교정, 앞뒤 단어)을 기록해 반복되는 속기 오타("결제"→"결재",
+"미지금 급"→"미지급 금")를 학습하고, 확신도가 높은 교정은 LLM 호출 전에 로컬에서 바로 적용
+
+- 학습: LLM이 받은 텍스트(로컬 교정 후)와 최종본을 단어(\\w+) 단위로 비교해 바뀐 구간(최대 3단어)을
+  (원문 구간, 교정) 쌍으로 누적 (로컬 교정이 적용된 구간은 새 채택으로 다시 세지 않고 확인 횟수로 따로 기록)
+- 반대 증거: 학습된 원문 구간이 ACCEPT 결과에 그대로 남은 경우(예: "카드 결제"), 로컬 교정이 REJECT되거나
+  LLM이 되돌린 경우
+- 적용 조건: 채택 MIN_SUPPORT회 이상 + 확신도(채택 / 전체 관측) MIN_CONFIDENCE 이상,
+  원문 구간이 그대로 유지된 적이 있는 앞/뒤 단어 옆에서는 적용하지 않음
+- 확신 교정 전체를 하나의 정규식으로 컴파일해 청크당 한 번의 스캔으로 적용
+  관측마다 다시 컴파일하지 않고, 확신 규칙 집합이 실제로 바뀐 경우에만 다음 apply()에서
+  (RECOMPILE_CHANGES회 변경이 쌓였거나 RECOMPILE_INTERVAL초가 지났으면) 지연 컴파일
+- 반대 증거 탐색은 학습된 전체 원문 구간을 정규식으로 묶지 않고 단어 구간(최대 3단어) 사전 조회로 처리
+- 로컬 교정 후 텍스트가 이전에 LLM이 아무것도 고치지 않고 ACCEPT한 텍스트와 정확히 같으면
+  (반복되는 상용구 구역 등) 그 청크는 LLM 교정/검증을 생략 (PROOFREADER_LOCAL_SKIP, 기본 꺼짐)
+
+저장: 네임스페이스별 (한 위원회에서 학습한 교정이 다른 기관/위원회에 적용되지 않도록)
+- 전역(네임스페이스 없음): <메모리 디렉터리>/corrections.json
+- 네임스페이스: <메모리 디렉터리>/namespaces/<기관>/<위원회>/corrections.json (memory_namespaces와 같은 경로)
+
+환경변수:
+- PROOFREADER_CORRECTIONS: 교정 학습/로컬 적용 사용 여부 (기본 1)
+- PROOFREADER_LOCAL_SKIP: 이전에 그대로 ACCEPT된 텍스트와 같은 청크의 LLM 생략 여부 (기본 0)
+"""
+import difflib
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from .memory_namespaces import NAMESPACE_DIR
+except ImportError:
+    from memory_namespaces import NAMESPACE_DIR
+
+MIN_SUPPORT = 3
+MIN_CONFIDENCE = 0.9
+# 학습할 수정 구간의 최대 단어 수 / 글자 수 (큰 재작성은 반복 오타가 아님)
+MAX_EDIT_WORDS = 3
+MAX_EDIT_CHARS = 40
+# 표가 무한히 커지지 않도록: 넘치면 한 번만 관측된 항목 / 오래된 해시부터 정리
+MAX_PATTERNS = 50000
+MAX_ACCEPTED = 200000
+MAX_CONTEXTS = 50
+SAVE_INTERVAL = 10.0
+# 확신 규칙이 바뀐 뒤 matcher를 다시 컴파일하는 조건 (변경 횟수 / 마지막 컴파일 후 경과 시간)
+RECOMPILE_CHANGES = 20
+RECOMPILE_INTERVAL = 2.0
+
+_WORD = re.compile(r"\w+")
+_SPACED_WORDS = re.compile(r"\w+(?: \w+)*")
+_WORD_BEFORE = re.compile(r"(\w+)\W*$")
+# match(text, pos)로만 사용 (^는 pos가 아니라 문자열 처음에서만 일치하므로 쓰지 않음)
+_WORD_AFTER = re.compile(r"\W*(\w+)")
+
+
+class Edit:
+    """One word-level change between an original and its accepted correction."""
+    __slots__ = ("source", "target", "start", "end", "left", "right")
+
+    def __init__(self, source: str, target: str, start: int, end: int, left: str, right: str):
+        self.source = source
+        self.target = target
+        self.start = start
+        self.end = end
+        self.left = left
+        self.right = right
+
+
+def extract_edits(original: str, final: str) -> List[Edit]:
+    """Replaced word spans (at most MAX_EDIT_WORDS words, single-space separated) from original to final."""
+    a = [(m.start(), m.end()) for m in _WORD.finditer(original)]
+    b = [(m.start(), m.end()) for m in _WORD.finditer(final)]
+    a_words = [original[s:e] for s, e in a]
+    b_words = [final[s:e] for s, e in b]
+    edits = []
+    matcher = difflib.SequenceMatcher(None, a_words, b_words, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != "replace" or i2 - i1 > MAX_EDIT_WORDS or j2 - j1 > MAX_EDIT_WORDS:
+            continue
+        source = original[a[i1][0]:a[i2 - 1][1]]
+        target = final[b[j1][0]:b[j2 - 1][1]]
+        if len(source) > MAX_EDIT_CHARS or not _SPACED_WORDS.fullmatch(source) or not _SPACED_WORDS.fullmatch(target):
+            continue
+        edits.append(Edit(source, target, a[i1][0], a[i2 - 1][1],
+                          a_words[i1 - 1] if i1 else "", a_words[i2] if i2 < len(a_words) else ""))
+    return edits
+
+
+def text_digest(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:20]
+
+
+def _bounded_increment(counter: Dict[str, int], key: str, limit: int = MAX_CONTEXTS):
+    if key in counter or len(counter) < limit:
+        counter[key] = counter.get(key, 0) + 1
+
+
+def _word_pattern(sources: List[str]) -> Optional["re.Pattern"]:
+    if not sources:
+        return None
+    # 긴 구간 우선 (예: "미지금 급이"가 "미지금"보다 먼저), 단어 경계에서만 일치
+    alternation = "|".join(re.escape(s) for s in sorted(sources, key=len, reverse=True))
+    return re.compile(rf"(?<!\w)(?:{alternation})(?!\w)")
+
+
+def _word_spans(text: str, known: Dict[str, Any]):
+    """
+    Yields (start, end, source) for non-overlapping spans of text that are keys of `known`,
+    scanning left to right and preferring the longest (up to MAX_EDIT_WORDS single-space separated words).
+    Same matches as _word_pattern(list(known)) without compiling an alternation over every key.
+    """
+    words = [(m.start(), m.end()) for m in _WORD.finditer(text)]
+    i = 0
+    while i < len(words):
+        for n in range(min(MAX_EDIT_WORDS, len(words) - i), 0, -1):
+            if any(text[words[k][1]:words[k + 1][0]] != " " for k in range(i, i + n - 1)):
+                continue
+            source = text[words[i][0]:words[i + n - 1][1]]
+            if source in known:
+                yield words[i][0], words[i + n - 1][1], source
+                i += n
+                break
+        else:
+            i += 1
+
+
+class _Matcher:
+    """Immutable compiled form of the confident rules (swapped atomically on change)."""
+    __slots__ = ("pattern", "rules")
+
+    def __init__(self, rules: Dict[str, Tuple[str, frozenset]]):
+        self.rules = rules                          # source -> (target, vetoed contexts)
+        self.pattern = _word_pattern(list(rules))
+
+
+class CorrectionTable:
+    """
+    Learned (source span -> replacement) corrections with counter-evidence, persisted as JSON.
+    observe() learns from verifier results; apply() rewrites a chunk with the confident rules.
+    Thread-safe: apply() reads an immutable matcher without locking; the matcher is recompiled
+    lazily, only after the set of confident rules changed (see RECOMPILE_CHANGES / RECOMPILE_INTERVAL).
+    """
+    def __init__(self, path: Optional[str] = None, min_support: int = MIN_SUPPORT,
+                 min_confidence: float = MIN_CONFIDENCE, local_skip: bool = False,
+                 recompile_changes: int = RECOMPILE_CHANGES, recompile_interval: float = RECOMPILE_INTERVAL):
+        self.path = path
+        self.min_support = min_support
+        self.min_confidence = min_confidence
+        self.local_skip = local_skip
+        self.recompile_changes = max(1, recompile_changes)
+        self.recompile_interval = recompile_interval
+        # source -> {"targets": {target: n}, "rejected": {target: n}, "confirmed": {target: n}, "kept": n,
+        #            "contexts": {"L:단어"|"R:단어": n} (채택 문맥), "kept_contexts": {...} (유지 문맥)}
+        # confirmed: 로컬 적용 후 ACCEPT된 횟수 (확신도에는 넣지 않음, 규칙이 스스로를 강화하지 않도록)
+        self.patterns: Dict[str, Dict[str, Any]] = {}
+        # LLM이 아무것도 고치지 않고 ACCEPT한 텍스트의 해시 (삽입 순서 = 오래된 순)
+        self.accepted: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        # 현재 확신 규칙 (관측 시 바로 갱신) / 컴파일된 matcher (지연 갱신)
+        self._promoted: Dict[str, Tuple[str, frozenset]] = {}
+        self._matcher = _Matcher({})
+        self._changes = 0
+        self._compiled_at = time.monotonic()
+        self.recompiles = 0
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        self.load()
+
+    @classmethod
+    def from_env(cls, persist_directory: str = "./chroma_db", namespace: str = "") -> Optional["CorrectionTable"]:
+        """Table for one namespace ('' = global) of a memory directory; None when PROOFREADER_CORRECTIONS=0."""
+        if os.environ.get("PROOFREADER_CORRECTIONS", "1").strip().lower() in ("0", "false", "no"):
+            return None
+        directory = persist_directory
+        if namespace:
+            directory = os.path.join(persist_directory, NAMESPACE_DIR, *namespace.split("/"))
+        return cls(
+            path=os.path.join(directory, "corrections.json"),
+            local_skip=os.environ.get("PROOFREADER_LOCAL_SKIP", "0").strip().lower() not in ("", "0", "false", "no"),
+        )
+
+    # --- Rules ---
+    def confidence(self, source: str, target: str) -> float:
+        entry = self.patterns.get(source)
+        if not entry:
+            return 0.0
+        observed = sum(entry["targets"].values()) + entry["kept"] + entry["rejected"].get(target, 0)
+        return entry["targets"].get(target, 0) / observed if observed else 0.0
+
+    def _rule(self, source: str) -> Optional[Tuple[str, frozenset]]:
+        entry = self.patterns[source]
+        target, accepted = max(entry["targets"].items(), key=lambda item: item[1])
+        if accepted < self.min_support or self.confidence(source, target) < self.min_confidence:
+            return None
+        return target, frozenset(entry["kept_contexts"])
+
+    def _refresh(self, sources):
+        """Re-evaluates the rules of the touched sources (lock held); counts changes to the confident set."""
+        for source in sources:
+            rule = self._rule(source) if source in self.patterns else None
+            if rule == self._promoted.get(source):
+                continue
+            if rule is None:
+                del self._promoted[source]
+            else:
+                self._promoted[source] = rule
+            self._changes += 1
+
+    def _recompile(self):
+        """Rebuilds the matcher from the confident rules (lock held)."""
+        self._matcher = _Matcher(dict(self._promoted))
+        self._changes = 0
+        self._compiled_at = time.monotonic()
+        self.recompiles += 1
+
+    def _current_matcher(self) -> _Matcher:
+        if self._changes and (self._changes >= self.recompile_changes
+                              or time.monotonic() - self._compiled_at >= self.recompile_interval):
+            with self._lock:
+                if self._changes:
+                    self._recompile()
+        return self._matcher
+
+    def rules(self) -> Dict[str, str]:
+        """The confident rules currently applied: {source: target}."""
+        return {source: target for source, (target, _) in self._current_matcher().rules.items()}
+
+    # --- Apply ---
+    def apply(self, text: str) -> Tuple[str, List[Tuple[str, str]]]:
+        """Returns (text with confident corrections applied, [(source, target), ...] applied)."""
+        matcher = self._current_matcher()
+        if not text or matcher.pattern is None:
+            return text, []
+        applied = []
+
+        def replace(match):
+            source = match.group(0)
+            target, vetoed = matcher.rules[source]
+            if vetoed:
+                before = _WORD_BEFORE.search(text, max(0, match.start() - MAX_EDIT_CHARS), match.start())
+                after = _WORD_AFTER.match(text, match.end(), match.end() + MAX_EDIT_CHARS)
+                if (before and "L:" + before.group(1) in vetoed) or (after and "R:" + after.group(1) in vetoed):
+                    return source
+            applied.append((source, target))
+            return target
+
+        return matcher.pattern.sub(replace, text), applied
+
+    def previously_accepted(self, text: str) -> bool:
+        """True if this exact text was accepted before with no LLM change (safe to skip the LLM)."""
+        if not self.local_skip or not text or not text.strip():
+            return False
+        return text_digest(text) in self.accepted
+
+    # --- Learn ---
+    def observe(self, sent: str, final: str, status: str, applied: Optional[List[Tuple[str, str]]] = None):
+        """
+        Records a verifier decision on `sent` (the text the LLM saw, after local fixes) -> `final`.
+        ACCEPT teaches the LLM's own edits and counter-evidence (known sources left unchanged);
+        local fixes in `applied` are confirmed if they survive and rejected if the LLM reverted them,
+        never counted as new acceptances. REJECT counts against every local fix applied.
+        """
+        applied = applied or []
+        if status == "ACCEPT":
+            edits = extract_edits(sent, final)
+            # 로컬 교정 결과를 LLM이 원래대로 되돌린 경우는 새 규칙이 아니라 그 교정의 반대 증거
+            applied_targets = {target for _, target in applied}
+            edits = [edit for edit in edits if edit.source not in applied_targets]
+            with self._lock:
+                touched = {source for source, _ in applied}
+                for source, target in applied:
+                    entry = self.patterns.get(source)
+                    if entry is None:
+                        continue
+                    pattern = _word_pattern([target])
+                    survived = len(pattern.findall(final)) >= len(pattern.findall(sent))
+                    counter = entry.setdefault("confirmed", {}) if survived else entry["rejected"]
+                    counter[target] = counter.get(target, 0) + 1
+                for edit in edits:
+                    entry = self.patterns.setdefault(edit.source, {
+                        "targets": {}, "rejected": {}, "kept": 0, "contexts": {}, "kept_contexts": {},
+                    })
+                    entry["targets"][edit.target] = entry["targets"].get(edit.target, 0) + 1
+                    if edit.left:
+                        _bounded_increment(entry["contexts"], "L:" + edit.left)
+                    if edit.right:
+                        _bounded_increment(entry["contexts"], "R:" + edit.right)
+                    touched.add(edit.source)
+                # 이번 관측 전에 학습된 원문 구간 중 수정되지 않고 남은 것은 유지(반대 증거)로 기록
+                edited = [(edit.start, edit.end) for edit in edits]
+                new_sources = {edit.source for edit in edits if sum(self.patterns[edit.source]["targets"].values()) == 1}
+                for start, end, source in list(_word_spans(sent, self.patterns)):
+                    if source in new_sources or any(s < end and start < e for s, e in edited):
+                        continue
+                    entry = self.patterns[source]
+                    entry["kept"] += 1
+                    before = _WORD_BEFORE.search(sent, max(0, start - MAX_EDIT_CHARS), start)
+                    after = _WORD_AFTER.match(sent, end, end + MAX_EDIT_CHARS)
+                    if before:
+                        _bounded_increment(entry["kept_contexts"], "L:" + before.group(1))
+                    if after:
+                        _bounded_increment(entry["kept_contexts"], "R:" + after.group(1))
+                    touched.add(source)
+                if final == sent and sent.strip():
+                    self.accepted[text_digest(sent)] = 1
+                touched |= self._prune()
+                self._refresh(touched)
+                self._dirty = True
+        elif status == "REJECT" and applied:
+            with self._lock:
+                for source, target in applied:
+                    entry = self.patterns.get(source)
+                    if entry is not None:
+                        entry["rejected"][target] = entry["rejected"].get(target, 0) + 1
+                self._refresh({source for source, _ in applied})
+                self._dirty = True
+        else:
+            return
+        if time.monotonic() - self._saved_at >= SAVE_INTERVAL:
+            self.save()
+
+    def _prune(self) -> set:
+        """Drops rarely seen sources / old accepted hashes past the limits; returns the dropped sources."""
+        dropped = set()
+        if len(self.patterns) > MAX_PATTERNS:
+            dropped = {s for s, e in self.patterns.items() if sum(e["targets"].values()) <= 1}
+            for source in dropped:
+                del self.patterns[source]
+        if len(self.accepted) > MAX_ACCEPTED:
+            self.accepted = dict.fromkeys(list(self.accepted)[-MAX_ACCEPTED // 2:], 1)
+        return dropped
+
+    # --- Persistence ---
+    def save(self):
+        if not self.path or not self._dirty:
+            return
+        with self._lock:
+            payload = json.dumps({"patterns": self.patterns, "accepted": list(self.accepted)}, ensure_ascii=False)
+            self._dirty = False
+            self._saved_at = time.monotonic()
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(payload)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"[Corrections] Save Error: {e}")
+            self._dirty = True
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"[Corrections] Load Error: {e}")
+            return
+        with self._lock:
+            self.patterns = data.get("patterns", {})
+            self.accepted = dict.fromkeys(data.get("accepted", []), 1)
+            self._promoted = {}
+            self._refresh(list(self.patterns))
+            self._recompile()
+        print(f"[Corrections] Loaded {len(self.patterns)} patterns ({len(self._matcher.rules)} confident), "
+              f"{len(self.accepted)} accepted texts")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "patterns": len(self.patterns),
+            "confident": len(self._promoted),
+            "accepted_texts": len(self.accepted),
+            "recompiles": self.recompiles,
+        }
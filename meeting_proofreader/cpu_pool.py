@@ -0,0 +1,150 @@
+"""
+CPU 작업 프로세스 풀 모듈
+GIL에 묶이는 CPU 연산(CER 검증, Diff 생성, 파일 파싱)을 별도 프로세스로 분산 (선택 사항)
+
+환경변수:
+- PROOFREADER_CPU_WORKERS: 워커 프로세스 수 (0 또는 미설정 시 비활성화 → 호출 스레드에서 직접 실행)
+- PROOFREADER_SHM_THRESHOLD: 이 크기(bytes) 이상의 입력/출력은 공유 메모리로 전달 (기본 256KB)
+"""
+import concurrent.futures
+import multiprocessing
+import os
+import threading
+from multiprocessing import shared_memory
+from typing import Any, Callable, Optional
+
+DEFAULT_SHM_THRESHOLD = 256 * 1024
+
+
+class _SharedRef:
+    """Handle to a str/bytes value placed in a shared memory segment."""
+    __slots__ = ("name", "size", "kind")
+
+    def __init__(self, name: str, size: int, kind: str):
+        self.name = name
+        self.size = size
+        self.kind = kind
+
+
+def _share(value: Any, threshold: int):
+    """Moves large str/bytes values into shared memory. Returns (value_or_ref, segment_or_None)."""
+    if isinstance(value, str):
+        if len(value) * 3 < threshold:  # UTF-8 최대 길이 기준으로 빠르게 거름
+            return value, None
+        raw, kind = value.encode("utf-8"), "str"
+    elif isinstance(value, (bytes, bytearray)):
+        if len(value) < threshold:
+            return value, None
+        raw, kind = value, "bytes"
+    else:
+        return value, None
+
+    shm = shared_memory.SharedMemory(create=True, size=max(len(raw), 1))
+    shm.buf[:len(raw)] = raw
+    return _SharedRef(shm.name, len(raw), kind), shm
+
+
+def _read_shared(ref: _SharedRef, unlink: bool = False):
+    shm = shared_memory.SharedMemory(name=ref.name)
+    try:
+        raw = bytes(shm.buf[:ref.size])
+    finally:
+        shm.close()
+        if unlink:
+            shm.unlink()
+    return raw.decode("utf-8") if ref.kind == "str" else raw
+
+
+def _worker_call(fn: Callable, args: tuple, threshold: int):
+    """Runs inside a pool process: resolves shared inputs, shares a large result back."""
+    args = tuple(_read_shared(a) if isinstance(a, _SharedRef) else a for a in args)
+    result = fn(*args)
+
+    if isinstance(result, tuple):
+        shared = []
+        for item in result:
+            ref, shm = _share(item, threshold)
+            if shm is not None:
+                shm.close()  # 부모 프로세스가 읽은 뒤 unlink
+            shared.append(ref)
+        return tuple(shared)
+
+    ref, shm = _share(result, threshold)
+    if shm is not None:
+        shm.close()
+    return ref
+
+
+class CPUPool:
+    """
+    Process pool for CPU-bound post-processing.
+    Uses the 'spawn' start method: forking a multi-threaded Streamlit process is unsafe.
+    """
+    def __init__(self, max_workers: int, shm_threshold: int = DEFAULT_SHM_THRESHOLD):
+        self.max_workers = max_workers
+        self.shm_threshold = shm_threshold
+        self._executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def run(self, fn: Callable, *args):
+        """Runs fn(*args) in a worker process and blocks until the result is ready."""
+        shared_args = []
+        segments = []
+        for arg in args:
+            ref, shm = _share(arg, self.shm_threshold)
+            shared_args.append(ref)
+            if shm is not None:
+                segments.append(shm)
+        try:
+            result = self._executor.submit(_worker_call, fn, tuple(shared_args), self.shm_threshold).result()
+        finally:
+            for shm in segments:
+                shm.close()
+                shm.unlink()
+
+        if isinstance(result, tuple):
+            return tuple(_read_shared(r, unlink=True) if isinstance(r, _SharedRef) else r for r in result)
+        if isinstance(result, _SharedRef):
+            return _read_shared(result, unlink=True)
+        return result
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool: Optional[CPUPool] = None
+_pool_lock = threading.Lock()
+_pool_disabled = False
+
+
+def get_cpu_pool() -> Optional[CPUPool]:
+    """Returns the process-wide CPU pool, or None when PROOFREADER_CPU_WORKERS is 0/unset."""
+    global _pool, _pool_disabled
+    if _pool is not None or _pool_disabled:
+        return _pool
+    with _pool_lock:
+        if _pool is None and not _pool_disabled:
+            workers = int(os.environ.get("PROOFREADER_CPU_WORKERS", "0") or 0)
+            if workers <= 0:
+                _pool_disabled = True
+                return None
+            threshold = int(os.environ.get("PROOFREADER_SHM_THRESHOLD", str(DEFAULT_SHM_THRESHOLD)))
+            _pool = CPUPool(workers, shm_threshold=threshold)
+            print(f"[CPUPool] Started {workers} worker processes.")
+    return _pool
+
+
+def run_cpu_bound(fn: Callable, *args):
+    """
+    Runs a CPU-bound function in the process pool if enabled, otherwise inline.
+    `fn` must be a module-level function importable by worker processes.
+    """
+    pool = get_cpu_pool()
+    if pool is None:
+        return fn(*args)
+    try:
+        return pool.run(fn, *args)
+    except concurrent.futures.process.BrokenProcessPool as e:
+        print(f"[CPUPool] Pool broken, running inline: {e}")
+        return fn(*args)
@@ -0,0 +1,127 @@
+"""
+임베딩 제공자(Embedding Provider) 모듈
+SemanticLayer가 사용하는 임베딩 백엔드를 교체 가능하게 분리
+
+- OpenAIEmbeddingProvider: text-embedding-3-small (네트워크 호출)
+- HashingEmbeddingProvider: 글자 n-gram 해싱 벡터 (로컬 CPU, 오프라인, 쿼리당 1ms 미만)
+
+환경변수:
+- PROOFREADER_EMBEDDINGS: "openai" | "hashing" | "auto" (기본값: API 키가 있으면 openai, 없으면 hashing)
+"""
+import os
+import zlib
+from collections import Counter
+from typing import Callable, List, Optional
+
+import numpy as np
+
+
+class EmbeddingProvider:
+    """
+    Base interface. `name` identifies the vector space: vectors from providers
+    with different names must never be compared.
+    """
+    name: str = "base"
+    dim: int = 0
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Returns one L2-normalised vector per text. Raises on failure (never returns zero vectors)."""
+        raise NotImplementedError
+
+    def embed_one(self, text: str) -> List[float]:
+        return self.embed([text])[0]
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """OpenAI embeddings API. `client` may be any object exposing `embeddings.create()`."""
+    DIMENSIONS = {"text-embedding-3-small": 1536, "text-embedding-3-large": 3072, "text-embedding-ada-002": 1536}
+    BATCH_SIZE = 256
+
+    def __init__(self, model: str = "text-embedding-3-small", client=None):
+        if client is None:
+            try:
+                from .registry import get_openai_client
+            except ImportError:
+                from registry import get_openai_client
+            client = get_openai_client()
+        self.client = client
+        self.model = model
+        self.dim = self.DIMENSIONS.get(model, 0)
+        self.name = f"openai:{model}"
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        vectors = []
+        for i in range(0, len(texts), self.BATCH_SIZE):
+            batch = [t.replace("\n", " ") for t in texts[i:i + self.BATCH_SIZE]]
+            res = self.client.embeddings.create(input=batch, model=self.model)
+            vectors.extend(item.embedding for item in res.data)
+        if vectors and not self.dim:
+            self.dim = len(vectors[0])
+        return vectors
+
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    """
+    Hashed character n-gram vectorizer (feature hashing with signed buckets, sublinear tf).
+    Good at lexical matches such as glossary terms appearing in a chunk, needs no model download.
+    CRC32 is used instead of hash() so vectors are stable across processes and restarts.
+    """
+    def __init__(self, dim: int = 512, ngram_range=(1, 3)):
+        self.dim = dim
+        self.ngram_range = ngram_range
+        self.name = f"hashing:char{ngram_range[0]}-{ngram_range[1]}:{dim}"
+
+    def _vector(self, text: str) -> np.ndarray:
+        text = " ".join(text.split())
+        low, high = self.ngram_range
+        counts = Counter()
+        for n in range(low, high + 1):
+            counts.update(text[i:i + n] for i in range(len(text) - n + 1))
+        counts.pop(" ", None)
+
+        hashes = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in counts), dtype=np.uint32, count=len(counts))
+        weights = 1.0 + np.log(np.fromiter(counts.values(), dtype=np.float64, count=len(counts)))
+        weights = np.where(hashes & 0x80000000, weights, -weights)
+        v = np.bincount(hashes % self.dim, weights=weights, minlength=self.dim).astype(np.float32)
+        norm = np.linalg.norm(v)
+        if norm == 0:
+            # 빈 텍스트: 영벡터 대신 고정된 단위 벡터 (어떤 문서와도 유사도가 거의 0)
+            v[0] = 1.0
+            return v
+        return v / norm
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        return [self._vector(t).tolist() for t in texts]
+
+
+class CallableEmbeddingProvider(EmbeddingProvider):
+    """Adapts a plain `texts -> vectors` callable (e.g. a Chroma-style embedding_function)."""
+    def __init__(self, fn: Callable[[List[str]], List[List[float]]], name: Optional[str] = None):
+        self.fn = fn
+        if name is None:
+            # Chroma 스타일 embedding_function은 name() 메서드를 제공
+            name = fn.name() if callable(getattr(fn, "name", None)) else getattr(fn, "__name__", type(fn).__name__)
+        self.name = f"callable:{name}"
+        self.dim = 0
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        vectors = np.asarray(self.fn(texts), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        if not norms.all():
+            raise ValueError(f"{self.name} returned a zero vector")
+        if not self.dim:
+            self.dim = vectors.shape[1]
+        return (vectors / norms).tolist()
+
+
+def get_embedding_provider(kind: Optional[str] = None, client=None) -> EmbeddingProvider:
+    """Builds the configured provider (argument > PROOFREADER_EMBEDDINGS > auto)."""
+    kind = (kind or os.environ.get("PROOFREADER_EMBEDDINGS") or "auto").lower()
+    if kind == "auto":
+        kind = "openai" if client is not None or os.environ.get("OPENAI_API_KEY") else "hashing"
+    if kind == "openai":
+        try:
+            return OpenAIEmbeddingProvider(client=client)
+        except Exception as e:
+            print(f"[Embeddings] OpenAI provider unavailable ({e}), falling back to local hashing.")
+    return HashingEmbeddingProvider()
@@ -0,0 +1,337 @@
+"""
+오프라인 대체(Fake) 백엔드 모듈
+네트워크/비용 없이 파이프라인을 돌리기 위한 ChatOpenAI · OpenAI 임베딩 대체품과 합성 속기록 생성기
+
+- FakeChatModel: 교정/검증/줄바꿈 복구 프롬프트에 결정적인 JSON 응답 (지연 분포, 429/5xx, 프롬프트 캐시 시뮬레이션)
+- FakeEmbeddingsClient: client.embeddings.create() 호환 (텍스트별 결정적 단위 벡터)
+- TypoInjector / generate_transcript: 정답을 아는 합성 속기록
+"""
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import PrivateAttr
+
+# 속기 현장에서 자주 나오는 오타 (정답, 오타)
+TYPO_PAIRS = [
+    ("결재", "결제"),
+    ("미지급금", "미지금 급"),
+    ("조례안", "조례앙"),
+    ("의결", "의걸"),
+    ("심사", "심샤"),
+    ("추경예산", "추경에산"),
+    ("위원장", "위언장"),
+    ("답변드리겠습니다", "답변드리겠슴니다"),
+]
+
+
+class LatencyModel:
+    """
+    Latency distribution for fake backends.
+    kind: "constant" | "uniform" (median ± spread) | "lognormal" (median, sigma)
+    time_scale multiplies every sample (e.g. 0.01 to run a benchmark 100x faster).
+    """
+    def __init__(self, kind: str = "lognormal", median_ms: float = 800.0, sigma: float = 0.5,
+                 time_scale: float = 1.0, seed: int = 0):
+        self.kind = kind
+        self.median_ms = median_ms
+        self.sigma = sigma
+        self.time_scale = time_scale
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample_seconds(self) -> float:
+        with self._lock:
+            if self.kind == "constant":
+                ms = self.median_ms
+            elif self.kind == "uniform":
+                ms = self._rng.uniform(self.median_ms * (1 - self.sigma), self.median_ms * (1 + self.sigma))
+            else:
+                ms = self.median_ms * math.exp(self._rng.gauss(0.0, self.sigma))
+        return max(ms, 0.0) / 1000.0 * self.time_scale
+
+    def sleep(self):
+        seconds = self.sample_seconds()
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+def rate_limit_error(message: str = "Rate limit reached (simulated)") -> Exception:
+    """Builds an openai.RateLimitError (HTTP 429) without touching the network."""
+    return _status_error(429, message)
+
+
+def server_error(message: str = "Internal server error (simulated)") -> Exception:
+    """Builds an openai.InternalServerError (HTTP 500) without touching the network."""
+    return _status_error(500, message)
+
+
+def _status_error(status: int, message: str) -> Exception:
+    try:
+        import httpx
+        import openai
+        request = httpx.Request("POST", "https://fake.local/v1/chat/completions")
+        response = httpx.Response(status, request=request)
+        error_class = openai.RateLimitError if status == 429 else openai.InternalServerError
+        return error_class(message, response=response, body=None)
+    except Exception:
+        error = RuntimeError(message)
+        error.status_code = status
+        return error
+
+
+def _section(content: str, header: str, until: Optional[str] = None) -> Optional[str]:
+    start = content.find(header)
+    if start == -1:
+        return None
+    start += len(header)
+    end = content.find(until, start) if until else -1
+    return content[start:end if end != -1 else len(content)]
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic stand-in for ChatOpenAI.
+    Recognises the corrector / verifier / line-break repair prompts from prompts.py and
+    answers with valid JSON: the corrector fixes every typo listed in `fixes`.
+    """
+    fixes: Dict[str, str] = {typo: correct for correct, typo in TYPO_PAIRS}
+    latency_kind: str = "lognormal"
+    latency_ms: float = 800.0
+    latency_sigma: float = 0.5
+    time_scale: float = 1.0
+    rate_limit_prob: float = 0.0
+    server_error_prob: float = 0.0
+    linebreak_error_prob: float = 0.0
+    modify_prob: float = 0.0
+    prompt_cache: bool = True
+    seed: int = 0
+
+    _latency: Any = PrivateAttr(default=None)
+    _rng: Any = PrivateAttr(default=None)
+    _lock: Any = PrivateAttr(default=None)
+    _calls: int = PrivateAttr(default=0)
+    _rate_limited: int = PrivateAttr(default=0)
+    _server_errors: int = PrivateAttr(default=0)
+    _prefixes: Any = PrivateAttr(default=None)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._latency = LatencyModel(self.latency_kind, self.latency_ms, self.latency_sigma,
+                                     self.time_scale, self.seed)
+        self._rng = random.Random(self.seed + 1)
+        self._lock = threading.Lock()
+        self._prefixes = set()
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-proofreader"
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {"calls": self._calls, "rate_limited": self._rate_limited, "server_errors": self._server_errors}
+
+    def _cached_chars(self, prompt: str) -> int:
+        """
+        Provider prompt cache stand-in (OpenAI-style): prefixes of >= 1024 tokens are cached
+        in 128-token steps (2048 / 256 chars here); returns the longest previously seen prefix.
+        """
+        if not self.prompt_cache:
+            return 0
+        boundaries = range(2048, len(prompt) + 1, 256)
+        digest = hashlib.sha1()
+        digests, pos = [], 0
+        for end in boundaries:
+            digest.update(prompt[pos:end].encode("utf-8"))
+            digests.append(digest.copy().hexdigest())
+            pos = end
+        with self._lock:
+            hit = 0
+            for end, key in zip(boundaries, digests):
+                if key not in self._prefixes:
+                    break
+                hit = end
+            self._prefixes.update(digests)
+        return hit
+
+    def _fix(self, text: str) -> str:
+        for typo, correct in self.fixes.items():
+            text = text.replace(typo, correct)
+        return text
+
+    def _respond(self, content: str) -> Dict[str, Any]:
+        # 1. Line-break repair
+        corrected = _section(content, "Corrected Text (Wrong Line Breaks):\n", "\n\n**Instruction**")
+        if corrected is not None:
+            original = _section(content, "(Correct Line Breaks):\n", "\n\nCorrected Text")
+            return {"corrected_text": self._fix(original) if original is not None else corrected}
+
+        # 2. Verifier
+        proposal = _section(content, "## 수정안\n")
+        if proposal is not None:
+            with self._lock:
+                unsure = self.modify_prob and self._rng.random() < self.modify_prob
+            if unsure:
+                return {"status": "MODIFY", "reason": "Partially rewritten (fake).", "final_text": proposal}
+            return {"status": "ACCEPT", "reason": "Typo fixes only (fake).", "final_text": proposal}
+
+        # 3. Batch corrector (JSON 항목 목록)
+        items = _section(content, "## 원본 텍스트 목록 (JSON, 항목별로 형식 그대로 유지, 오타만 수정)\n")
+        if items is not None:
+            return {"results": [
+                {"id": item["id"], "corrected_text": self._fix(item["text"]), "changes_made": []}
+                for item in json.loads(items)
+            ]}
+
+        # 4. Corrector (본문은 항상 프롬프트의 마지막 섹션)
+        text = _section(content, "## 원본 텍스트 (형식 그대로 유지, 오타만 수정)\n")
+        if text is None:
+            text = content
+        corrected = self._fix(text)
+        changes = [f"{typo} -> {correct}" for typo, correct in self.fixes.items() if typo in text]
+        with self._lock:
+            break_line = self.linebreak_error_prob and self._rng.random() < self.linebreak_error_prob
+        if break_line and "\n" in corrected.strip():
+            corrected = corrected.replace("\n", " ", 1)
+        return {"corrected_text": corrected, "changes_made": changes}
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self._latency.sleep()
+        with self._lock:
+            self._calls += 1
+            limited = self.rate_limit_prob and self._rng.random() < self.rate_limit_prob
+            failed = not limited and self.server_error_prob and self._rng.random() < self.server_error_prob
+            if limited:
+                self._rate_limited += 1
+            if failed:
+                self._server_errors += 1
+        if limited:
+            raise rate_limit_error()
+        if failed:
+            raise server_error()
+
+        prompt = "\n".join(str(m.content) for m in messages)
+        payload = json.dumps(self._respond(str(messages[-1].content)), ensure_ascii=False)
+        # 토큰 수는 한국어 기준 대략 글자 수 / 2로 근사
+        usage = {
+            "input_tokens": len(prompt) // 2,
+            "output_tokens": len(payload) // 2,
+            "total_tokens": len(prompt) // 2 + len(payload) // 2,
+            "input_token_details": {"cache_read": self._cached_chars(prompt) // 2},
+        }
+        message = AIMessage(content=payload, usage_metadata=usage)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+# --- Embeddings ---
+class _EmbeddingItem:
+    __slots__ = ("embedding", "index")
+
+    def __init__(self, embedding: List[float], index: int):
+        self.embedding = embedding
+        self.index = index
+
+
+class _EmbeddingResponse:
+    def __init__(self, data: List[_EmbeddingItem]):
+        self.data = data
+
+
+class _FakeEmbeddingsAPI:
+    def __init__(self, owner: "FakeEmbeddingsClient"):
+        self._owner = owner
+
+    def create(self, input, model: str = "text-embedding-3-small", **kwargs) -> _EmbeddingResponse:
+        return self._owner._create(input)
+
+
+class FakeEmbeddingsClient:
+    """
+    Stand-in for the OpenAI client's `embeddings.create()`.
+    Returns deterministic, L2-normalised vectors seeded by the text hash.
+    """
+    def __init__(self, dim: int = 1536, latency: Optional[LatencyModel] = None, rate_limit_prob: float = 0.0,
+                 seed: int = 0):
+        self.dim = dim
+        self.latency = latency or LatencyModel("constant", 0.0)
+        self.rate_limit_prob = rate_limit_prob
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.embeddings = _FakeEmbeddingsAPI(self)
+        self.calls = 0
+
+    def _vector(self, text: str) -> List[float]:
+        import numpy as np
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        v = np.random.default_rng(seed).standard_normal(self.dim)
+        return (v / np.linalg.norm(v)).tolist()
+
+    def _create(self, inputs) -> _EmbeddingResponse:
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        self.latency.sleep()
+        with self._lock:
+            self.calls += 1
+            limited = self.rate_limit_prob and self._rng.random() < self.rate_limit_prob
+        if limited:
+            raise rate_limit_error()
+        return _EmbeddingResponse([_EmbeddingItem(self._vector(t), i) for i, t in enumerate(inputs)])
+
+
+# --- Synthetic Transcripts ---
+_SPEAKERS = ["○위원장 김철수", "○위원 이민수", "○위원 박지영", "○기획예산담당관 최영희", "○복지국장 정한결"]
+_SENTENCES = [
+    "의사일정 제{n}항 아산시 돌봄노동자 처우 개선에 관한 조례안을 상정합니다.",
+    "이 안건은 지난 회의에서 심사를 보류한 건입니다.",
+    "추경예산 중 미지급금 규모가 {n}억 원인데 설명해 주시기 바랍니다.",
+    "네, 답변드리겠습니다. 결재 절차는 다음 주에 마무리됩니다.",
+    "그러면 원안대로 의결하고자 하는데 이의 없으십니까?",
+    "(「없습니다」 하는 위원 있음)",
+    "가결되었음을 선포합니다.",
+    "음, 그 부분은 저, 저희가 다시 한번 확인해 보겠습니다.",
+]
+
+
+def generate_transcript(target_bytes: int, seed: int = 0) -> str:
+    """Generates a clean synthetic meeting transcript of roughly `target_bytes` UTF-8 bytes."""
+    rng = random.Random(seed)
+    lines = []
+    size = 0
+    while size < target_bytes:
+        speaker = rng.choice(_SPEAKERS)
+        body = " ".join(rng.choice(_SENTENCES).format(n=rng.randint(1, 99)) for _ in range(rng.randint(1, 4)))
+        line = f"{speaker}  {body}"
+        lines.append(line)
+        size += len(line.encode("utf-8")) + 1
+    return "\n".join(lines) + "\n"
+
+
+class TypoInjector:
+    """Injects known stenographic typos so the expected correction is known exactly."""
+    def __init__(self, rate: float = 0.3, pairs: List[Tuple[str, str]] = None, seed: int = 0):
+        self.rate = rate
+        self.pairs = pairs or TYPO_PAIRS
+        self._rng = random.Random(seed)
+        self._pattern = re.compile("|".join(re.escape(correct) for correct, _ in self.pairs))
+        self._typo_of = dict(self.pairs)
+
+    def inject(self, text: str) -> Tuple[str, int]:
+        """Returns (text_with_typos, typo_count)."""
+        count = 0
+
+        def replace(match):
+            nonlocal count
+            if self._rng.random() < self.rate:
+                count += 1
+                return self._typo_of[match.group(0)]
+            return match.group(0)
+
+        return self._pattern.sub(replace, text), count
@@ -1,27 +1,107 @@
 """
 파일 파서 모듈
-TXT, HWP 파일에서 텍스트 추출
+TXT, HWP, HWPX, DOCX, PDF 파일에서 텍스트 추출
 """
+import codecs
 import io
+import re
+import struct
+import zipfile
+import zlib
 from pathlib import Path
+from typing import Iterable, Iterator, List, Tuple
+from xml.etree import ElementTree
+
+SUPPORTED_EXTENSIONS = (".txt", ".hwp", ".hwpx", ".docx", ".pdf")
 
 
 def extract_text_from_file(file_data: bytes, filename: str) -> str:
-    """파일에서 텍스트 추출. 지원 형식: TXT, HWP"""
+    """파일에서 텍스트 추출. 지원 형식: TXT, HWP, HWPX, DOCX, PDF"""
     ext = Path(filename).suffix.lower()
     
     if ext == '.txt':
         return _extract_txt(file_data)
     elif ext == '.hwp':
         return _extract_hwp(file_data)
+    elif ext in SUPPORTED_EXTENSIONS:
+        return "\n".join(iter_paragraphs_from_file(file_data, filename)).strip()
     else:
         raise ValueError(f"지원하지 않는 파일 형식: {ext}")
 
 
+def iter_paragraphs_from_file(file_data: bytes, filename: str) -> Iterator[str]:
+    """
+    파일의 문단을 순서대로 생성 (스트리밍 인터페이스).
+    문서 전체의 XML 트리를 만들지 않으므로 큰 파일도 메모리를 일정하게 사용.
+    청킹에는 정규화된 iter_normalized_paragraphs()를 SlidingWindowChunker.chunk_stream()에 넘김.
+    """
+    ext = Path(filename).suffix.lower()
+
+    if ext == '.txt':
+        return iter(_extract_txt(file_data).splitlines())
+    elif ext == '.hwp':
+        return iter_hwp_paragraphs(file_data)
+    elif ext == '.hwpx':
+        return iter_hwpx_paragraphs(file_data)
+    elif ext == '.docx':
+        return iter_docx_paragraphs(file_data)
+    elif ext == '.pdf':
+        return iter_pdf_paragraphs(file_data)
+    else:
+        raise ValueError(f"지원하지 않는 파일 형식: {ext}")
+
+
+def iter_normalized_paragraphs(file_data: bytes, filename: str) -> Iterator[str]:
+    """
+    iter_paragraphs_from_file에 extract_text_from_file과 같은 정규화(앞뒤 공백 제거, \\r\\n → \\n)를
+    스트리밍으로 적용. "\\n".join(결과) == extract_text_from_file(...).replace("\\r\\n", "\\n")이므로
+    SlidingWindowChunker.chunk_stream()에 넘기면 저장된 텍스트와 같은 청크 경계가 나옴.
+    """
+    ext = Path(filename).suffix.lower()
+    if ext == '.txt':
+        # TXT는 strip하지 않음 (splitlines는 \x0b, \u2028 등에서도 나누므로 "\n"으로만 분리)
+        return iter(_extract_txt(file_data).replace("\r\n", "\n").split("\n"))
+    if ext not in SUPPORTED_EXTENSIONS:
+        raise ValueError(f"지원하지 않는 파일 형식: {ext}")
+    return _strip_paragraphs(iter_paragraphs_from_file(file_data, filename))
+
+
+def _strip_paragraphs(paragraphs: Iterable[str]) -> Iterator[str]:
+    """Streaming form of '"\\n".join(paragraphs).strip()' with \\r\\n -> \\n; trailing blank paragraphs are held back."""
+    held = None     # 마지막으로 받은 내용 있는 문단 (끝이면 rstrip)
+    blanks = []     # 그 뒤의 빈 문단들 (문서 끝이면 버림)
+    for paragraph in paragraphs:
+        paragraph = paragraph.replace("\r\n", "\n")
+        if paragraph.endswith("\r"):
+            # 뒤에 붙는 구분자 "\n"과 합쳐져 "\r\n"이 되므로 "\n"만 남김 (마지막 문단이면 어차피 strip됨)
+            paragraph = paragraph[:-1]
+        if not paragraph.strip():
+            if held is not None:
+                blanks.append(paragraph)
+            continue
+        if held is None:
+            held = paragraph.lstrip()
+            continue
+        yield held
+        yield from blanks
+        held, blanks = paragraph, []
+    if held is not None:
+        yield held.rstrip()
+
+
 def _extract_txt(data: bytes) -> str:
     """TXT 파일 텍스트 추출 (인코딩 자동 감지)"""
-    encodings = ["utf-8", "euc-kr", "cp949", "utf-16"]
-    for enc in encodings:
+    # 감지된 코덱으로 한 번만 디코딩
+    encoding = detect_encoding(data)
+    try:
+        return data.decode(encoding)
+    except UnicodeDecodeError:
+        pass
+
+    # 감지 실패 시 기존 방식(순차 시도)으로 폴백
+    for enc in ["utf-8", "cp949", "utf-16"]:
+        if enc == encoding:
+            continue
         try:
             return data.decode(enc)
         except UnicodeDecodeError:
@@ -29,10 +109,151 @@ def _extract_txt(data: bytes) -> str:
     raise ValueError("파일 인코딩을 인식할 수 없습니다.")
 
 
+# --- Encoding Detection ---
+_DETECT_SAMPLE_SIZE = 64 * 1024
+
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+_KOREAN_SAMPLE_SIZE = 16 * 1024
+# 한글 음절(가-힣) 삭제용 translate 테이블
+_HANGUL_SYLLABLES = dict.fromkeys(range(0xAC00, 0xD7A4))
+# KS X 1001 조합용 채움 문자
+_EUC_KR_FILLER = b"\xa4\xd4"
+
+
+def detect_encoding(data: bytes, sample_size: int = _DETECT_SAMPLE_SIZE) -> str:
+    """
+    앞부분 샘플만 보고 인코딩을 한 번에 결정.
+    1. BOM 확인
+    2. NUL 바이트 분포로 BOM 없는 UTF-16 판별
+    3. 샘플이 유효한 UTF-8이면 UTF-8
+    4. 2바이트 쌍 구조가 CP949와 맞고 대부분이 한글 음절이면 CP949 (EUC-KR의 상위 호환)
+    """
+    for bom, encoding in _BOMS:
+        if data.startswith(bom):
+            return encoding
+
+    sample = data[:sample_size]
+    if not sample:
+        return "utf-8"
+
+    # UTF-16(BOM 없음): 한쪽 바이트 위치에 NUL이 몰려 있음
+    even_nuls = sample[0::2].count(0)
+    odd_nuls = sample[1::2].count(0)
+    half = max(len(sample) // 2, 1)
+    if odd_nuls > half * 0.3 and even_nuls < half * 0.05:
+        return "utf-16-le"
+    if even_nuls > half * 0.3 and odd_nuls < half * 0.05:
+        return "utf-16-be"
+
+    # 샘플 끝에서 잘린 멀티바이트 문자는 허용 (final=False)
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+
+    # 한글 코드 페이지 검사: 샘플 앞부분이 CP949 바이트 쌍 구조에 맞는지(C 디코더로 검사),
+    # 그리고 2바이트 문자 대부분이 완성형 한글 음절인지 확인
+    head = sample[:_KOREAN_SAMPLE_SIZE]
+    try:
+        decoded = codecs.getincrementaldecoder("cp949")().decode(head, final=False)
+    except UnicodeDecodeError:
+        decoded = None
+    if decoded is not None:
+        wide_chars = len(decoded) - len(decoded.encode("ascii", "ignore"))
+        hangul_chars = len(decoded) - len(decoded.translate(_HANGUL_SYLLABLES))
+        if wide_chars and hangul_chars >= wide_chars * 0.5:
+            # 완성형에 없는 글자를 채움 문자(0xA4D4)로 조합한 EUC-KR은 euc-kr 코덱만 올바르게 해석
+            return "euc-kr" if _EUC_KR_FILLER in sample else "cp949"
+
+    # 통계적으로 확신할 수 없는 경우에도 기존 우선순위에서 가장 가능성 높은 후보
+    return "cp949"
+
+
 def _extract_hwp(data: bytes) -> str:
     """HWP 파일 텍스트 추출 (레코드 구조 파싱)"""
-    import struct
-    
+    return "\n".join(iter_hwp_paragraphs(data)).strip()
+
+
+# --- HWP Streaming Parser ---
+HWPTAG_PARA_TEXT = 67  # 문단 텍스트 레코드
+_HWP_READ_SIZE = 64 * 1024
+_RECORD_HEADER = struct.Struct("<I")
+
+# 인라인/확장 컨트롤: 컨트롤 문자 + 7 wchar 파라미터 (총 8 wchar)
+_HWP_WIDE_CONTROL = re.compile("[\x01-\x09\x0b\x0c\x0e-\x17][\x00-\uffff]{7}")
+# 나머지 문자 컨트롤 (1 wchar): 문단 끝(13), 예약(0) 등
+_HWP_CHAR_CONTROL = re.compile("[\x00\x0d\x19-\x1d]")
+_SURROGATE = re.compile("[\ud800-\udfff]")
+
+
+def _decode_para_text(raw: bytes) -> str:
+    """PARA_TEXT 레코드를 문자열로 변환 (컨트롤 문자 제거)"""
+    # surrogatepass: 컨트롤 파라미터의 임의 16비트 값도 1 wchar = 1 문자로 유지
+    text = raw.decode("utf-16-le", errors="surrogatepass")
+    if text.isprintable():
+        return text
+    text = _HWP_WIDE_CONTROL.sub(lambda m: "\t" if m.group(0)[0] == "\t" else "", text)
+    text = _HWP_CHAR_CONTROL.sub("", text)
+    text = text.replace("\x18", "-").replace("\x1e", " ").replace("\x1f", " ")
+    if _SURROGATE.search(text):
+        text = text.encode("utf-16-le", errors="surrogatepass").decode("utf-16-le", errors="replace")
+    return text
+
+
+def _iter_hwp_records(stream, is_compressed: bool) -> Iterator[Tuple[int, bytes]]:
+    """
+    Yields (tag_id, payload) records from a BodyText section stream.
+    Decompresses incrementally and walks the complete records of each buffered block
+    with one struct.unpack_from per record header (records are variable-length, so the
+    offsets cannot be computed up front), carrying partial records over to the next block.
+    Record header: tag(10 bits) | level(10 bits) | size(12 bits); size 0xfff means
+    the real size follows as an extra DWORD.
+    """
+    decompressor = zlib.decompressobj(-15) if is_compressed else None
+    buf = bytearray()
+    eof = False
+    while not eof:
+        raw = stream.read(_HWP_READ_SIZE)
+        if raw:
+            buf += decompressor.decompress(raw) if decompressor else raw
+        else:
+            if decompressor:
+                buf += decompressor.flush()
+            eof = True
+
+        view = memoryview(buf)
+        pos = 0
+        end = len(buf)
+        while end - pos >= 4:
+            header = _RECORD_HEADER.unpack_from(view, pos)[0]
+            tag_id = header & 0x3ff
+            rec_len = (header >> 20) & 0xfff
+            header_len = 4
+            if rec_len == 0xfff:
+                if end - pos < 8:
+                    break
+                rec_len = _RECORD_HEADER.unpack_from(view, pos + 4)[0]
+                header_len = 8
+            if end - pos < header_len + rec_len:
+                break  # 레코드가 다음 블록까지 이어짐
+            if tag_id == HWPTAG_PARA_TEXT:
+                yield tag_id, bytes(view[pos + header_len:pos + header_len + rec_len])
+            pos += header_len + rec_len
+        view.release()
+        del buf[:pos]
+
+
+def iter_hwp_paragraphs(data: bytes) -> Iterator[str]:
+    """
+    HWP 문단을 순서대로 생성 (스트리밍).
+    섹션 사이에는 빈 문단("")을 하나 넣어 기존 출력 형식(섹션 간 빈 줄)을 유지함.
+    """
     try:
         import olefile
     except ImportError:
@@ -40,6 +261,10 @@ def _extract_hwp(data: bytes) -> str:
     
     try:
         ole = olefile.OleFileIO(io.BytesIO(data))
+    except Exception as e:
+        raise ValueError(f"HWP 파일 처리 오류: {e}")
+
+    try:
         dirs = ole.listdir()
         
         # HWP 파일 검증
@@ -47,8 +272,7 @@ def _extract_hwp(data: bytes) -> str:
             raise ValueError("유효하지 않은 HWP 파일입니다.")
         
         # 문서 포맷 압축 여부 확인
-        header = ole.openstream("FileHeader")
-        header_data = header.read()
+        header_data = ole.openstream("FileHeader").read()
         is_compressed = (header_data[36] & 1) == 1
         
         # Body Sections 수집 (Section0, Section1, ...)
@@ -58,43 +282,148 @@ def _extract_hwp(data: bytes) -> str:
                 section_nums.append(int(d[1][len("Section"):]))
         sections = ["BodyText/Section" + str(x) for x in sorted(section_nums)]
         
-        # 전체 텍스트 추출
-        full_text = ""
         for section in sections:
-            bodytext = ole.openstream(section)
-            section_data = bodytext.read()
-            
-            if is_compressed:
-                import zlib
-                unpacked_data = zlib.decompress(section_data, -15)
-            else:
-                unpacked_data = section_data
-            
-            # 레코드 구조 파싱하여 텍스트 추출
-            section_text = ""
-            i = 0
-            size = len(unpacked_data)
-            while i < size:
-                header = struct.unpack_from("<I", unpacked_data, i)[0]
-                rec_type = header & 0x3ff
-                rec_len = (header >> 20) & 0xfff
-                
-                # rec_type 67 = 텍스트 레코드
-                if rec_type == 67:
-                    rec_data = unpacked_data[i + 4:i + 4 + rec_len]
-                    try:
-                        section_text += rec_data.decode('utf-16')
-                        section_text += "\n"
-                    except:
-                        pass
-                
-                i += 4 + rec_len
-            
-            full_text += section_text
-            full_text += "\n"
-        
-        ole.close()
-        return full_text.strip()
-        
+            stream = ole.openstream(section)
+            for _, payload in _iter_hwp_records(stream, is_compressed):
+                yield _decode_para_text(payload)
+            yield ""
+    except ValueError:
+        raise
     except Exception as e:
         raise ValueError(f"HWP 파일 처리 오류: {e}")
+    finally:
+        ole.close()
+
+
+# --- Zipped XML (HWPX / DOCX) ---
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+class _XmlTags:
+    """Local tag names of a zipped-XML format (namespaces are ignored)."""
+    def __init__(self, para: str, run, text, tab, line_break, properties=()):
+        self.para = para
+        self.run = set(run)
+        self.text = set(text)
+        self.tab = set(tab)
+        self.line_break = set(line_break)
+        # 글자가 없는 속성 하위 트리 (탭 위치 정의 등): 통째로 건너뜀
+        self.properties = set(properties)
+
+
+# DOCX: w:p / w:r / w:t (삭제된 변경 내용 w:delText는 text에 없으므로 제외)
+_DOCX_TAGS = _XmlTags("p", {"r"}, {"t"}, {"tab"}, {"br", "cr"}, {"pPr", "rPr"})
+# HWPX(OWPML): hp:p / hp:run / hp:t (탭과 줄바꿈은 hp:t 안의 hp:tab, hp:lineBreak)
+_HWPX_TAGS = _XmlTags("p", {"run"}, {"t"}, {"tab"}, {"lineBreak"})
+
+
+def _collect_run_text(elem, tags: _XmlTags, out: List[str], in_text: bool = False, in_run: bool = False):
+    """
+    문단 요소 안의 텍스트를 문서 순서대로 수집 (중첩 문단은 이미 따로 생성되었으므로 건너뜀).
+    탭/줄바꿈은 런(w:r, hp:run) 안에 있을 때만 출력: w:pPr/w:tabs/w:tab 같은 탭 위치 정의는 글자가 아님
+    """
+    for child in elem:
+        name = _local_name(child.tag)
+        if name in tags.text:
+            if child.text:
+                out.append(child.text)
+            _collect_run_text(child, tags, out, True, in_run)
+        elif name in tags.tab:
+            if in_run:
+                out.append("\t")
+        elif name in tags.line_break:
+            if in_run:
+                out.append("\n")
+        elif name in tags.properties:
+            pass
+        elif name != tags.para:
+            _collect_run_text(child, tags, out, in_text, in_run or name in tags.run)
+        if in_text and child.tail:
+            out.append(child.tail)
+
+
+def _iter_xml_paragraphs(stream, tags: _XmlTags) -> Iterator[str]:
+    """
+    iterparse로 문단 단위 생성. 처리가 끝난 요소는 즉시 비워서 메모리를 일정하게 유지.
+    표/글상자 안의 중첩 문단은 바깥 문단보다 먼저 생성됨.
+    """
+    stack = []  # 현재 열려 있는 요소들 (루트 → 현재 요소)
+    depth = 0
+    for event, elem in ElementTree.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            if _local_name(elem.tag) == tags.para:
+                depth += 1
+            continue
+        stack.pop()
+        if _local_name(elem.tag) != tags.para:
+            continue
+
+        depth -= 1
+        out: List[str] = []
+        _collect_run_text(elem, tags, out)
+        yield "".join(out)
+        elem.clear()
+        if depth == 0 and stack:
+            # 최상위 문단이 끝나면 실제 부모(w:body, hp:subList 등)에서 이미 처리한 자식들을 해제
+            del stack[-1][:]
+
+
+def _open_zip(data: bytes, kind: str) -> zipfile.ZipFile:
+    try:
+        return zipfile.ZipFile(io.BytesIO(data))
+    except zipfile.BadZipFile as e:
+        raise ValueError(f"{kind} 파일 처리 오류: {e}")
+
+
+def iter_hwpx_paragraphs(data: bytes) -> Iterator[str]:
+    """HWPX(OWPML) 문단 생성: Contents/section{N}.xml의 hp:p / hp:t"""
+    with _open_zip(data, "HWPX") as archive:
+        section_names = []
+        for name in archive.namelist():
+            match = re.fullmatch(r"Contents/section(\d+)\.xml", name)
+            if match:
+                section_names.append((int(match.group(1)), name))
+        if not section_names:
+            raise ValueError("유효하지 않은 HWPX 파일입니다.")
+
+        for _, name in sorted(section_names):
+            with archive.open(name) as stream:
+                try:
+                    yield from _iter_xml_paragraphs(stream, _HWPX_TAGS)
+                except ElementTree.ParseError as e:
+                    raise ValueError(f"HWPX 파일 처리 오류: {e}")
+            yield ""
+
+
+def iter_docx_paragraphs(data: bytes) -> Iterator[str]:
+    """DOCX 문단 생성: word/document.xml의 w:p / w:t (삭제된 변경 내용 w:delText는 제외)"""
+    with _open_zip(data, "DOCX") as archive:
+        if "word/document.xml" not in archive.namelist():
+            raise ValueError("유효하지 않은 DOCX 파일입니다.")
+        with archive.open("word/document.xml") as stream:
+            try:
+                yield from _iter_xml_paragraphs(stream, _DOCX_TAGS)
+            except ElementTree.ParseError as e:
+                raise ValueError(f"DOCX 파일 처리 오류: {e}")
+
+
+# --- PDF ---
+def iter_pdf_paragraphs(data: bytes) -> Iterator[str]:
+    """PDF 줄 단위 생성 (페이지별로 추출 후 캐시 해제)"""
+    try:
+        import pdfplumber
+    except ImportError:
+        raise ImportError("PDF 지원을 위해 pdfplumber를 설치하세요: pip install pdfplumber")
+
+    try:
+        pdf = pdfplumber.open(io.BytesIO(data))
+    except Exception as e:
+        raise ValueError(f"PDF 파일 처리 오류: {e}")
+
+    with pdf:
+        for page in pdf.pages:
+            text = page.extract_text() or ""
+            yield from text.split("\n")
+            page.flush_cache()
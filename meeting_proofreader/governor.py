@@ -0,0 +1,204 @@
+"""
+전역 동시성 조절 모듈
+모든 세션(작업)의 LLM 호출이 하나의 API 키를 함께 쓰므로, 프로세스 전체에서
+동시 호출 수와 분당 토큰 예산을 제한하고 여유 용량을 세션 간에 공평하게 나눔
+
+- 동시 호출 상한: 빈 자리가 나면 진행 중인 호출이 가장 적은 세션의 대기 요청부터 허가
+  (큰 파일 하나가 대기열을 채워도 짧은 작업이 밀리지 않음)
+- 토큰 예산: 분당 토큰(TPM) 토큰 버킷, 호출 전 추정치로 차감하고 응답 후 실제 사용량으로 정산
+- 지표: 대기열 길이(세션별), 대기 시간 p50/p95, 진행 중 호출 수, 남은 토큰
+
+환경변수:
+- PROOFREADER_MAX_CONCURRENCY: 프로세스 전체 동시 LLM 호출 상한 (기본 16)
+- PROOFREADER_TPM: 분당 토큰 예산 (기본 0 = 제한 없음)
+"""
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Optional
+
+try:
+    from .instrumentation import _percentile
+except ImportError:
+    from instrumentation import _percentile
+
+# 현재 컨텍스트의 호출이 어느 세션(작업) 몫인지 (JobManager 워커가 설정)
+_current_owner: contextvars.ContextVar[str] = contextvars.ContextVar("governor_owner", default="default")
+
+
+@contextmanager
+def owner_scope(owner: str):
+    """Attributes the LLM calls made in this context to `owner` (e.g. a session id) for fair sharing."""
+    reset = _current_owner.set(owner)
+    try:
+        yield owner
+    finally:
+        _current_owner.reset(reset)
+
+
+def current_owner() -> str:
+    return _current_owner.get()
+
+
+class _Waiter:
+    __slots__ = ("owner", "tokens", "enqueued", "granted")
+
+    def __init__(self, owner: str, tokens: int):
+        self.owner = owner
+        self.tokens = tokens
+        self.enqueued = time.monotonic()
+        self.granted = False
+
+
+class Permit:
+    """One granted LLM call slot; release it with Governor.release (or use Governor.slot)."""
+    __slots__ = ("owner", "tokens", "released")
+
+    def __init__(self, owner: str, tokens: int):
+        self.owner = owner
+        self.tokens = tokens
+        self.released = False
+
+
+class Governor:
+    """
+    Process-wide LLM call admission: global concurrency limit + tokens-per-minute bucket,
+    granted fairly across owners (fewest active calls first, then longest waiting).
+    """
+    def __init__(self, max_concurrency: int = 16, tokens_per_minute: int = 0, wait_window: int = 1000):
+        self.max_concurrency = max(1, max_concurrency)
+        self.tokens_per_minute = max(0, tokens_per_minute)
+        self._tokens = float(self.tokens_per_minute)
+        self._refilled_at = time.monotonic()
+        self._active: Dict[str, int] = {}
+        self._waiting: Dict[str, Deque[_Waiter]] = {}
+        self._waits: Deque[float] = deque(maxlen=wait_window)
+        self._granted_total = 0
+        self._cond = threading.Condition()
+
+    @classmethod
+    def from_env(cls) -> "Governor":
+        return cls(
+            max_concurrency=int(os.environ.get("PROOFREADER_MAX_CONCURRENCY", "16")),
+            tokens_per_minute=int(os.environ.get("PROOFREADER_TPM", "0")),
+        )
+
+    # --- Admission (called with self._cond held) ---
+    def _refill(self):
+        if not self.tokens_per_minute:
+            return
+        now = time.monotonic()
+        self._tokens = min(float(self.tokens_per_minute),
+                           self._tokens + (now - self._refilled_at) * self.tokens_per_minute / 60.0)
+        self._refilled_at = now
+
+    def _affordable(self, tokens: int) -> bool:
+        # 예산보다 큰 요청은 버킷이 가득 찼을 때 허가 (영원히 막히지 않도록)
+        return not self.tokens_per_minute or self._tokens >= min(tokens, self.tokens_per_minute)
+
+    def _dispatch(self):
+        """Grants waiting requests while capacity allows, fairest owner first."""
+        self._refill()
+        granted = False
+        while sum(self._active.values()) < self.max_concurrency:
+            heads = [queue[0] for queue in self._waiting.values() if queue]
+            if not heads:
+                break
+            waiter = min(heads, key=lambda w: (self._active.get(w.owner, 0), w.enqueued))
+            if not self._affordable(waiter.tokens):
+                break
+            self._waiting[waiter.owner].popleft()
+            if not self._waiting[waiter.owner]:
+                del self._waiting[waiter.owner]
+            self._grant(waiter.owner, waiter.tokens)
+            self._waits.append(time.monotonic() - waiter.enqueued)
+            waiter.granted = True
+            granted = True
+        if granted:
+            self._cond.notify_all()
+
+    def _grant(self, owner: str, tokens: int):
+        self._active[owner] = self._active.get(owner, 0) + 1
+        self._granted_total += 1
+        if self.tokens_per_minute:
+            self._tokens -= tokens
+
+    # --- Public API ---
+    def acquire(self, tokens: int = 0, owner: Optional[str] = None, timeout: Optional[float] = None,
+                should_abort: Optional[Callable[[], bool]] = None, poll: float = 0.2) -> Optional[Permit]:
+        """
+        Blocks until the call may start. Returns None on timeout or when `should_abort()` turns true
+        (e.g. the job was cancelled) while still queued.
+        """
+        owner = owner or current_owner()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            waiter = _Waiter(owner, tokens)
+            self._waiting.setdefault(owner, deque()).append(waiter)
+            self._dispatch()
+            while not waiter.granted:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if (remaining is not None and remaining <= 0) or (should_abort and should_abort()):
+                    self._waiting[owner].remove(waiter)
+                    if not self._waiting[owner]:
+                        del self._waiting[owner]
+                    self._dispatch()
+                    return None
+                self._cond.wait(poll if remaining is None else min(poll, remaining))
+                self._dispatch()
+        return Permit(owner, tokens)
+
+    def try_acquire(self, tokens: int = 0, owner: Optional[str] = None) -> Optional[Permit]:
+        """Non-blocking: a permit only if capacity is free right now and nobody is queued (e.g. for hedges)."""
+        owner = owner or current_owner()
+        with self._cond:
+            self._refill()
+            if (self._waiting or sum(self._active.values()) >= self.max_concurrency
+                    or not self._affordable(tokens)):
+                return None
+            self._grant(owner, tokens)
+        return Permit(owner, tokens)
+
+    def release(self, permit: Permit, used_tokens: Optional[int] = None):
+        """Frees the slot; `used_tokens` (actual usage) corrects the estimate charged at acquire."""
+        with self._cond:
+            if permit.released:
+                return
+            permit.released = True
+            self._active[permit.owner] -= 1
+            if not self._active[permit.owner]:
+                del self._active[permit.owner]
+            if self.tokens_per_minute and used_tokens is not None:
+                self._tokens = min(float(self.tokens_per_minute), self._tokens + permit.tokens - used_tokens)
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, tokens: int = 0, owner: Optional[str] = None, timeout: Optional[float] = None):
+        permit = self.acquire(tokens, owner, timeout)
+        if permit is None:
+            raise TimeoutError("Timed out waiting for an LLM call slot")
+        try:
+            yield permit
+        finally:
+            self.release(permit)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth (total and per owner), wait-time percentiles, active calls, token budget."""
+        with self._cond:
+            self._refill()
+            waits = sorted(self._waits)
+            return {
+                "max_concurrency": self.max_concurrency,
+                "active": sum(self._active.values()),
+                "active_by_owner": dict(self._active),
+                "queued": sum(len(q) for q in self._waiting.values()),
+                "queued_by_owner": {owner: len(q) for owner, q in self._waiting.items()},
+                "granted_total": self._granted_total,
+                "wait_p50_ms": round(_percentile(waits, 0.50) * 1000, 1),
+                "wait_p95_ms": round(_percentile(waits, 0.95) * 1000, 1),
+                "tokens_per_minute": self.tokens_per_minute or None,
+                "tokens_available": round(self._tokens) if self.tokens_per_minute else None,
+            }
@@ -1,25 +1,66 @@
 from dotenv import load_dotenv
 load_dotenv()
 
+import concurrent.futures
+import contextvars
+import time
 from langgraph.graph import StateGraph, END
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 
 try:
-    from .agents import AgentState, ProofreaderAgents
+    from .agents import AgentState, ProofreaderAgents, format_context
     from .semantic_layer import SemanticLayer
+    from .memory_namespaces import NamespacedMemory
+    from .instrumentation import TRACE
+    from .registry import get_semantic_layer, get_memory, get_corrections
+    from .corrections import CorrectionTable
+    from .routing import model_tiers_from_env, escalation_reason, estimate_cost
+    from .call_policy import check_cancelled
 except ImportError:
     # Fallback for direct execution
     import sys
     import os
     sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-    from agents import AgentState, ProofreaderAgents
+    from agents import AgentState, ProofreaderAgents, format_context
     from semantic_layer import SemanticLayer
+    from memory_namespaces import NamespacedMemory
+    from instrumentation import TRACE
+    from registry import get_semantic_layer, get_memory, get_corrections
+    from corrections import CorrectionTable
+    from routing import model_tiers_from_env, escalation_reason, estimate_cost
+    from call_policy import check_cancelled
+
+# process_batch에서 배치 안의 청크를 검증/라우팅하는 최대 스레드 수
+MAX_BATCH_WORKERS = 8
+
+# corrections 인자 기본값: 작업의 네임스페이스별 공유 교정표 사용 (None은 교정 학습/적용 끔)
+NAMESPACE_CORRECTIONS = object()
+
 
 class ProofreadingWorkflow:
-    def __init__(self, persist_directory: str = "./chroma_db"):
-        self.agents = ProofreaderAgents()
-        # Ensure we point to the right persistence directory
-        self.semantic_layer = SemanticLayer(persist_directory=persist_directory) 
+    def __init__(self, persist_directory: str = "./chroma_db", agents: ProofreaderAgents = None,
+                 semantic_layer: SemanticLayer = None, tiers: List[ProofreaderAgents] = None,
+                 memory: NamespacedMemory = None, corrections: Optional[CorrectionTable] = NAMESPACE_CORRECTIONS):
+        # tiers: 저렴한 모델부터 순서대로 (결과가 불확실하면 다음 티어로 승급)
+        if tiers:
+            self.tiers = list(tiers)
+        elif agents is not None:
+            self.tiers = [agents]
+        else:
+            self.tiers = [ProofreaderAgents(model_name=m) for m in model_tiers_from_env()]
+        self.agents = self.tiers[0]
+        # Ensure we point to the right persistence directory (one shared layer per directory)
+        self.semantic_layer = semantic_layer or get_semantic_layer(persist_directory)
+        # 기관/위원회별 네임스페이스 + 전역 레이어 (검색은 작업의 네임스페이스 체인만 조회)
+        if memory is None:
+            memory = get_memory(persist_directory) if semantic_layer is None else \
+                NamespacedMemory(persist_directory, global_layer=semantic_layer)
+        self.memory = memory
+        # 검증된 반복 오타 교정표: 기본은 네임스페이스별 표, 표를 넘기면 모든 네임스페이스에 그 표, None이면 사용 안 함
+        if corrections is NAMESPACE_CORRECTIONS:
+            self._corrections_for = lambda namespace: get_corrections(persist_directory, namespace)
+        else:
+            self._corrections_for = lambda namespace: corrections
         
         self.workflow = self._build_graph()
         self.app = self.workflow.compile()
@@ -29,14 +70,16 @@ class ProofreadingWorkflow:
 
         # Define Nodes
         workflow.add_node("retrieve", self.retrieve_context)
-        workflow.add_node("correct", self.agents.corrector_agent)
-        workflow.add_node("verify", self.agents.verifier_agent)
+        workflow.add_node("correct", self.correct)
+        workflow.add_node("verify", self.verify)
+        workflow.add_node("route", self.route)
 
         # Define Edges
         workflow.set_entry_point("retrieve")
         workflow.add_edge("retrieve", "correct")
         workflow.add_edge("correct", "verify")
-        workflow.add_edge("verify", END)
+        workflow.add_edge("verify", "route")
+        workflow.add_conditional_edges("route", self._after_route, {"correct": "correct", END: END})
 
         return workflow
 
@@ -44,37 +87,194 @@ class ProofreadingWorkflow:
         """
         Node: Retrieval from ChromaDB
         """
+        check_cancelled()
+        if state.get("local_only"):
+            # 학습된 교정만으로 처리되는 청크: 검색/LLM 생략
+            return {"context_data": {}}
+        if state.get("context_data"):
+            # 배치 모드에서 이미 검색한 경우
+            return {"context_data": state["context_data"]}
         print(f"--- [Graph] Retrieve Context for Chunk {state.get('chunk_id')} ---")
         text = state['original_text']
         
         # Search semantic layer
-        results = self.semantic_layer.search(text)
+        with TRACE.stage("retrieve", state.get('chunk_id')):
+            results = self.memory.search(text, state.get("namespace"))
         
         return {"context_data": results}
 
-    def process_chunk(self, chunk_data: Dict[str, Any], global_rules: str = "") -> Dict[str, Any]:
+    def correct(self, state: AgentState) -> Dict[str, Any]:
+        """Node: correction on the current tier's model (skipped when a batch request already corrected it)"""
+        if state.get("corrected_text") is not None:
+            return {"corrected_text": state["corrected_text"]}
+        result = self.tiers[state.get("tier", 0)].corrector_agent(state)
+        # 에이전트는 오류를 원문으로 대체하므로, 취소된 경우 결과를 쓰지 않고 여기서 중단
+        check_cancelled()
+        return result
+
+    def verify(self, state: AgentState) -> Dict[str, Any]:
+        """Node: verification on the current tier's model; ACCEPT/REJECT results feed the correction table"""
+        if state.get("local_only"):
+            return {
+                "verification_result": {
+                    "status": "ACCEPT",
+                    "reason": f"Same as a previously accepted text after {len(state['local_fixes'])} learned "
+                              f"corrections (LLM skipped).",
+                },
+                "final_text": state["corrected_text"],
+            }
+        result = self.tiers[state.get("tier", 0)].verifier_agent(state)
+        check_cancelled()
+        corrections = self._corrections_for(state.get("namespace", ""))
+        # 교정 에이전트가 실패해 원문이 그대로 넘어온 경우는 검토된 결과가 아니므로 학습하지 않음
+        if corrections is not None and not state.get("correct_error") and not state.get("cer_guard"):
+            # LLM이 받은 텍스트(로컬 교정 후) 기준으로 학습: 로컬 교정은 새 채택으로 다시 세지 않음
+            corrections.observe(state.get("local_text") or state["original_text"], result["final_text"],
+                                result["verification_result"]["status"], state.get("local_fixes"))
+        return result
+
+    def route(self, state: AgentState) -> Dict[str, Any]:
+        """
+        Node: records the finished attempt and escalates to the next tier when the result is uncertain
+        (verifier MODIFY/ERROR, CER guard, corrector error) and a stronger model is configured.
+        """
+        tier = state.get("tier", 0)
+        model = self.tiers[tier].model_name
+        usage = state.get("usage") or {}
+        reason = escalation_reason(state)
+        escalate = reason is not None and tier + 1 < len(self.tiers)
+
+        attempt = {
+            "tier": tier,
+            "model": model,
+            "status": state["verification_result"]["status"],
+            "reason": reason,
+            "escalated": escalate,
+            "duration_ms": round((time.perf_counter() - state["attempt_start"]) * 1000, 3),
+            "llm_calls": usage.get("llm_calls", 0),
+            "input_tokens": usage.get("input_tokens", 0),
+            "output_tokens": usage.get("output_tokens", 0),
+            "cached_tokens": usage.get("cached_tokens", 0),
+            "cost_usd": estimate_cost(model, usage.get("input_tokens", 0), usage.get("output_tokens", 0),
+                                      usage.get("cached_tokens", 0)),
+        }
+        TRACE.emit({"stage": "route", "chunk_id": state.get("chunk_id"), **attempt})
+        update = {"routing": list(state.get("routing") or []) + [attempt]}
+
+        if escalate:
+            print(f"--- [Graph] Chunk {state.get('chunk_id')}: {reason} on {model}, escalating to {self.tiers[tier + 1].model_name} ---")
+            update.update({
+                "tier": tier + 1,
+                "usage": {},
+                "attempt_start": time.perf_counter(),
+                "corrected_text": None,
+                "cer_guard": False,
+                "correct_error": None,
+            })
+        return update
+
+    def _after_route(self, state: AgentState) -> str:
+        # route가 티어를 올렸으면 상위 모델로 다시 교정
+        return "correct" if state["tier"] > state["routing"][-1]["tier"] else END
+
+    def process_chunk(self, chunk_data: Dict[str, Any], global_rules: str = "",
+                      glossary: List[str] = None, namespace: str = "") -> Dict[str, Any]:
         """
         Entry point to process a single chunk.
         """
-        initial_state: AgentState = {
+        return self._run(self._initial_state(chunk_data, global_rules, glossary, namespace))
+
+    def process_batch(self, chunks: List[Dict[str, Any]], global_rules: str = "",
+                      glossary: List[str] = None, namespace: str = "") -> List[Dict[str, Any]]:
+        """
+        Batched corrector mode: corrects several chunks with one LLM request on the first tier,
+        then verifies/routes each chunk through the graph as usual. Chunks whose batch output
+        fails validation are corrected individually by the graph.
+        Returns one result per chunk, in input order (the exception instead, if that chunk failed).
+        """
+        if not chunks:
+            return []
+        all_states = [self._initial_state(chunk, global_rules, glossary, namespace) for chunk in chunks]
+        # 학습된 교정만으로 끝나는 청크는 배치 요청에서 제외
+        states = [state for state in all_states if not state["local_only"]]
+        if states:
+            self._batch_correct(states, global_rules, glossary, namespace)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(all_states), MAX_BATCH_WORKERS)) as executor:
+            # 취소 토큰(contextvar)이 청크 스레드에도 보이도록 컨텍스트를 복사해서 실행
+            futures = [executor.submit(contextvars.copy_context().run, self._run, state) for state in all_states]
+        return [f.exception() or f.result() for f in futures]
+
+    def _batch_correct(self, states: List[AgentState], global_rules: str, glossary: List[str], namespace: str):
+        """Retrieves context for every state and fills corrected_text from one batch request where it validated."""
+        terms, meta_context, history = [], [], []
+        for state in states:
+            with TRACE.stage("retrieve", state["chunk_id"]):
+                state["context_data"] = self.memory.search(state["original_text"], namespace)
+            terms += [t for t in state["context_data"].get("relevant_terms", []) if t not in terms]
+            meta_context += [m for m in state["context_data"].get("relevant_context", []) if m not in meta_context]
+            history += [h for h in state["context_data"].get("relevant_history", []) if h not in history]
+
+        items = [{"id": str(i), "text": state["local_text"]} for i, state in enumerate(states)]
+        context_str = format_context(terms, meta_context, history)
+        accepted, usage = self.agents.batch_corrector(items, global_rules, context_str,
+                                                      batch_id=states[0]["chunk_id"], glossary=glossary)
+        check_cancelled()
+
+        # 배치 요청의 토큰은 항목 수로 나누어 각 청크의 첫 시도에 귀속
+        share = {key: value // len(states) for key, value in usage.items()}
+        for i, state in enumerate(states):
+            if str(i) in accepted:
+                state["corrected_text"] = accepted[str(i)]
+            state["usage"] = dict(share)
+
+    def _initial_state(self, chunk_data: Dict[str, Any], global_rules: str, glossary: List[str] = None,
+                       namespace: str = "") -> AgentState:
+        text = chunk_data.get("text")
+        local_text, local_fixes, local_only = text, [], False
+        corrections = self._corrections_for(namespace or "")
+        if corrections is not None:
+            local_text, local_fixes = corrections.apply(text)
+            local_only = corrections.previously_accepted(local_text)
+        return {
             "chunk_id": chunk_data.get("id"),
-            "original_text": chunk_data.get("text"),
+            "original_text": text,
+            "local_text": local_text,
+            "local_fixes": local_fixes,
+            "local_only": local_only,
             "global_rules": global_rules,
+            "glossary": list(glossary or []),
+            "namespace": namespace or "",
             "context_data": {},
-            "corrected_text": None,
+            "corrected_text": local_text if local_only else None,
             "verification_result": None,
             "final_text": None,
             "pre_context": chunk_data.get("pre_context"),
-            "post_context": chunk_data.get("post_context")
+            "post_context": chunk_data.get("post_context"),
+            "tier": 0,
+            "usage": {},
+            "attempt_start": time.perf_counter(),
+            "cer_guard": False,
+            "correct_error": None,
+            "routing": []
         }
 
+    def _run(self, initial_state: AgentState) -> Dict[str, Any]:
         # Run the graph
-        final_state = self.app.invoke(initial_state)
+        with TRACE.stage("chunk", initial_state["chunk_id"]) as span:
+            final_state = self.app.invoke(initial_state)
+            span["status"] = final_state["verification_result"]["status"]
+            span["chars"] = len(initial_state["original_text"] or "")
+            span["local_fixes"] = len(initial_state["local_fixes"])
+            span["local_only"] = initial_state["local_only"]
         
         return {
             "chunk_id": final_state["chunk_id"],
             "original_text": final_state["original_text"],
             "final_text": final_state["final_text"],
             "status": final_state["verification_result"]["status"],
-            "changes_reason": final_state["verification_result"]["reason"]
+            "changes_reason": final_state["verification_result"]["reason"],
+            "local_fixes": len(final_state.get("local_fixes") or []),
+            "local_only": final_state.get("local_only", False),
+            "routing": final_state["routing"]
         }
@@ -0,0 +1,74 @@
+"""
+회의 이력 적재 모듈
+검수가 끝난 회의록을 구간으로 나눠 SemanticLayer의 history 풀에 한 번에 적재
+(이후 회의의 retrieve 단계에서 relevant_history로 검색됨)
+
+- 분할: 문단 -> 문장 단위로 나눈 뒤 HISTORY_SEGMENT_CHARS 이하로 다시 묶음 (너무 짧은 구간은 버림)
+- 적재: 모든 구간을 한 번의 배치 임베딩(제공자가 요청 크기만큼 나눔) + 한 번의 스냅샷 교체 + 한 번의 저장
+  구간마다 add_history를 부르면 구간 수만큼 임베딩 요청과 전체 파일 재기록이 일어남
+- 같은 회의 ID가 이미 있으면 건너뜀 (재시작된 작업이 다시 완료되는 경우)
+
+환경변수:
+- PROOFREADER_HISTORY: 완료된 작업의 이력 자동 적재 여부 (기본 1)
+- PROOFREADER_HISTORY_SEGMENT_CHARS: 이력 구간 최대 글자 수 (기본 500)
+"""
+import os
+import re
+from typing import List, Optional
+
+HISTORY_SEGMENT_CHARS = 500
+# 이보다 짧은 구간("네.", "감사합니다." 등)은 검색 잡음만 늘리므로 적재하지 않음
+HISTORY_MIN_CHARS = 20
+
+_SENTENCE_END = re.compile(r"(?<=[.?!。])\s+")
+
+
+def history_enabled() -> bool:
+    return os.environ.get("PROOFREADER_HISTORY", "1").strip().lower() not in ("0", "false", "no")
+
+
+def segment_transcript(text: str, max_chars: Optional[int] = None,
+                       min_chars: int = HISTORY_MIN_CHARS) -> List[str]:
+    """
+    Splits a transcript into retrieval segments of at most `max_chars` characters:
+    paragraphs are split into sentences, which are packed greedily (never across paragraphs).
+    A sentence longer than `max_chars` is cut at the last space before the limit.
+    """
+    max_chars = max_chars or int(os.environ.get("PROOFREADER_HISTORY_SEGMENT_CHARS", HISTORY_SEGMENT_CHARS))
+    segments: List[str] = []
+    for paragraph in (text or "").split("\n"):
+        current = ""
+        for sentence in _SENTENCE_END.split(" ".join(paragraph.split())):
+            while len(sentence) > max_chars:
+                cut = sentence.rfind(" ", 0, max_chars)
+                cut = cut if cut > 0 else max_chars
+                if current:
+                    segments.append(current)
+                    current = ""
+                segments.append(sentence[:cut].strip())
+                sentence = sentence[cut:].strip()
+            if current and len(current) + 1 + len(sentence) > max_chars:
+                segments.append(current)
+                current = ""
+            current = f"{current} {sentence}" if current else sentence
+        if current:
+            segments.append(current)
+
+    seen = set()
+    unique = []
+    for segment in segments:
+        if len(segment) >= min_chars and segment not in seen:
+            seen.add(segment)
+            unique.append(segment)
+    return unique
+
+
+def ingest_meeting(memory, text: str, meeting_id: str, namespace: Optional[str] = None) -> int:
+    """
+    Segments a finished transcript and stores it in the history pool of `namespace`
+    (`memory` is a NamespacedMemory). Returns the number of segments added.
+    """
+    segments = segment_transcript(text)
+    if not segments:
+        return 0
+    return memory.add_history_segments(segments, meeting_id, namespace)
@@ -0,0 +1,204 @@
+"""
+계측(Instrumentation) 모듈
+워크플로우 단계별 소요 시간, 토큰 사용량, 재시도, CER을 구조화된 이벤트로 기록 (JSON Lines 내보내기 + 요약)
+
+환경변수:
+- PROOFREADER_TRACE=1: 계측 활성화 (비활성 시 no-op 컨텍스트만 반환하여 오버헤드 거의 없음)
+- PROOFREADER_TRACE_FILE: 이벤트를 추가 기록할 JSONL 파일 경로 (선택)
+
+리스너(add_listener)가 있으면 계측이 꺼져 있어도 스팬을 측정해 리스너에만 전달 (metrics.py)
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+
+class _NullSpan(dict):
+    """Span used when tracing is disabled: silently drops every annotation."""
+    def __setitem__(self, key, value):
+        pass
+
+    def update(self, *args, **kwargs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _NullStage:
+    def __enter__(self):
+        return _NULL_SPAN
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ("recorder", "span", "start")
+
+    def __init__(self, recorder: "Instrumentation", name: str, chunk_id: Optional[str]):
+        self.recorder = recorder
+        self.span = {"stage": name, "chunk_id": chunk_id}
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span["duration_ms"] = round((time.perf_counter() - self.start) * 1000, 3)
+        if exc_type is not None:
+            self.span["error"] = f"{exc_type.__name__}: {exc}"
+        self.recorder.emit(self.span)
+        return False
+
+
+def add_usage(span: Dict[str, Any], message, totals: Optional[Dict[str, int]] = None) -> None:
+    """
+    Adds token usage from a LangChain AIMessage to a span (accumulates across calls).
+    `totals` receives the same counts even when tracing is disabled (e.g. for routing cost).
+    cached_tokens: input tokens served from the provider's prompt cache (part of input_tokens).
+    """
+    usage = getattr(message, "usage_metadata", None)
+    if usage:
+        input_tokens = usage.get("input_tokens", 0)
+        output_tokens = usage.get("output_tokens", 0)
+        cached_tokens = (usage.get("input_token_details") or {}).get("cache_read") or 0
+    else:
+        token_usage = (getattr(message, "response_metadata", None) or {}).get("token_usage") or {}
+        input_tokens = token_usage.get("prompt_tokens", 0)
+        output_tokens = token_usage.get("completion_tokens", 0)
+        cached_tokens = (token_usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0
+    for target in (span, totals) if totals is not None else (span,):
+        target["llm_calls"] = target.get("llm_calls", 0) + 1
+        target["input_tokens"] = target.get("input_tokens", 0) + input_tokens
+        target["output_tokens"] = target.get("output_tokens", 0) + output_tokens
+        target["cached_tokens"] = target.get("cached_tokens", 0) + cached_tokens
+
+
+def cache_ratio(input_tokens: int, cached_tokens: int) -> Optional[float]:
+    """Share of input tokens read from the provider's prompt cache (None without input)."""
+    return round(cached_tokens / input_tokens, 3) if input_tokens else None
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+class Instrumentation:
+    """
+    Structured per-stage recorder.
+    Usage:
+        with TRACE.stage("correct", chunk_id) as span:
+            ...
+            span["cer"] = cer
+    """
+    def __init__(self, enabled: bool = False, path: Optional[str] = None, max_events: int = 100_000):
+        self.enabled = enabled
+        self.path = path
+        self._events = deque(maxlen=max_events)
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+
+    @classmethod
+    def from_env(cls) -> "Instrumentation":
+        flag = os.environ.get("PROOFREADER_TRACE", "").lower()
+        path = os.environ.get("PROOFREADER_TRACE_FILE") or None
+        return cls(enabled=flag not in ("", "0", "false", "no") or path is not None, path=path)
+
+    def add_listener(self, listener: Callable[[Dict[str, Any]], None]):
+        """Calls `listener(event)` for every finished span/event, whether or not events are recorded."""
+        with self._lock:
+            if listener not in self._listeners:
+                self._listeners = self._listeners + [listener]
+
+    def remove_listener(self, listener: Callable[[Dict[str, Any]], None]):
+        with self._lock:
+            self._listeners = [l for l in self._listeners if l != listener]
+
+    def stage(self, name: str, chunk_id: Optional[str] = None):
+        if not self.enabled and not self._listeners:
+            return _NULL_STAGE
+        return _Stage(self, name, chunk_id)
+
+    def emit(self, event: Dict[str, Any]):
+        for listener in self._listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                print(f"[Trace] Listener Error: {e}")
+        if not self.enabled:
+            return
+        event.setdefault("ts", time.time())
+        with self._lock:
+            self._events.append(event)
+            if self.path:
+                try:
+                    with open(self.path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(event, ensure_ascii=False) + "\n")
+                except Exception as e:
+                    print(f"[Trace] Write Error: {e}")
+
+    def events(self, prefix: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Recorded events, optionally only those whose chunk_id starts with `prefix` (e.g. a job id)."""
+        with self._lock:
+            events = list(self._events)
+        if prefix:
+            events = [e for e in events if str(e.get("chunk_id") or "").startswith(prefix)]
+        return events
+
+    def to_jsonl(self, prefix: Optional[str] = None) -> str:
+        return "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in self.events(prefix))
+
+    def export_jsonl(self, path: str, prefix: Optional[str] = None):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.to_jsonl(prefix))
+
+    def summary(self, prefix: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Per-stage aggregate: count, total/mean/p50/p95 latency, tokens (cache ratio), retries/hedges, errors."""
+        by_stage: Dict[str, List[Dict[str, Any]]] = {}
+        for event in self.events(prefix):
+            by_stage.setdefault(event["stage"], []).append(event)
+
+        rows = []
+        for stage, events in by_stage.items():
+            durations = sorted(e.get("duration_ms", 0.0) for e in events)
+            cers = [e["cer"] for e in events if "cer" in e]
+            input_tokens = sum(e.get("input_tokens", 0) for e in events)
+            cached_tokens = sum(e.get("cached_tokens", 0) for e in events)
+            rows.append({
+                "stage": stage,
+                "count": len(events),
+                "total_ms": round(sum(durations), 1),
+                "mean_ms": round(sum(durations) / len(durations), 1),
+                "p50_ms": round(_percentile(durations, 0.50), 1),
+                "p95_ms": round(_percentile(durations, 0.95), 1),
+                "llm_calls": sum(e.get("llm_calls", 0) for e in events),
+                "input_tokens": input_tokens,
+                "output_tokens": sum(e.get("output_tokens", 0) for e in events),
+                "cache_ratio": cache_ratio(input_tokens, cached_tokens),
+                "retries": sum(e.get("retries", 0) for e in events),
+                "llm_retries": sum(e.get("llm_retries", 0) for e in events),
+                "hedges": sum(e.get("hedges", 0) for e in events),
+                "queue_wait_ms": round(sum(e.get("queue_wait_ms", 0.0) for e in events), 1),
+                "errors": sum(1 for e in events if "error" in e),
+                "mean_cer": round(sum(cers) / len(cers), 4) if cers else None,
+            })
+        rows.sort(key=lambda r: r["total_ms"], reverse=True)
+        return rows
+
+    def reset(self):
+        with self._lock:
+            self._events.clear()
+
+
+# 프로세스 전역 계측기
+TRACE = Instrumentation.from_env()
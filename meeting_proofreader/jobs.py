@@ -0,0 +1,579 @@
+"""
+작업(Job) 관리 모듈
+검수 실행을 영속 작업으로 관리 (청크 단위 체크포인트 + 백그라운드 워커 + 재접속 시 이어보기)
+
+청크는 한꺼번에 제출하지 않고 우선순위 큐에서 워커가 하나씩 꺼내 처리:
+- 사용자가 보고 있는 위치(focus)에 가까운 청크부터 처리 (기본: 문서 앞부분부터)
+- cancel(): 대기 중인 청크는 즉시 버리고, 진행 중인 LLM 호출은 1초 이내에 중단 (call_policy.CancelToken)
+
+완료된 작업의 교정본은 작업의 네임스페이스 이력 풀에 한 번에 적재 (history.py, PROOFREADER_HISTORY=0이면 생략)
+- 작업을 done으로 저장한 뒤 백그라운드에서 실행 (사용자는 임베딩을 기다리지 않음)
+- 임베딩 요청은 세션 몫으로 governor 허가를 받고, 대기 중에 cancel()하면 적재하지 않음
+- 실패한 청크가 있는 작업은 교정되지 않은 구간이 섞이므로 적재하지 않음 (job["history"] = "skipped")
+"""
+import concurrent.futures
+import contextvars
+import heapq
+import os
+import queue
+import socket
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    from .persistence import write_text_parts, read_text_parts
+    from .call_policy import CancelToken, Cancelled, cancel_scope
+    from .governor import owner_scope
+    from .history import history_enabled, ingest_meeting
+    from .instrumentation import TRACE
+except ImportError:
+    from persistence import write_text_parts, read_text_parts
+    from call_policy import CancelToken, Cancelled, cancel_scope
+    from governor import owner_scope
+    from history import history_enabled, ingest_meeting
+    from instrumentation import TRACE
+
+JOB_COLLECTION = "proofreading_jobs"
+SESSION_JOB_COLLECTION = "session_jobs"
+
+# 하트비트가 이 시간 이상 갱신되지 않으면 소유 인스턴스가 죽은 것으로 간주하고 이어서 실행
+HEARTBEAT_INTERVAL = 10.0
+STALE_AFTER = 60.0
+# 완료 결과를 기다리는 최대 간격 (취소/하트비트 확인 주기)
+CANCEL_CHECK_INTERVAL = 0.2
+
+# 이 프로세스(인스턴스)의 식별자
+INSTANCE_ID = f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+
+
+class JobStore:
+    """
+    Firestore-backed job records.
+    proofreading_jobs/{job_id}                      : status, progress, chunk boundaries, heartbeat
+    proofreading_jobs/{job_id}/chunks/*             : compressed original text
+    proofreading_jobs/{job_id}/checkpoints/{index}  : finished chunk results
+    session_jobs/{session_id}                       : latest job of a session
+    """
+    def __init__(self, db, collection: str = JOB_COLLECTION):
+        self.db = db
+        self.collection = collection
+
+    def _doc(self, job_id: str):
+        return self.db.collection(self.collection).document(job_id)
+
+    def create(self, job: Dict[str, Any], text: str):
+        doc_ref = self._doc(job["job_id"])
+        job["_text_parts"] = write_text_parts(doc_ref, "original_text", text)
+        doc_ref.set(job)
+        self.db.collection(SESSION_JOB_COLLECTION).document(job["session_id"]).set({"job_id": job["job_id"]})
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        doc = self._doc(job_id).get()
+        return doc.to_dict() if doc.exists else None
+
+    def put(self, job: Dict[str, Any]):
+        self._doc(job["job_id"]).set(job)
+
+    def update(self, job_id: str, fields: Dict[str, Any]):
+        self._doc(job_id).update(fields)
+
+    def _transact(self, fn):
+        """Runs fn(transaction) atomically (a Firestore transaction, retried by the client on contention)."""
+        run = getattr(self.db, "run_transaction", None)
+        if run is not None:
+            # InMemoryFirestore
+            return run(fn)
+        from google.cloud import firestore
+        return firestore.transactional(fn)(self.db.transaction())
+
+    def claim(self, job_id: str, owner: str, stale_after: float = STALE_AFTER) -> Optional[Dict[str, Any]]:
+        """
+        Takes over an unfinished job whose heartbeat is older than `stale_after` seconds, atomically:
+        of several instances (or tabs) claiming at once, exactly one gets the job, the others None.
+        """
+        doc_ref = self._doc(job_id)
+
+        def attempt(transaction):
+            snapshot = doc_ref.get(transaction=transaction)
+            job = snapshot.to_dict() if snapshot.exists else None
+            if (job is None or job["status"] not in ("queued", "running") or job.get("cancel_requested")
+                    or time.time() - job.get("heartbeat", 0) <= stale_after):
+                return None
+            job["owner"] = owner
+            job["heartbeat"] = time.time()
+            transaction.update(doc_ref, {"owner": owner, "heartbeat": job["heartbeat"]})
+            return job
+        return self._transact(attempt)
+
+    def put_if_owner(self, job: Dict[str, Any], owner: str) -> bool:
+        """Writes the job unless another instance has claimed it since (compare-and-set on owner)."""
+        doc_ref = self._doc(job["job_id"])
+
+        def attempt(transaction):
+            snapshot = doc_ref.get(transaction=transaction)
+            stored = snapshot.to_dict() if snapshot.exists else None
+            if stored is not None and stored.get("owner") != owner:
+                return False
+            if stored is not None and stored.get("cancel_requested"):
+                # 다른 인스턴스가 남긴 취소 요청은 덮어쓰지 않음
+                job_to_write = dict(job, cancel_requested=True)
+            else:
+                job_to_write = job
+            transaction.set(doc_ref, job_to_write)
+            return True
+        return self._transact(attempt)
+
+    def load_text(self, job: Dict[str, Any]) -> str:
+        return read_text_parts(self._doc(job["job_id"]), "original_text", job["_text_parts"])
+
+    def save_checkpoint(self, job_id: str, index: int, result: Dict[str, Any]):
+        self._doc(job_id).collection("checkpoints").document(str(index)).set(result)
+
+    def load_checkpoints(self, job: Dict[str, Any]) -> Dict[int, Dict[str, Any]]:
+        checkpoints = {}
+        checkpoints_ref = self._doc(job["job_id"]).collection("checkpoints")
+        for index in job.get("completed_indices", []):
+            doc = checkpoints_ref.document(str(index)).get()
+            if doc.exists:
+                checkpoints[index] = doc.to_dict()
+        return checkpoints
+
+    def job_for_session(self, session_id: str) -> Optional[str]:
+        doc = self.db.collection(SESSION_JOB_COLLECTION).document(session_id).get()
+        return doc.to_dict().get("job_id") if doc.exists else None
+
+
+class ChunkQueue:
+    """
+    Priority queue of a job's pending batches.
+    Batches closest to the focus chunk index come first (ties: document order).
+    """
+    def __init__(self, batches: List[List[Dict[str, Any]]], focus: int = 0):
+        self._lock = threading.Lock()
+        self._heap: List[Any] = [(0, 0, n, batch) for n, batch in enumerate(batches)]
+        self.set_focus(focus)
+
+    def set_focus(self, focus: int):
+        """Re-orders the batches still queued around chunk index `focus`."""
+        with self._lock:
+            self.focus = focus
+            self._heap = [(abs(b[0]["index"] - focus), b[0]["index"], n, b)
+                          for n, (_, _, _, b) in enumerate(self._heap)]
+            heapq.heapify(self._heap)
+
+    def pop(self) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            return heapq.heappop(self._heap)[-1] if self._heap else None
+
+    def clear(self) -> int:
+        """Drops every queued batch; returns how many were dropped."""
+        with self._lock:
+            dropped, self._heap = len(self._heap), []
+            return dropped
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._heap)
+
+
+class JobManager:
+    """
+    Process-wide runner for proofreading jobs.
+    Chunks run on background threads (never the Streamlit script thread) and every finished
+    chunk is checkpointed, so reruns, refreshes and instance restarts never redo paid work.
+    """
+    def __init__(self, store: JobStore, chunker, workflow_factory: Callable[[], Any], max_workers: int = 5,
+                 batch_chars: Optional[int] = None, batch_size: Optional[int] = None,
+                 instance_id: Optional[str] = None, governor=None):
+        self.store = store
+        # 이력 적재용 임베딩 요청의 전역 동시성 허가 (None이면 registry.get_governor())
+        self.governor = governor
+        # 작업 소유자 표시 (기본: 이 프로세스의 INSTANCE_ID)
+        self.instance_id = instance_id or INSTANCE_ID
+        self.chunker = chunker
+        self.workflow_factory = workflow_factory
+        self.max_workers = max_workers
+        # 배치 교정 모드: 합계 batch_chars 이하의 연속 청크(최대 batch_size개)를 한 요청으로 교정 (0이면 비활성)
+        self.batch_chars = batch_chars if batch_chars is not None else int(os.environ.get("PROOFREADER_BATCH_CHARS", "0"))
+        self.batch_size = batch_size if batch_size is not None else int(os.environ.get("PROOFREADER_BATCH_SIZE", "4"))
+
+        # 이 인스턴스에서 실행 중인 작업: job_id -> {"job", "text", "results": {index: result}, "cancel", "queue"}
+        self._running: Dict[str, Dict[str, Any]] = {}
+        # 완료 후 이력 적재를 기다리는 작업: job_id -> CancelToken
+        self._ingesting: Dict[str, CancelToken] = {}
+        self._lock = threading.Lock()
+        self._workflow = None
+
+    def _get_workflow(self):
+        if self._workflow is None:
+            self._workflow = self.workflow_factory()
+        return self._workflow
+
+    # --- Public API ---
+    def submit(self, session_id: str, text: str, chunks: List[Dict[str, Any]], rules: str, workflow=None,
+               glossary: Optional[List[str]] = None, namespace: str = "") -> str:
+        # glossary: 세션 메타데이터 용어 (규칙과 함께 모든 청크 프롬프트의 공통 접두부에 들어감)
+        # namespace: 용어/이력 검색 범위 ("기관/위원회", memory_namespaces.py)
+        job_id = str(uuid.uuid4())
+        job = {
+            "job_id": job_id,
+            "session_id": session_id,
+            "status": "queued",
+            "rules": rules,
+            "glossary": list(glossary or []),
+            "namespace": namespace or "",
+            "boundaries": [[c["start_char"], c["end_char"]] for c in chunks],
+            "total_chunks": len(chunks),
+            "completed_indices": [],
+            "errors": {},
+            "owner": self.instance_id,
+            "heartbeat": time.time(),
+            "created_at": time.time(),
+        }
+        self._start(job, text, chunks, {}, workflow, persist_text=True)
+        return job_id
+
+    def attach(self, session_id: str, job_id: Optional[str] = None) -> Optional[str]:
+        """
+        Finds the session's job and, if its owner instance stopped heartbeating,
+        resumes it here from the last checkpoint. Returns the job id or None.
+        The takeover is claimed in a transaction, so concurrent attaches resume it only once.
+        """
+        job_id = job_id or self.store.job_for_session(session_id)
+        if not job_id:
+            return None
+        with self._lock:
+            if job_id in self._running:
+                return job_id
+        job = self.store.get(job_id)
+        if job is None:
+            return None
+        if (job["status"] in ("queued", "running") and not job.get("cancel_requested")
+                and time.time() - job.get("heartbeat", 0) > STALE_AFTER):
+            previous_owner = job.get("owner")
+            job = self.store.claim(job_id, self.instance_id)
+            if job is None:
+                # 다른 인스턴스/탭이 먼저 가져감
+                return job_id
+            print(f"[Jobs] Resuming orphaned job {job_id} (owner: {previous_owner})")
+            text = self.store.load_text(job)
+            chunks = self.chunker.chunks_from_boundaries(text, job["boundaries"])
+            done = self.store.load_checkpoints(job)
+            self._start(job, text, chunks, done, None, persist_text=False)
+        return job_id
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Stops a job: queued chunks are dropped at once and in-flight LLM calls give up within a second.
+        Finished chunks keep their checkpoints; the rest stay as original text. Returns False if the job
+        is already finished or unknown. A job running on another instance is flagged in the store and
+        stops at its next heartbeat.
+        """
+        with self._lock:
+            entry = self._running.get(job_id)
+            ingesting = self._ingesting.get(job_id)
+        if ingesting is not None:
+            # 완료된 작업의 이력 적재가 아직 허가를 기다리는 중이면 적재하지 않음
+            ingesting.cancel()
+            print(f"[Jobs] Job {job_id}: history ingestion cancelled")
+            return True
+        if entry is not None:
+            entry["cancel"].cancel()
+            dropped = entry["queue"].clear() if entry.get("queue") is not None else 0
+            print(f"[Jobs] Job {job_id}: cancel requested ({dropped} queued batches dropped)")
+            return True
+        job = self.store.get(job_id)
+        if job is None or job["status"] not in ("queued", "running"):
+            return False
+        fields = {"cancel_requested": True}
+        if time.time() - job.get("heartbeat", 0) > STALE_AFTER:
+            # 소유 인스턴스가 없으면 이어서 실행하지 않고 바로 종료 처리
+            fields["status"] = "cancelled"
+        # 소유 인스턴스의 진행 상황을 덮어쓰지 않도록 필드만 갱신
+        self.store.update(job_id, fields)
+        return True
+
+    def set_focus(self, job_id: str, char_offset: int):
+        """Processes the chunks around `char_offset` (e.g. the part of the text on screen) next."""
+        with self._lock:
+            entry = self._running.get(job_id)
+        if entry is None:
+            return
+        boundaries = entry["job"]["boundaries"]
+        index = next((i for i, (start, end) in enumerate(boundaries) if char_offset < end), len(boundaries) - 1)
+        # 큐가 아직 없으면(작업 시작 직후) 큐를 만들 때 반영
+        entry["job"]["focus"] = index
+        if entry["queue"] is not None:
+            entry["queue"].set_focus(index)
+
+    def stats(self) -> Dict[str, Any]:
+        """Jobs running on this instance and their queued batches (executor queue depth)."""
+        with self._lock:
+            entries = list(self._running.values())
+        return {
+            "running_jobs": len(entries),
+            "queued_batches": sum(len(e["queue"]) for e in entries if e["queue"] is not None),
+            "max_workers": self.max_workers,
+        }
+
+    def wait_history(self, job_id: str, timeout: Optional[float] = None) -> bool:
+        """Waits until the finished job's background history ingestion is over. False on timeout."""
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            with self._lock:
+                if job_id not in self._ingesting:
+                    return True
+            if deadline is not None and time.time() >= deadline:
+                return False
+            time.sleep(0.05)
+
+    def progress(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._running.get(job_id)
+            job = dict(entry["job"]) if entry else None
+        if job is None:
+            job = self.store.get(job_id)
+            if job is None:
+                return None
+        return {
+            "status": job["status"],
+            "completed": len(job["completed_indices"]),
+            "total": job["total_chunks"],
+            "errors": dict(job.get("errors", {})),
+        }
+
+    def result(self, job_id: str) -> str:
+        """Assembles the corrected text in chunk order (original text for chunks a cancelled job never ran)."""
+        with self._lock:
+            entry = self._running.get(job_id)
+            if entry:
+                job, results, text = entry["job"], dict(entry["results"]), entry["text"]
+            else:
+                job, results, text = None, None, None
+        if job is None:
+            job = self.store.get(job_id)
+            results = self.store.load_checkpoints(job)
+        if len(results) < job["total_chunks"] and text is None:
+            text = self.store.load_text(job)
+        return "".join(
+            results[i]["final_text"] if i in results else text[start:end]
+            for i, (start, end) in enumerate(job["boundaries"])
+        )
+
+    # --- Execution ---
+    def _start(self, job, text, chunks, done, workflow, persist_text: bool):
+        with self._lock:
+            self._running[job["job_id"]] = {
+                "job": job, "text": text, "results": dict(done), "cancel": CancelToken(), "queue": None
+            }
+        thread = threading.Thread(
+            target=self._run, args=(job, text, chunks, workflow, persist_text),
+            name=f"job-{job['job_id'][:8]}", daemon=True
+        )
+        thread.start()
+
+    def _persist(self, job) -> bool:
+        """Saves progress + heartbeat. Returns False (and stops the job here) if another instance owns it now."""
+        with self._lock:
+            job["heartbeat"] = time.time()
+            snapshot = dict(job, completed_indices=list(job["completed_indices"]), errors=dict(job["errors"]))
+        try:
+            if self.store.put_if_owner(snapshot, self.instance_id):
+                return True
+        except Exception as e:
+            print(f"[Jobs] Persist Error: {e}")
+            return True
+        # 네트워크 단절 등으로 작업을 빼앗긴 이전 소유자: 같은 청크를 두 번 결제하지 않도록 즉시 중단
+        with self._lock:
+            entry = self._running.get(job["job_id"])
+            first = entry is not None and not entry.get("lost")
+            if first:
+                entry["lost"] = True
+        if first:
+            entry["cancel"].cancel()
+            if entry["queue"] is not None:
+                entry["queue"].clear()
+            print(f"[Jobs] Job {job['job_id']} was claimed by another instance; stopping here.")
+        return False
+
+    def _batches(self, chunks: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Groups consecutive chunks into batches within batch_chars / batch_size (singletons when disabled)."""
+        if self.batch_chars <= 0 or self.batch_size <= 1:
+            return [[c] for c in chunks]
+        batches, current, size = [], [], 0
+        for chunk in chunks:
+            length = len(chunk["text"])
+            if current and (size + length > self.batch_chars or len(current) >= self.batch_size):
+                batches.append(current)
+                current, size = [], 0
+            current.append(chunk)
+            size += length
+        if current:
+            batches.append(current)
+        return batches
+
+    def _process(self, workflow, batch: List[Dict[str, Any]], rules: str,
+                 glossary: List[str], namespace: str) -> List[Dict[str, Any]]:
+        if len(batch) == 1:
+            return [workflow.process_chunk(batch[0], global_rules=rules, glossary=glossary, namespace=namespace)]
+        return workflow.process_batch(batch, global_rules=rules, glossary=glossary, namespace=namespace)
+
+    def _prepare_history(self, job, workflow, results: Dict[int, Dict[str, Any]]):
+        """
+        Decides (before the job is saved as done) whether its transcript goes into the history pool.
+        Returns (memory, token) for the background ingestion, or None.
+        """
+        memory = getattr(workflow, "memory", None)
+        if memory is None or not history_enabled():
+            return None
+        if job["errors"] or len(results) < job["total_chunks"]:
+            # 실패한 청크는 원문(또는 빈 구간)으로 남아 있으므로 이력으로 쓰지 않음
+            print(f"[Jobs] Job {job['job_id']}: {len(job['errors'])} failed chunks, history not ingested.")
+            job["history"] = "skipped"
+            return None
+        token = CancelToken()
+        with self._lock:
+            # done이 보이기 전에 등록 (wait_history가 적재 시작 전에 끝나지 않도록)
+            self._ingesting[job["job_id"]] = token
+        job["history"] = "pending"
+        return memory, token
+
+    def _ingest_history(self, job, memory, results: Dict[int, Dict[str, Any]], token: CancelToken):
+        """Stores the finished transcript as history of the job's namespace (never fails the job; own thread)."""
+        job_id = job["job_id"]
+        text = "".join(results[i]["final_text"] for i in range(job["total_chunks"]))
+        governor = self.governor
+        if governor is None:
+            try:
+                from .registry import get_governor
+            except ImportError:
+                from registry import get_governor
+            governor = get_governor()
+        state = "failed"
+        try:
+            # 임베딩 요청도 같은 API 키를 쓰므로 세션 몫의 호출 슬롯을 받아서 실행 (토큰 예산은 채팅 모델용)
+            permit = governor.acquire(0, owner=job["session_id"], should_abort=lambda: token.cancelled)
+            if permit is None:
+                state = "cancelled"
+                return
+            try:
+                with TRACE.stage("history", f"{job_id}/history") as span:
+                    span["segments"] = ingest_meeting(memory, text, job_id, job.get("namespace"))
+            finally:
+                governor.release(permit)
+            state = "done"
+        except Exception as e:
+            print(f"[Jobs] History ingestion failed for {job_id}: {e}")
+        finally:
+            with self._lock:
+                self._ingesting.pop(job_id, None)
+            try:
+                self.store.update(job_id, {"history": state})
+            except Exception as e:
+                print(f"[Jobs] Persist Error: {e}")
+
+    def _run(self, job, text, chunks, workflow, persist_text: bool):
+        job_id = job["job_id"]
+        entry = self._running[job_id]
+        ingest = None
+        try:
+            if persist_text:
+                self.store.create(job, text)
+            workflow = workflow or self._get_workflow()
+            rules = job["rules"]
+            glossary = job.get("glossary") or []
+            namespace = job.get("namespace") or ""
+
+            pending = [c for c in chunks if c["index"] not in entry["results"]]
+            for chunk in pending:
+                # 계측 이벤트를 작업 단위로 묶을 수 있도록 결정적인 청크 ID 사용
+                chunk["id"] = f"{job_id}/{chunk['index']}"
+            job["status"] = "running"
+            self._persist(job)
+            print(f"[Jobs] Job {job_id}: {len(pending)} / {len(chunks)} chunks pending with {self.max_workers} workers.")
+
+            token = entry["cancel"]
+            work = ChunkQueue(self._batches(pending), focus=job.get("focus", 0))
+            entry["queue"] = work
+            finished: "queue.Queue" = queue.Queue()
+
+            def worker():
+                # LLM 호출은 세션 단위로 전역 동시성을 공평하게 나눠 받음 (governor.py)
+                with cancel_scope(token), owner_scope(job["session_id"]):
+                    while not token.cancelled:
+                        batch = work.pop()
+                        if batch is None:
+                            return
+                        try:
+                            outputs = self._process(workflow, batch, rules, glossary, namespace)
+                        except Exception as exc:
+                            outputs = [exc] * len(batch)
+                        finished.put((batch, outputs))
+
+            last_heartbeat = time.time()
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                # 워커마다 컨텍스트를 복사해 실행 (호출 측 contextvar가 섞이지 않도록)
+                workers = [executor.submit(contextvars.copy_context().run, worker)
+                           for _ in range(min(self.max_workers, len(work)))]
+                while not all(w.done() for w in workers) or not finished.empty():
+                    try:
+                        batch, outputs = finished.get(timeout=CANCEL_CHECK_INTERVAL)
+                    except queue.Empty:
+                        if time.time() - last_heartbeat >= HEARTBEAT_INTERVAL:
+                            # 다른 인스턴스에서 요청한 취소 확인 + 하트비트 (완료가 없어도 주기적으로 갱신)
+                            stored = self.store.get(job_id) or {}
+                            if stored.get("cancel_requested") and not token.cancelled:
+                                self.cancel(job_id)
+                            self._persist(job)
+                            last_heartbeat = time.time()
+                        continue
+                    for chunk, output in zip(batch, outputs):
+                        idx = chunk["index"]
+                        if isinstance(output, Cancelled):
+                            # 취소된 청크는 체크포인트 없이 원문으로 남김
+                            continue
+                        if isinstance(output, Exception):
+                            # 실패한 청크는 체크포인트하지 않음 (원문으로 남고, 이어서 실행하면 다시 시도)
+                            print(f"[Jobs] Chunk {idx} generated an exception: {output}")
+                            with self._lock:
+                                job["errors"][str(idx)] = str(output)
+                            continue
+                        result = {"final_text": output["final_text"], "status": "ok"}
+                        print(f"[Jobs] Finished chunk {idx}")
+
+                        self.store.save_checkpoint(job_id, idx, result)
+                        with self._lock:
+                            entry["results"][idx] = result
+                            job["completed_indices"].append(idx)
+                            job["errors"].pop(str(idx), None)
+                    # 체크포인트 반영 + 하트비트
+                    self._persist(job)
+                    last_heartbeat = time.time()
+
+            if entry.get("lost"):
+                return
+            if token.cancelled:
+                print(f"[Jobs] Job {job_id} cancelled after {len(job['completed_indices'])} / {len(chunks)} chunks.")
+                job["status"] = "cancelled"
+                return
+            ingest = self._prepare_history(job, workflow, entry["results"])
+            job["status"] = "done"
+        except Exception as e:
+            print(f"[Jobs] Job {job_id} failed: {e}")
+            job["status"] = "failed"
+            with self._lock:
+                job["errors"]["job"] = str(e)
+        finally:
+            self._persist(job)
+            with self._lock:
+                # 완료된 작업은 결과를 저장소에서 읽도록 메모리에서 해제
+                self._running.pop(job_id, None)
+        if job["status"] == "done" and ingest is not None:
+            # done을 먼저 저장한 뒤 적재 (사용자는 결과를 바로 받음)
+            memory, token = ingest
+            threading.Thread(
+                target=self._ingest_history, args=(job, memory, entry["results"], token),
+                name=f"history-{job_id[:8]}", daemon=True
+            ).start()
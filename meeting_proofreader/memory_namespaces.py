@@ -0,0 +1,204 @@
+"""
+네임스페이스 메모리 모듈
+기관/위원회별 용어·메타데이터·이력을 따로 저장하고, 검색 시 해당 회의와 관련된 네임스페이스만 조회
+(서로 다른 위원회의 용어집이 한 풀에 섞여 엉뚱한 용어가 검색되던 문제 해결)
+
+- 전역(global): 기존 ./chroma_db/simple_memory.json (모든 회의 공통)
+- 네임스페이스: "기관/위원회"처럼 '/'로 계층을 구분, ./chroma_db/namespaces/<기관>/<위원회>/ 에 각각 저장
+  "서울시의회/행정자치위원회"로 검색하면 행정자치위원회 → 서울시의회 → 전역 순으로 조회
+- 지연 로드: 처음 검색/추가할 때 디스크에서 로드, 유휴 시간이 지나거나 개수 상한을 넘으면 언로드 (LRU)
+  검색 비용과 메모리는 전체 배포가 아니라 활성 네임스페이스의 용어 수에 비례
+
+환경변수:
+- PROOFREADER_MEMORY_IDLE_TTL: 유휴 네임스페이스 언로드 시간(초) (기본 1800)
+- PROOFREADER_MEMORY_MAX_LOADED: 동시에 메모리에 둘 네임스페이스 수 (전역 제외, 기본 32)
+"""
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    from .semantic_layer import SemanticLayer
+except ImportError:
+    from semantic_layer import SemanticLayer
+
+GLOBAL_NAMESPACE = ""
+NAMESPACE_DIR = "namespaces"
+
+# 디렉터리 이름으로 쓸 수 없는 문자 (Windows 포함)
+_UNSAFE = re.compile(r'[<>:"|?*\x00-\x1f]')
+
+
+def normalize_namespace(name: Optional[str]) -> str:
+    """'서울시의회 / 행정자치위원회 ' -> '서울시의회/행정자치위원회'; '' is the global tier."""
+    parts = []
+    for part in (name or "").replace("\\", "/").split("/"):
+        part = " ".join(_UNSAFE.sub("", part).split()).strip(".")[:64]
+        if part:
+            parts.append(part)
+    return "/".join(parts)
+
+
+def namespace_chain(name: Optional[str]) -> List[str]:
+    """Namespaces searched for `name`: most specific first, ending with the global tier."""
+    parts = normalize_namespace(name).split("/")
+    parts = [p for p in parts if p]
+    return ["/".join(parts[:i]) for i in range(len(parts), 0, -1)] + [GLOBAL_NAMESPACE]
+
+
+class NamespacedMemory:
+    """
+    The global SemanticLayer plus one SemanticLayer per namespace directory.
+    Namespace layers are loaded on first use and unloaded when idle for `idle_ttl` seconds
+    or when more than `max_loaded` are resident (least recently used first).
+    Thread-safe: one instance is shared by every session in the process.
+    """
+    def __init__(self, persist_directory: str = "./chroma_db", global_layer: Optional[SemanticLayer] = None,
+                 layer_factory: Optional[Callable[[str], SemanticLayer]] = None,
+                 idle_ttl: float = 1800.0, max_loaded: int = 32):
+        self.persist_directory = persist_directory
+        self.global_layer = global_layer or SemanticLayer(persist_directory=persist_directory)
+        # 네임스페이스 레이어는 전역 레이어의 임베딩 제공자를 공유 (같은 벡터 공간, 클라이언트 재사용)
+        self._factory = layer_factory or (
+            lambda directory: SemanticLayer(persist_directory=directory, embedding_function=self.global_layer.provider)
+        )
+        self.idle_ttl = idle_ttl
+        self.max_loaded = max(1, max_loaded)
+
+        # namespace -> (layer, last_used), 접근 순서로 정렬
+        self._loaded: "OrderedDict[str, tuple]" = OrderedDict()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+        self.loads = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @classmethod
+    def from_env(cls, persist_directory: str = "./chroma_db",
+                 global_layer: Optional[SemanticLayer] = None) -> "NamespacedMemory":
+        return cls(
+            persist_directory=persist_directory,
+            global_layer=global_layer,
+            idle_ttl=float(os.environ.get("PROOFREADER_MEMORY_IDLE_TTL", "1800")),
+            max_loaded=int(os.environ.get("PROOFREADER_MEMORY_MAX_LOADED", "32")),
+        )
+
+    def directory(self, namespace: str) -> str:
+        namespace = normalize_namespace(namespace)
+        if not namespace:
+            return self.persist_directory
+        return os.path.join(self.persist_directory, NAMESPACE_DIR, *namespace.split("/"))
+
+    # --- Internal (self._lock must be held) ---
+    def _expire(self, now: float):
+        if not self.idle_ttl:
+            return
+        while self._loaded:
+            namespace, (_, last_used) = next(iter(self._loaded.items()))
+            if now - last_used <= self.idle_ttl:
+                break
+            del self._loaded[namespace]
+            self.expirations += 1
+            print(f"[Memory] Unloaded idle namespace '{namespace}'")
+
+    def _evict(self):
+        while len(self._loaded) > self.max_loaded:
+            namespace = next(iter(self._loaded))
+            del self._loaded[namespace]
+            self.evictions += 1
+            print(f"[Memory] Evicted namespace '{namespace}' (loaded: {len(self._loaded)})")
+
+    def _touch(self, namespace: str, now: float) -> Optional[SemanticLayer]:
+        entry = self._loaded.get(namespace)
+        if entry is None:
+            return None
+        self._loaded[namespace] = (entry[0], now)
+        self._loaded.move_to_end(namespace)
+        return entry[0]
+
+    # --- Public API ---
+    def layer(self, namespace: Optional[str], create: bool = True) -> Optional[SemanticLayer]:
+        """
+        The SemanticLayer for `namespace` (the global one for ''/None), loading it if needed.
+        With create=False, returns None for a namespace that has nothing saved yet.
+        """
+        namespace = normalize_namespace(namespace)
+        if not namespace:
+            return self.global_layer
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            layer = self._touch(namespace, now)
+            if layer is not None:
+                return layer
+            load_lock = self._load_locks.setdefault(namespace, threading.Lock())
+
+        directory = self.directory(namespace)
+        if not create and not os.path.exists(os.path.join(directory, "simple_memory.json")):
+            return None
+        # 디스크 로드는 전역 락 밖에서 (다른 네임스페이스 검색을 막지 않도록), 같은 네임스페이스는 한 번만
+        with load_lock:
+            with self._lock:
+                layer = self._touch(namespace, time.monotonic())
+            if layer is None:
+                layer = self._factory(directory)
+                with self._lock:
+                    self._loaded[namespace] = (layer, time.monotonic())
+                    self.loads += 1
+                    self._evict()
+        return layer
+
+    def search(self, query: str, namespace: Optional[str] = None, n_results: int = 3) -> Dict[str, List[str]]:
+        """
+        SemanticLayer.search over the namespace chain of `namespace` (specific -> global):
+        the query is embedded once and hits are merged by score (ties favour the more specific namespace).
+        """
+        results = {result_key: [] for result_key in SemanticLayer.RESULT_KEYS.values()}
+        layers = [self.layer(ns, create=False) for ns in namespace_chain(namespace)]
+        layers = [layer for layer in layers if layer is not None and not layer.is_empty()]
+        if not layers:
+            return results
+
+        q_emb = layers[0].embed_query(query)
+        if q_emb is None:
+            # 영벡터로 무작위 결과를 내는 대신 컨텍스트 없이 진행
+            return results
+        hits = {result_key: [] for result_key in results}
+        for layer in layers:
+            for result_key, scored in layer.search_vector(q_emb, n_results).items():
+                hits[result_key] += scored
+        for result_key, scored in hits.items():
+            for _, text in sorted(scored, key=lambda hit: -hit[0]):
+                if text not in results[result_key]:
+                    results[result_key].append(text)
+                if len(results[result_key]) == n_results:
+                    break
+        return results
+
+    def add_terms(self, terms: List[str], namespace: Optional[str] = None):
+        self.layer(namespace).add_terms(terms)
+
+    def add_metadata(self, text: str, namespace: Optional[str] = None, source: str = "user_input"):
+        self.layer(namespace).add_metadata(text, source=source)
+
+    def add_history(self, text: str, meeting_id: str, namespace: Optional[str] = None):
+        self.layer(namespace).add_history(text, meeting_id)
+
+    def add_history_segments(self, texts: List[str], meeting_id: str, namespace: Optional[str] = None) -> int:
+        return self.layer(namespace).add_history_segments(texts, meeting_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._expire(time.monotonic())
+            loaded = {namespace: layer.index_stats()["pools"] for namespace, (layer, _) in self._loaded.items()}
+            return {
+                "loaded": loaded,
+                "max_loaded": self.max_loaded,
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
@@ -0,0 +1,295 @@
+"""
+메트릭 모듈
+Prometheus 텍스트 형식(0.0.4)의 경량 메트릭 레지스트리 + /metrics HTTP 엔드포인트 (외부 의존성 없음)
+
+- 단계별 지연 히스토그램, 청크 처리량, LLM 토큰/호출 수: instrumentation.TRACE 이벤트를 그대로 집계
+  (PROOFREADER_TRACE를 켜지 않아도 메트릭이 켜져 있으면 스팬을 측정, 이벤트 자체는 저장하지 않음)
+- 세션 캐시/파싱 캐시 적중, 작업 큐 깊이, 거버너 대기열, Firestore 쓰기 등:
+  각 리소스가 생성될 때 register_stats()로 stats() 함수를 등록하고, 스크레이프 시점에 값을 읽음
+- 엔드포인트는 Streamlit과 같은 프로세스의 별도 포트에서 데몬 스레드로 동작
+  (Cloud Run에서는 Managed Prometheus 사이드카 등이 localhost:<포트>/metrics 를 수집)
+
+환경변수:
+- PROOFREADER_METRICS_PORT: /metrics 엔드포인트 포트 (미설정 시 비활성)
+- PROOFREADER_METRICS_HOST: 바인드 주소 (기본 0.0.0.0)
+"""
+import math
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from .instrumentation import TRACE
+except ImportError:
+    from instrumentation import TRACE
+
+PREFIX = "proofreader_"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 초 단위: 임베딩/검색(수 ms)부터 재시도가 섞인 LLM 호출(수십 초)까지
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labels)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.labelnames, key)} {_number(v)}" for key, v in values]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # [버킷별 개수(누적 아님), 합계, 개수]
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return entry[2] if entry else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, (list(e[0]), e[1], e[2])) for key, e in self._values.items())
+        lines = self.header()
+        for key, (counts, total, count) in values:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Process-wide metric set. Metrics are created on first use (same name -> same object);
+    `register_stats` adds a callable whose numeric values are read at scrape time.
+    """
+    def __init__(self, prefix: str = PREFIX):
+        self.prefix = prefix
+        self._metrics: Dict[str, _Metric] = {}
+        self._stats: Dict[str, Tuple[Callable[[], Dict[str, Any]], Tuple[str, ...], str]] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, help_text: str, labels: Tuple[str, ...], **kwargs) -> Any:
+        name = self.prefix + name
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, labels, **kwargs)
+            return metric
+
+    def counter(self, name: str, help_text: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self._get(Counter, name, help_text, labels)
+
+    def gauge(self, name: str, help_text: str, labels: Tuple[str, ...] = ()) -> Gauge:
+        return self._get(Gauge, name, help_text, labels)
+
+    def histogram(self, name: str, help_text: str, labels: Tuple[str, ...] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help_text, labels, buckets=buckets)
+
+    def register_stats(self, prefix: str, stats: Callable[[], Dict[str, Any]],
+                       counters: Iterable[str] = (), help_text: str = ""):
+        """
+        Exposes the numeric top-level values of `stats()` as `<prefix>_<key>` gauges, or
+        `<prefix>_<key>_total` counters for keys in `counters`. Nested values and None are skipped.
+        Registering the same prefix again replaces the previous source.
+        """
+        with self._lock:
+            self._stats[prefix] = (stats, tuple(counters), help_text or f"{prefix} stats")
+
+    def unregister_stats(self, prefix: str):
+        with self._lock:
+            self._stats.pop(prefix, None)
+
+    def _render_stats(self) -> List[str]:
+        with self._lock:
+            sources = sorted(self._stats.items())
+        lines = []
+        for prefix, (stats, counters, help_text) in sources:
+            try:
+                values = stats() or {}
+            except Exception as e:
+                print(f"[Metrics] Stats Error ({prefix}): {e}")
+                continue
+            for key, value in values.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                kind = "counter" if key in counters else "gauge"
+                name = f"{self.prefix}{prefix}_{key}"
+                if kind == "counter" and not name.endswith("_total"):
+                    name += "_total"
+                lines += [f"# HELP {name} {help_text}: {key}", f"# TYPE {name} {kind}", f"{name} {_number(value)}"]
+        return lines
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = sorted(self._metrics.items())
+        lines = []
+        for _, metric in metrics:
+            lines += metric.render()
+        lines += self._render_stats()
+        return "\n".join(lines) + "\n"
+
+    # --- Trace events ---
+    def observe_event(self, event: Dict[str, Any]):
+        """Instrumentation listener: folds one TRACE event into the stage/chunk/token metrics."""
+        stage = event.get("stage", "")
+        if "duration_ms" in event:
+            self.histogram("stage_duration_seconds", "Wall time per workflow stage", ("stage",)).observe(
+                event["duration_ms"] / 1000.0, stage=stage)
+        if "error" in event:
+            self.counter("stage_errors_total", "Stage spans that raised", ("stage",)).inc(stage=stage)
+
+        if stage == "chunk":
+            self.counter("chunks_total", "Chunks finished, by verifier status", ("status",)).inc(
+                status=event.get("status", ""))
+            self.counter("chunk_chars_total", "Characters of finished chunks").inc(event.get("chars", 0))
+            if event.get("local_only"):
+                self.counter("local_only_chunks_total", "Chunks finished without an LLM call").inc()
+        elif stage == "route":
+            # 토큰은 단계 스팬에서 집계 (route는 같은 호출의 합계라 중복)
+            self.counter("route_attempts_total", "Routing attempts per model tier", ("model", "escalated")).inc(
+                model=event.get("model", ""), escalated=str(bool(event.get("escalated"))).lower())
+            if event.get("cost_usd"):
+                self.counter("llm_cost_usd_total", "Estimated LLM cost", ("model",)).inc(
+                    event["cost_usd"], model=event.get("model", ""))
+            return
+
+        if event.get("llm_calls"):
+            labels = {"stage": stage, "model": event.get("model", "")}
+            self.counter("llm_calls_total", "LLM requests", ("stage", "model")).inc(event["llm_calls"], **labels)
+            tokens = self.counter("llm_tokens_total", "LLM tokens (cached: input served from the prompt cache)",
+                                  ("stage", "model", "kind"))
+            for kind in ("input", "output", "cached"):
+                tokens.inc(event.get(f"{kind}_tokens", 0), kind=kind, **labels)
+        for field in ("retries", "llm_retries", "hedges"):
+            if event.get(field):
+                self.counter(f"{field}_total", f"{field} reported by stage spans", ("stage",)).inc(
+                    event[field], stage=stage)
+
+
+# 프로세스 전역 레지스트리
+METRICS = MetricsRegistry()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry = METRICS
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/metrics":
+            body, status, content_type = self.registry.render().encode("utf-8"), 200, CONTENT_TYPE
+        elif path == "/healthz":
+            body, status, content_type = b"ok\n", 200, "text/plain"
+        else:
+            body, status, content_type = b"not found\n", 404, "text/plain"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # 스크레이프마다 접근 로그를 남기지 않음
+        pass
+
+
+def start_http_server(port: int, host: str = "0.0.0.0", registry: MetricsRegistry = METRICS) -> ThreadingHTTPServer:
+    """
+    Serves `registry` at http://host:port/metrics on a daemon thread (port 0 picks a free port,
+    see server.server_address) and starts feeding it TRACE events. Call server.shutdown() to stop.
+    """
+    handler = type("MetricsHandler", (_Handler,), {"registry": registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    TRACE.add_listener(registry.observe_event)
+    print(f"[Metrics] Serving /metrics on {host}:{server.server_address[1]}")
+    return server
+
+
+def start_from_env() -> Optional[ThreadingHTTPServer]:
+    """The endpoint configured by PROOFREADER_METRICS_PORT, or None when unset / the port is taken."""
+    port = os.environ.get("PROOFREADER_METRICS_PORT", "").strip()
+    if not port:
+        return None
+    try:
+        return start_http_server(int(port), os.environ.get("PROOFREADER_METRICS_HOST", "0.0.0.0"))
+    except (OSError, ValueError) as e:
+        print(f"[Metrics] Endpoint not started: {e}")
+        return None
@@ -0,0 +1,72 @@
+"""
+업로드 파싱 캐시 모듈
+파일 내용 해시를 키로 정규화된 추출 텍스트와 청크 경계를 보관 (같은 파일 재업로드/재실행 시 파싱·청킹 생략)
+캐시 미스 시 파서의 문단 스트림을 청커가 바로 소비 (파싱과 청킹을 CPU 풀에서 한 번에 처리)
+"""
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+try:
+    from .session_store import SessionStore
+    from .file_parser import iter_normalized_paragraphs
+    from .cpu_pool import run_cpu_bound
+except ImportError:
+    from session_store import SessionStore
+    from file_parser import iter_normalized_paragraphs
+    from cpu_pool import run_cpu_bound
+
+
+def content_key(file_data: bytes, filename: str) -> str:
+    """Cache key: SHA-256 of the file bytes + extension (the parser depends on both)."""
+    digest = hashlib.sha256(file_data).hexdigest()
+    return f"{digest}{Path(filename).suffix.lower()}"
+
+
+def parse_and_chunk(file_data: bytes, filename: str, chunker) -> Tuple[str, List[Tuple[int, int]]]:
+    """
+    Parses and chunks in one streaming pass: chunker.chunk_stream() consumes the normalized paragraph
+    stream, so boundaries are found while the parser is still reading. Returns (normalized_text, boundaries).
+    The text equals extract_text_from_file(...) with \\r\\n normalized, so the boundaries match chunk_text(text).
+    """
+    paragraphs: List[str] = []
+
+    def collect():
+        for paragraph in iter_normalized_paragraphs(file_data, filename):
+            paragraphs.append(paragraph)
+            yield paragraph
+
+    boundaries = [(c["start_char"], c["end_char"]) for c in chunker.chunk_stream(collect())]
+    return "\n".join(paragraphs), boundaries
+
+
+class ParsedUploadCache:
+    """
+    Content-addressed cache of parsed uploads.
+    Backed by a SessionStore, so it shares its byte cap, LRU eviction, compression and hit-rate stats.
+    """
+    def __init__(self, store: SessionStore = None):
+        self.store = store or SessionStore(max_bytes=64 * 1024 * 1024, ttl_seconds=24 * 3600)
+
+    def get_or_parse(self, file_data: bytes, filename: str, chunker) -> Tuple[str, List[Dict[str, Any]], bool]:
+        """
+        Returns (normalized_text, chunks, cache_hit).
+        Chunk boundaries are cached per chunker window size.
+        """
+        key = f"{content_key(file_data, filename)}:{chunker.window_size}"
+
+        entry = self.store.get(key)
+        if entry is not None:
+            text = entry["original_text"]
+            return text, chunker.chunks_from_boundaries(text, entry["boundaries"]), True
+
+        # 줄바꿈 정규화(\r\n → \n)까지 스트림에서 처리된 텍스트와 경계 (CPU 풀에서는 결과만 돌려받음)
+        text, boundaries = run_cpu_bound(parse_and_chunk, file_data, filename, chunker)
+        self.store.put(key, {
+            "original_text": text,
+            "boundaries": boundaries,
+        })
+        return text, chunker.chunks_from_boundaries(text, boundaries), False
+
+    def stats(self) -> Dict[str, Any]:
+        return self.store.stats()
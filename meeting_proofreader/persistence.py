@@ -0,0 +1,328 @@
+"""
+세션 영속화 모듈
+Firestore에 대한 비동기 write-behind 저장 (세션별 병합 + 배치 쓰기 + 대용량 텍스트 분할)
+"""
+import atexit
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+
+try:
+    from .instrumentation import TRACE
+except ImportError:
+    from instrumentation import TRACE
+
+# 압축 후 분할 저장하는 대용량 텍스트 필드
+TEXT_FIELDS = ("original_text", "corrected_text")
+
+# Firestore 문서 한도(1 MiB)보다 충분히 작은 청크 크기
+DEFAULT_CHUNK_BYTES = 512 * 1024
+
+# Firestore 배치 한도는 500 operations
+MAX_BATCH_OPS = 450
+
+
+def pack_text(text: str, chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> List[bytes]:
+    """Compress text and split it into parts that each fit in a Firestore document."""
+    payload = zlib.compress(text.encode("utf-8"), 6)
+    return [payload[i:i + chunk_bytes] for i in range(0, len(payload), chunk_bytes)] or [b""]
+
+
+def unpack_text(parts: List[bytes]) -> str:
+    return zlib.decompress(b"".join(parts)).decode("utf-8")
+
+
+def write_text_parts(doc_ref, field: str, text: str, chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> int:
+    """Writes `text` into `chunks/{field}_{i}` subdocuments of doc_ref. Returns the part count."""
+    parts = pack_text(text, chunk_bytes)
+    for i, part in enumerate(parts):
+        doc_ref.collection("chunks").document(f"{field}_{i}").set({"data": part})
+    return len(parts)
+
+
+def read_text_parts(doc_ref, field: str, count: int) -> str:
+    parts = []
+    for i in range(count):
+        part = doc_ref.collection("chunks").document(f"{field}_{i}").get()
+        if not part.exists:
+            raise ValueError(f"누락된 청크: {doc_ref.path}/{field}_{i}")
+        parts.append(part.to_dict()["data"])
+    return unpack_text(parts)
+
+
+class SessionPersister:
+    """
+    Write-behind persister for session documents.
+    `submit()` only records the latest state per session and returns immediately;
+    a background thread coalesces pending updates and flushes them with batched writes.
+    Text fields are compressed and split into `chunks` subdocuments so long meetings
+    never hit the 1 MiB document limit.
+    """
+    def __init__(self, db, collection: str = "meeting_sessions", flush_interval: float = 1.0,
+                 chunk_bytes: int = DEFAULT_CHUNK_BYTES, max_batch_ops: int = MAX_BATCH_OPS):
+        self.db = db
+        self.collection = collection
+        self.flush_interval = flush_interval
+        self.chunk_bytes = chunk_bytes
+        self.max_batch_ops = max_batch_ops
+
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._idle = threading.Condition(self._lock)
+        self._writing: Dict[str, Dict[str, Any]] = {}
+        self._stopped = False
+        # 세션별로 저장된 메인 문서가 참조하는 청크 수 (백그라운드 스레드 전용)
+        self._stored_chunks: Dict[str, Dict[str, int]] = {}
+
+        self.writes = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.last_flush_seconds = 0.0
+
+        self._thread = threading.Thread(target=self._run, name="session-persister", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # --- Public API ---
+    def submit(self, session_id: str, data: Dict[str, Any]):
+        """Queue the latest state of a session (non-blocking)."""
+        with self._lock:
+            if session_id in self._pending:
+                self.coalesced += 1
+            self._pending[session_id] = dict(data)
+        self._wakeup.set()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every queued update has been written. Returns False on timeout."""
+        self._wakeup.set()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while self._pending or self._writing:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(remaining if remaining is not None else 0.5)
+        return True
+
+    def close(self):
+        if self._stopped:
+            return
+        self.flush(timeout=10)
+        self._stopped = True
+        self._wakeup.set()
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Read a session document and reassemble chunked text fields."""
+        # 아직 쓰이지 않은 최신 상태가 있으면 그것을 우선 반환
+        with self._lock:
+            for queued in (self._pending, self._writing):
+                if session_id in queued:
+                    return dict(queued[session_id])
+
+        doc_ref = self.db.collection(self.collection).document(session_id)
+        doc = doc_ref.get()
+        if not doc.exists:
+            return None
+        data = doc.to_dict()
+
+        chunk_counts = data.pop("_text_chunks", None)
+        if chunk_counts:
+            for field, count in chunk_counts.items():
+                data[field] = read_text_parts(doc_ref, field, count)
+        return data
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "writes": self.writes,
+                "coalesced": self.coalesced,
+                "errors": self.errors,
+                "last_flush_seconds": self.last_flush_seconds,
+            }
+
+    # --- Background Writer ---
+    def _split(self, data: Dict[str, Any]):
+        """Returns (main_document, {field: [chunk_bytes, ...]})"""
+        main = {}
+        chunks = {}
+        for key, value in data.items():
+            if key in TEXT_FIELDS and isinstance(value, str):
+                chunks[key] = pack_text(value, self.chunk_bytes)
+            else:
+                main[key] = value
+        main["_text_chunks"] = {field: len(parts) for field, parts in chunks.items()}
+        return main, chunks
+
+    def _stored_counts(self, session_id: str, doc_ref) -> Dict[str, int]:
+        """Part counts the stored main document currently references (read once per session, then tracked)."""
+        if session_id not in self._stored_chunks:
+            doc = doc_ref.get()
+            self._stored_chunks[session_id] = (doc.to_dict().get("_text_chunks") or {}) if doc.exists else {}
+        return self._stored_chunks[session_id]
+
+    def _write(self, pending: Dict[str, Dict[str, Any]]):
+        batch = self.db.batch()
+        ops = 0
+        committed: Dict[str, Dict[str, int]] = {}
+        in_batch: Dict[str, Dict[str, int]] = {}
+        try:
+            for session_id, data in pending.items():
+                doc_ref = self.db.collection(self.collection).document(session_id)
+                main, chunks = self._split(data)
+                counts = main["_text_chunks"]
+                previous = self._stored_counts(session_id, doc_ref)
+
+                # 세션 하나의 청크/삭제/메인 문서는 항상 같은 배치에 넣어 원자적으로 반영
+                # (중간에 실패해도 메인 문서가 서로 다른 버전의 청크를 가리키지 않음)
+                stale = [(field, i) for field, count in previous.items() for i in range(counts.get(field, 0), count)]
+                size = sum(len(parts) for parts in chunks.values()) + len(stale) + 1
+                if ops and ops + size > self.max_batch_ops:
+                    batch.commit()
+                    committed.update(in_batch)
+                    batch, ops, in_batch = self.db.batch(), 0, {}
+
+                for field, parts in chunks.items():
+                    for i, part in enumerate(parts):
+                        batch.set(doc_ref.collection("chunks").document(f"{field}_{i}"), {"data": part})
+                # 텍스트가 줄어 더 이상 참조되지 않는 뒤쪽 청크는 삭제
+                for field, i in stale:
+                    batch.delete(doc_ref.collection("chunks").document(f"{field}_{i}"))
+                batch.set(doc_ref, main)
+                ops += size
+                in_batch[session_id] = counts
+            if ops:
+                batch.commit()
+                committed.update(in_batch)
+        finally:
+            # 커밋된 세션만 저장된 청크 수를 갱신 (실패한 세션은 재시도 때 이전 수 기준으로 다시 정리)
+            self._stored_chunks.update(committed)
+
+    def _run(self):
+        while not self._stopped:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+
+            with self._lock:
+                if not self._pending:
+                    continue
+                pending, self._pending = self._pending, {}
+                self._writing = pending
+
+            start = time.perf_counter()
+            try:
+                # 배치 쓰기 지연은 계측/메트릭의 firestore_write 단계로 기록
+                with TRACE.stage("firestore_write") as span:
+                    span["sessions"] = len(pending)
+                    self._write(pending)
+                with self._lock:
+                    self.writes += len(pending)
+            except Exception as e:
+                print(f"[Firestore] Batched Save Error: {e}")
+                # 실패한 세션은 더 새로운 상태가 없을 때만 다시 대기열에 넣음
+                with self._lock:
+                    self.errors += 1
+                    for session_id, data in pending.items():
+                        self._pending.setdefault(session_id, data)
+                time.sleep(self.flush_interval)
+            finally:
+                self.last_flush_seconds = time.perf_counter() - start
+                with self._lock:
+                    self._writing = {}
+                    self._idle.notify_all()
+
+
+# --- In-Memory Fake (Tests / Local Development) ---
+class _FakeSnapshot:
+    def __init__(self, data: Optional[Dict[str, Any]]):
+        self._data = data
+        self.exists = data is not None
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return dict(self._data) if self._data is not None else None
+
+
+class _FakeDocument:
+    def __init__(self, store: Dict[str, Any], path: str):
+        self._store = store
+        self.path = path
+
+    def set(self, data: Dict[str, Any]):
+        self._store[self.path] = dict(data)
+
+    def delete(self):
+        self._store.pop(self.path, None)
+
+    def update(self, fields: Dict[str, Any]):
+        if self.path not in self._store:
+            raise KeyError(f"No document to update: {self.path}")
+        self._store[self.path] = dict(self._store[self.path], **fields)
+
+    def get(self, transaction=None) -> _FakeSnapshot:
+        return _FakeSnapshot(self._store.get(self.path))
+
+    def collection(self, name: str) -> "_FakeCollection":
+        return _FakeCollection(self._store, f"{self.path}/{name}")
+
+
+class _FakeCollection:
+    def __init__(self, store: Dict[str, Any], path: str):
+        self._store = store
+        self.path = path
+
+    def document(self, doc_id: str) -> _FakeDocument:
+        return _FakeDocument(self._store, f"{self.path}/{doc_id}")
+
+
+class _FakeBatch:
+    def __init__(self, client: "InMemoryFirestore"):
+        self._client = client
+        self._ops = []
+
+    def set(self, doc_ref: _FakeDocument, data: Dict[str, Any]):
+        self._ops.append((doc_ref, data))
+
+    def delete(self, doc_ref: _FakeDocument):
+        self._ops.append((doc_ref, None))
+
+    def commit(self):
+        self._client.commits += 1
+        for doc_ref, data in self._ops:
+            if data is None:
+                doc_ref.delete()
+            else:
+                doc_ref.set(data)
+        self._ops = []
+
+
+class _FakeTransaction:
+    """Writes apply immediately; InMemoryFirestore.run_transaction serializes whole transactions."""
+    def set(self, doc_ref: _FakeDocument, data: Dict[str, Any]):
+        doc_ref.set(data)
+
+    def update(self, doc_ref: _FakeDocument, fields: Dict[str, Any]):
+        doc_ref.update(fields)
+
+
+class InMemoryFirestore:
+    """
+    Minimal stand-in for `google.cloud.firestore.Client` covering the calls
+    used by SessionPersister and JobStore (collection/document/set/update/get/delete/batch),
+    plus run_transaction(fn) in place of `firestore.transactional`.
+    """
+    def __init__(self):
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        self.commits = 0
+        self._transaction_lock = threading.Lock()
+
+    def run_transaction(self, fn):
+        with self._transaction_lock:
+            return fn(_FakeTransaction())
+
+    def collection(self, name: str) -> _FakeCollection:
+        return _FakeCollection(self.documents, name)
+
+    def batch(self) -> _FakeBatch:
+        return _FakeBatch(self)
@@ -0,0 +1,55 @@
+"""
+프롬프트 조립 모듈
+프로바이더 측 프롬프트 캐싱(요청 앞부분이 이전 요청과 같으면 재사용, OpenAI는 1024토큰 이상)을 살리기 위해
+메시지를 고정 → 세션 설정 → 청크별 순서로 배치
+
+1. system: 역할/핵심 규칙/출력 형식 (코드에 고정, 모든 세션·청크 공통)
+2. system: 사용자 추가 규칙 + 용어집 (같은 (규칙, 용어집) 설정이면 바이트 단위로 동일)
+3. human: 검색된 컨텍스트, 주변 텍스트, 원본 (청크마다 다름)
+
+캐시 적중률은 응답 usage의 input_token_details.cache_read로 집계 (instrumentation.add_usage → cached_tokens)
+"""
+from typing import Iterable, List, Optional
+
+from langchain_core.messages import SystemMessage
+from langchain_core.prompts import ChatPromptTemplate
+
+try:
+    from .prompts import SESSION_CONTEXT
+except ImportError:
+    from prompts import SESSION_CONTEXT
+
+
+def normalize_rules(rules: Optional[str], default: str = "") -> str:
+    """Canonical rules text: same rules typed or loaded differently render to the same bytes."""
+    lines = (rules or "").replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    text = "\n".join(line.rstrip() for line in lines).strip()
+    return text or default
+
+
+def normalize_glossary(terms: Optional[Iterable[str]]) -> List[str]:
+    """Stripped, de-duplicated, sorted terms (input order must not change the prefix)."""
+    return sorted({t.strip() for t in terms or [] if t and t.strip()})
+
+
+def session_context(rules: Optional[str], glossary: Optional[Iterable[str]] = None,
+                    default_rules: str = "오타를 수정하세요.", rules_header: str = "사용자 추가 규칙") -> str:
+    """The per-(rules, glossary) block that follows the static system prompt."""
+    terms = normalize_glossary(glossary)
+    return SESSION_CONTEXT.format(
+        rules_header=rules_header,
+        rules=normalize_rules(rules, default_rules),
+        glossary=", ".join(terms) if terms else "(없음)",
+    )
+
+
+def build_prompt(static_system: str, human_template: str) -> ChatPromptTemplate:
+    """
+    static_system: fully rendered, never templated (braces in format instructions stay literal).
+    The session block is passed as the `session` variable, the chunk-specific part via `human_template`.
+    """
+    return ChatPromptTemplate.from_messages([
+        SystemMessage(content=static_system),
+        ("system", "{session}"),
+        ("human", human_template),
+    ])
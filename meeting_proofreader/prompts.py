@@ -1,6 +1,7 @@
 """
 프롬프트 정의 모듈
 코드와 분리하여 프롬프트 튜닝을 용이하게 함
+system 프롬프트는 변수 없이 고정 (프롬프트 캐싱을 위해 세션/청크별 내용은 뒤쪽 메시지로, prompt_layout 참고)
 """
 
 CORRECTOR_SYSTEM = """당신은 전문 회의록 교정사입니다. 당신은 모든 응답을 유효한 JSON 형식으로 출력해야 합니다.
@@ -34,12 +35,16 @@ CORRECTOR_SYSTEM = """당신은 전문 회의록 교정사입니다. 당신은 
 
 ## 컨텍스트 활용
 - 제공된 `[Surrounding Text]`는 오직 문맥 파악용입니다. 절대 수정 대상에 포함시키거나 결과에 출력하지 마세요.
-- 컨텍스트에 제공된 이름, 프로젝트명, 전문용어를 반드시 준수하세요.
+- 컨텍스트와 용어집에 제공된 이름, 프로젝트명, 전문용어를 반드시 준수하세요.
+- `Related Past Meetings`는 이전 회의록 발췌입니다. 이름/용어 표기 확인에만 사용하고 내용을 옮겨 쓰지 마세요."""
 
-## 사용자 추가 규칙
+# 세션 설정 블록: 고정 system 프롬프트 바로 뒤, 청크별 내용 앞에 위치 (prompt_layout 참고)
+# 같은 (규칙, 용어집)이면 모든 청크에서 바이트 단위로 동일해야 프롬프트 캐시가 적중함
+SESSION_CONTEXT = """## {rules_header}
 {rules}
 
-{format_instructions}"""
+## 용어집 (이 회의에서 반드시 지켜야 할 표기)
+{glossary}"""
 
 CORRECTOR_HUMAN = """## 컨텍스트
 {context}
@@ -47,6 +52,20 @@ CORRECTOR_HUMAN = """## 컨텍스트
 ## 원본 텍스트 (형식 그대로 유지, 오타만 수정)
 {text}"""
 
+# 배치 모드: 여러 구역을 한 번의 요청으로 교정 (각 항목은 독립적으로 교정, id로 결과 매칭)
+# 고정 system 메시지에 그대로 붙으므로(템플릿 아님) 중괄호를 이스케이프하지 않음
+CORRECTOR_BATCH_FORMAT = """## 출력 형식
+다음 JSON 객체만 출력하세요. 입력의 모든 항목에 대해 같은 id로 하나씩 결과를 작성합니다.
+{"results": [{"id": "<입력 id>", "corrected_text": "<교정된 text>", "changes_made": ["<변경 내용>"]}]}
+- 각 항목의 text만 교정하세요. 항목끼리 내용을 합치거나 옮기지 마세요.
+- 각 corrected_text의 줄바꿈 위치는 해당 text와 100% 동일해야 합니다."""
+
+CORRECTOR_BATCH_HUMAN = """## 컨텍스트
+{context}
+
+## 원본 텍스트 목록 (JSON, 항목별로 형식 그대로 유지, 오타만 수정)
+{items}"""
+
 
 VERIFIER_SYSTEM = """당신은 교정사를 감독하는 시니어 편집자입니다. 당신은 모든 응답을 유효한 JSON 형식으로 출력해야 합니다.
 
@@ -63,12 +82,7 @@ VERIFIER_SYSTEM = """당신은 교정사를 감독하는 시니어 편집자입
 ## final_text 작성 방법
 - ACCEPT: 수정안을 그대로 복사
 - REJECT: 원본을 그대로 복사
-- MODIFY: 최소한의 수정만 적용
-
-## 사용자 추가 규칙 (참고용)
-{rules}
-
-{format_instructions}"""
+- MODIFY: 최소한의 수정만 적용"""
 
 VERIFIER_HUMAN = """## 원본 텍스트
 {original}
@@ -0,0 +1,194 @@
+"""
+공유 리소스 레지스트리 모듈
+세션마다 새로 만들던 HTTP 연결 풀, OpenAI/ChatOpenAI 클라이언트, 의미 계층, 컴파일된 LangGraph를
+프로세스 전체에서 한 번만 생성해 공유
+
+환경변수:
+- PROOFREADER_HTTP_MAX_CONNECTIONS: OpenAI API 동시 연결 상한 (기본 32)
+- PROOFREADER_HTTP_KEEPALIVE: 유휴 keep-alive 연결 수 (기본 16)
+- PROOFREADER_HTTP_KEEPALIVE_EXPIRY: 유휴 연결 유지 시간(초) (기본 60)
+"""
+import os
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+_instances: Dict[Hashable, Any] = {}
+_key_locks: Dict[Hashable, threading.Lock] = {}
+_lock = threading.Lock()
+
+
+def _shared(key: Hashable, factory: Callable[[], Any]) -> Any:
+    """
+    Returns the process-wide instance for `key`, creating it once.
+    Each key has its own lock, so a slow factory (e.g. the background warm-up building the
+    workflow) never blocks unrelated lookups. A factory result of None is cached too.
+    """
+    if key in _instances:
+        return _instances[key]
+    with _lock:
+        key_lock = _key_locks.setdefault(key, threading.Lock())
+    with key_lock:
+        if key not in _instances:
+            _instances[key] = factory()
+    return _instances[key]
+
+
+def get_http_client():
+    """Shared httpx client: one keep-alive connection pool for every OpenAI call in the process."""
+    def create():
+        import httpx
+        limits = httpx.Limits(
+            max_connections=int(os.environ.get("PROOFREADER_HTTP_MAX_CONNECTIONS", "32")),
+            max_keepalive_connections=int(os.environ.get("PROOFREADER_HTTP_KEEPALIVE", "16")),
+            keepalive_expiry=float(os.environ.get("PROOFREADER_HTTP_KEEPALIVE_EXPIRY", "60")),
+        )
+        print(f"[Registry] HTTP pool: {limits}")
+        return httpx.Client(limits=limits, timeout=httpx.Timeout(60.0, connect=10.0))
+    return _shared("http_client", create)
+
+
+def get_openai_client():
+    """Shared OpenAI SDK client (embeddings) on the pooled HTTP client."""
+    def create():
+        from openai import OpenAI
+        return OpenAI(api_key=os.environ.get("OPENAI_API_KEY"), http_client=get_http_client())
+    return _shared("openai_client", create)
+
+
+def get_chat_model(model_name: str = "gpt-4o-mini"):
+    """Shared ChatOpenAI per model name (thread-safe; holds no per-request state)."""
+    def create():
+        from langchain_openai import ChatOpenAI
+        api_key = os.environ.get("OPENAI_API_KEY")
+        if not api_key:
+            print("[Warning] OPENAI_API_KEY missing in Agents.")
+        # gpt-4o-mini의 경우 JSON 모드를 명시하면 더 안정적임
+        # 재시도/마감 시간은 call_policy.CallPolicy가 담당하므로 SDK 자체 재시도는 끔
+        return ChatOpenAI(
+            model=model_name,
+            temperature=0,
+            openai_api_key=api_key,
+            model_kwargs={"response_format": {"type": "json_object"}},
+            request_timeout=float(os.environ.get("PROOFREADER_LLM_ATTEMPT_TIMEOUT", "60")),
+            max_retries=0,
+            http_client=get_http_client(),
+        )
+    return _shared(("chat_model", model_name), create)
+
+
+def get_governor():
+    """Process-wide LLM call governor: global concurrency + token budget shared fairly by all sessions."""
+    def create():
+        from .governor import Governor
+        from .metrics import METRICS
+        governor = Governor.from_env()
+        METRICS.register_stats("governor", governor.stats, counters=("granted_total",),
+                               help_text="LLM call governor")
+        print(f"[Registry] Governor: {governor.max_concurrency} concurrent calls, "
+              f"TPM {governor.tokens_per_minute or 'unlimited'}")
+        return governor
+    return _shared("governor", create)
+
+
+def get_firestore_client():
+    """Shared Firestore client, or None when unavailable (memory-only mode)."""
+    def create():
+        try:
+            from google.cloud import firestore
+            # On Cloud Run, this uses default service account.
+            # Locally, it will look for ADC. If it hangs, user might need to set creds.
+            db = firestore.Client()
+            print("[System] Firestore Client Initialized.")
+            return db
+        except Exception as e:
+            print(f"[System] Firestore Init Failed (Using Memory Only): {e}")
+            return None
+    return _shared("firestore_client", create)
+
+
+def get_semantic_layer(persist_directory: str = "./chroma_db"):
+    """One SemanticLayer per memory directory, so the JSON store is loaded once per process."""
+    def create():
+        from .semantic_layer import SemanticLayer
+        return SemanticLayer(persist_directory=persist_directory)
+    return _shared(("semantic_layer", os.path.abspath(persist_directory)), create)
+
+
+def get_memory(persist_directory: str = "./chroma_db"):
+    """Namespaced memory (per organisation/committee + the global layer) for a memory directory."""
+    def create():
+        from .memory_namespaces import NamespacedMemory
+        from .metrics import METRICS
+        memory = NamespacedMemory.from_env(persist_directory, global_layer=get_semantic_layer(persist_directory))
+
+        def stats():
+            stats = memory.stats()
+            pools = memory.global_layer.index_stats()["pools"]
+            stats["loaded_namespaces"] = len(stats.pop("loaded"))
+            stats["global_rows"] = sum(pool["rows"] for pool in pools.values())
+            stats["global_resident_bytes"] = sum(pool["resident_bytes"] for pool in pools.values())
+            return stats
+        METRICS.register_stats("memory", stats, counters=("loads", "evictions", "expirations"),
+                               help_text="Semantic memory")
+        return memory
+    return _shared(("memory", os.path.abspath(persist_directory)), create)
+
+
+def get_corrections(persist_directory: str = "./chroma_db", namespace: str = ""):
+    """
+    Learned correction table for one namespace of a memory directory ('' = global),
+    None if PROOFREADER_CORRECTIONS=0. Saved at exit; metrics sum over every loaded namespace.
+    """
+    from .memory_namespaces import normalize_namespace
+    namespace = normalize_namespace(namespace)
+    directory = os.path.abspath(persist_directory)
+    tables = _shared(("correction_tables", directory), dict)
+
+    def create():
+        import atexit
+        from .corrections import CorrectionTable
+        from .metrics import METRICS
+        table = CorrectionTable.from_env(persist_directory, namespace)
+        if table is None:
+            return None
+        atexit.register(table.save)
+        with _lock:
+            tables[namespace] = table
+
+        def stats():
+            with _lock:
+                loaded = list(tables.values())
+            totals = {"namespaces": len(loaded)}
+            for each in loaded:
+                for key, value in each.stats().items():
+                    totals[key] = totals.get(key, 0) + value
+            return totals
+        METRICS.register_stats("corrections", stats, counters=("recompiles",), help_text="Learned correction tables")
+        return table
+    return _shared(("corrections", directory, namespace), create)
+
+
+def get_workflow(persist_directory: str = "./chroma_db", models: Optional[Tuple[str, ...]] = None):
+    """Shared ProofreadingWorkflow with its LangGraph compiled once (models: routing tiers, cheapest first)."""
+    from .routing import model_tiers_from_env
+    models = tuple(models or model_tiers_from_env())
+
+    def create():
+        from .agents import ProofreaderAgents
+        from .graph import ProofreadingWorkflow
+        return ProofreadingWorkflow(
+            persist_directory=persist_directory,
+            tiers=[ProofreaderAgents(model_name=m) for m in models],
+            semantic_layer=get_semantic_layer(persist_directory),
+            memory=get_memory(persist_directory),
+        )
+    return _shared(("workflow", os.path.abspath(persist_directory), models), create)
+
+
+def clear():
+    """Drops every shared instance (tests / config reload). Closes the HTTP pool."""
+    with _lock:
+        client = _instances.pop("http_client", None)
+        _instances.clear()
+    if client is not None:
+        client.close()
@@ -0,0 +1,86 @@
+"""
+모델 티어 라우팅 모듈
+청크를 가장 저렴한(빠른) 모델로 먼저 처리하고, 검증 결과가 불확실할 때만 상위 모델로 승급
+
+승급 조건: 검증 MODIFY/ERROR, 교정 단계 CER 가드 발동, 교정 단계 오류
+
+환경변수:
+- PROOFREADER_MODEL_TIERS: 쉼표로 구분한 모델 목록, 저렴한 순 (기본: gpt-4o-mini → 단일 티어, 승급 없음)
+  예) PROOFREADER_MODEL_TIERS=gpt-4.1-nano,gpt-4o-mini,gpt-4o
+"""
+import os
+from typing import Any, Dict, List, Optional
+
+try:
+    from .instrumentation import _percentile, cache_ratio
+except ImportError:
+    from instrumentation import _percentile, cache_ratio
+
+DEFAULT_TIERS = ["gpt-4o-mini"]
+
+# USD per 1M tokens (input, output) - 비용 추정용, 실제 청구액과 다를 수 있음
+MODEL_PRICES = {
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4o": (2.50, 10.00),
+}
+
+
+def model_tiers_from_env() -> List[str]:
+    raw = os.environ.get("PROOFREADER_MODEL_TIERS", "")
+    tiers = [m.strip() for m in raw.split(",") if m.strip()]
+    return tiers or list(DEFAULT_TIERS)
+
+
+# 프롬프트 캐시에서 읽은 입력 토큰의 단가 배율 (OpenAI 기준 50% 할인)
+CACHED_INPUT_DISCOUNT = 0.5
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int, cached_tokens: int = 0) -> Optional[float]:
+    """Estimated USD cost (cached input tokens at the discounted rate), or None for unknown models."""
+    price = MODEL_PRICES.get(model)
+    if price is None:
+        return None
+    billed_input = input_tokens - cached_tokens + cached_tokens * CACHED_INPUT_DISCOUNT
+    return (billed_input * price[0] + output_tokens * price[1]) / 1_000_000
+
+
+def escalation_reason(state: Dict[str, Any]) -> Optional[str]:
+    """Why a tier's result is uncertain enough to retry on a stronger model (None = keep it)."""
+    if state.get("correct_error"):
+        return "corrector_error"
+    if state.get("cer_guard"):
+        return "cer_guard"
+    status = (state.get("verification_result") or {}).get("status")
+    if status in ("MODIFY", "ERROR"):
+        return status.lower()
+    return None
+
+
+def routing_summary(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Per-model aggregate of 'route' trace events: attempts, escalations, latency, tokens, cache ratio, cost."""
+    by_model: Dict[str, List[Dict[str, Any]]] = {}
+    for event in events:
+        if event.get("stage") == "route":
+            by_model.setdefault(f"{event['tier']}:{event['model']}", []).append(event)
+
+    rows = []
+    for key, attempts in sorted(by_model.items()):
+        durations = sorted(e.get("duration_ms", 0.0) for e in attempts)
+        costs = [e["cost_usd"] for e in attempts if e.get("cost_usd") is not None]
+        input_tokens = sum(e.get("input_tokens", 0) for e in attempts)
+        rows.append({
+            "tier": key,
+            "attempts": len(attempts),
+            "escalated": sum(1 for e in attempts if e.get("escalated")),
+            "mean_ms": round(sum(durations) / len(durations), 1),
+            "p50_ms": round(_percentile(durations, 0.50), 1),
+            "p95_ms": round(_percentile(durations, 0.95), 1),
+            "input_tokens": input_tokens,
+            "output_tokens": sum(e.get("output_tokens", 0) for e in attempts),
+            "cache_ratio": cache_ratio(input_tokens, sum(e.get("cached_tokens", 0) for e in attempts)),
+            "cost_usd": round(sum(costs), 6) if costs else None,
+        })
+    return rows
@@ -1,62 +1,218 @@
 import os
 import json
+import threading
 import numpy as np
-from openai import OpenAI
-from typing import List, Dict, Any
+from typing import Callable, List, Dict, Any, Optional, Tuple
 from dotenv import load_dotenv
 
+try:
+    from .embeddings import EmbeddingProvider, CallableEmbeddingProvider, get_embedding_provider
+    from .vector_index import STORAGE_DTYPES, PoolIndex, storage_from_env
+except ImportError:
+    from embeddings import EmbeddingProvider, CallableEmbeddingProvider, get_embedding_provider
+    from vector_index import STORAGE_DTYPES, PoolIndex, storage_from_env
+
 load_dotenv()
 
+POOLS = ("metadata", "terms", "history")
+
+# pool_info가 없는 예전 메모리 파일은 OpenAI text-embedding-3-small로 저장된 것
+LEGACY_PROVIDER = "openai:text-embedding-3-small"
+
+class _Snapshot:
+    """
+    Immutable, versioned view of the memory: the JSON-shaped data (texts and metadata) plus
+    one PoolIndex per pool with vectors. Never mutated after publication; writers build a new one.
+    """
+    __slots__ = ("version", "data", "indexes")
+
+    def __init__(self, version: int, data: Dict[str, Any], indexes: Dict[str, PoolIndex]):
+        self.version = version
+        self.data = data
+        self.indexes = indexes
+
+
+def _empty_data() -> Dict[str, Any]:
+    return {"metadata": [], "terms": [], "history": [], "pool_info": {}}
+
+
 class SemanticLayer:
     """
     Lightweight Semantic Layer using Numpy & JSON.
     Replaces ChromaDB to avoid SQLite/DLL crashes on Windows.
+
+    Embeddings come from a pluggable EmbeddingProvider (see embeddings.py). Each pool records
+    the provider and dimensionality its vectors were made with; pools built with another
+    provider are re-embedded on load instead of being compared across vector spaces.
+
+    Vectors are kept out of the JSON items: each pool has a PoolIndex (see vector_index.py),
+    optionally compressed to float16/int8, and is saved as a float32 .npy next to the JSON.
+
+    Thread safety: searches read the current immutable _Snapshot without locking. Writers
+    (add_*, load, reset) embed outside any lock, then build and publish a new snapshot under
+    a writer lock, so readers never block and never see a half-applied update.
     """
-    def __init__(self, persist_directory: str = "./chroma_db", embedding_function=None):
+    def __init__(self, persist_directory: str = "./chroma_db", embedding_function=None, client=None,
+                 storage_dtype: Optional[str] = None, rescore: Optional[bool] = None):
         # We use the same directory structure but different file
         self.persist_directory = persist_directory if persist_directory else "./chroma_db"
         self.memory_file = os.path.join(self.persist_directory, "simple_memory.json")
         
-        # Data Structure:
+        # Data Structure (JSON):
         # {
-        #   "metadata": [{"text": str, "embedding": List[float]}],
-        #   "terms":    [...],
-        #   "history":  [...]
+        #   "metadata":  [{"text": str, "meta": {...}}],
+        #   "terms":     [...],
+        #   "history":   [...],
+        #   "pool_info": {"terms": {"provider": str, "dim": int, "vectors": "vectors_terms_<ver>.npy"}, ...}
         # }
-        self.data = {"metadata": [], "terms": [], "history": []}
+        # 예전 형식(항목마다 "embedding" 리스트)은 로드 시 .npy로 옮겨 저장
+        self._snapshot = _Snapshot(0, _empty_data(), {})
+        self._write_lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._saved_version = 0
 
-        # Initialize OpenAI Client directly
-        try:
-             api_key = os.environ.get("OPENAI_API_KEY")
-             if not api_key:
-                 print("[SemanticLayer] Warning: OPENAI_API_KEY not found.")
-             self.client = OpenAI(api_key=api_key)
-        except Exception as e:
-             print(f"[SemanticLayer] OpenAI Client Init Failed: {e}")
-             self.client = None
+        # storage_dtype: "float32" | "float16" | "int8", rescore: 압축 저장 시 float32 원본으로 재채점
+        env_dtype, env_rescore = storage_from_env()
+        self.storage_dtype = storage_dtype or env_dtype
+        if self.storage_dtype not in STORAGE_DTYPES:
+            raise ValueError(f"storage_dtype must be one of {STORAGE_DTYPES}, got {self.storage_dtype!r}")
+        self.rescore = env_rescore if rescore is None else rescore
+
+        # embedding_function: EmbeddingProvider 또는 texts -> vectors 호출 가능 객체
+        # client: embeddings.create()를 제공하는 대체 클라이언트 (예: fakes.FakeEmbeddingsClient)
+        if isinstance(embedding_function, EmbeddingProvider):
+            self.provider = embedding_function
+        elif embedding_function is not None:
+            self.provider = CallableEmbeddingProvider(embedding_function)
+        else:
+            self.provider = get_embedding_provider(client=client)
+        rescore_note = " + rescore" if self.rescore and self.storage_dtype != "float32" else ""
+        print(f"[SemanticLayer] Embedding provider: {self.provider.name}, storage: {self.storage_dtype}{rescore_note}")
              
         self.load_memory()
 
-    def _get_embedding(self, text: str) -> List[float]:
-        if not self.client or not text:
-            return [0.0] * 1536
-            
+    @property
+    def data(self) -> Dict[str, Any]:
+        """The current snapshot's data (read-only by convention: writers publish a new dict)."""
+        return self._snapshot.data
+
+    @property
+    def version(self) -> int:
+        return self._snapshot.version
+
+    def index_stats(self) -> Dict[str, Any]:
+        """Rows and resident vector bytes per pool (memory-mapped originals are not counted)."""
+        snapshot = self._snapshot
+        return {
+            "storage": self.storage_dtype,
+            "rescore": self.rescore,
+            "pools": {
+                pool: {"rows": len(index), "resident_bytes": index.resident_bytes()}
+                for pool, index in snapshot.indexes.items()
+            },
+        }
+
+    def _embed(self, texts: List[str]) -> Optional[List[List[float]]]:
+        """Embeds texts with the current provider. Returns None on failure (never zero vectors)."""
         try:
-            text = text.replace("\n", " ")
-            res = self.client.embeddings.create(input=[text], model="text-embedding-3-small")
-            return res.data[0].embedding
+            return self.provider.embed(texts)
         except Exception as e:
-            print(f"[SemanticLayer] Embedding Error: {e}")
-            return [0.0] * 1536
+            print(f"[SemanticLayer] Embedding Error ({self.provider.name}): {e}")
+            return None
+
+    def _get_embedding(self, text: str) -> Optional[List[float]]:
+        if not text:
+            return None
+        vectors = self._embed([text])
+        return vectors[0] if vectors else None
+
+    def _build_index(self, vectors: np.ndarray, file: Optional[str] = None) -> PoolIndex:
+        return PoolIndex.build(vectors, self.storage_dtype, self.rescore, file)
+
+    def _publish(self, data: Dict[str, Any], indexes: Dict[str, PoolIndex]):
+        """Swaps in a new snapshot (call with _write_lock held). A single reference assignment: atomic for readers."""
+        self._snapshot = _Snapshot(self._snapshot.version + 1, data, indexes)
+
+    def _append(self, pool: str, items: List[Dict[str, Any]]) -> bool:
+        # 벡터는 인덱스로, 텍스트/메타데이터만 항목에 남김
+        vectors = np.asarray([item["embedding"] for item in items], dtype=np.float32)
+        items = [{key: value for key, value in item.items() if key != "embedding"} for item in items]
+        while True:
+            current = self._snapshot
+            data, indexes = current.data, current.indexes
+            info = data["pool_info"].get(pool)
+            if data[pool] and info and info["provider"] != self.provider.name:
+                # 재임베딩(네트워크 호출)은 락 밖에서: 그동안 읽기/다른 쓰기가 막히지 않음
+                data, indexes, _ = self._reconciled(data, indexes)
+                if data["pool_info"][pool]["provider"] != self.provider.name:
+                    print(f"[SemanticLayer] '{pool}' is stored with {info['provider']}; not mixing vector spaces.")
+                    return False
+
+            with self._write_lock:
+                if self._snapshot is not current:
+                    continue  # 재임베딩 중에 다른 쓰기가 반영됨: 새 스냅샷 기준으로 다시 시도
+                # 읽는 쪽이 이전 스냅샷을 쓰고 있을 수 있으므로 리스트/인덱스를 새로 만들어 교체 (copy-on-write)
+                data, indexes = dict(data), dict(indexes)
+                data[pool] = data[pool] + items
+                data["pool_info"] = dict(data["pool_info"])
+                data["pool_info"][pool] = {"provider": self.provider.name, "dim": vectors.shape[1]}
+                index = indexes.get(pool)
+                indexes[pool] = index.extend(vectors) if index is not None else self._build_index(vectors)
+                self._publish(data, indexes)
+            return True
+
+    def _reconciled(self, data: Dict[str, Any], indexes: Dict[str, PoolIndex]):
+        """
+        Copies of `data`/`indexes` with pools stored by a different provider, missing their
+        vectors, or containing zero vectors re-embedded. Returns (data, indexes, changed).
+        The inputs are never modified.
+        """
+        data = dict(data)
+        pool_info = dict(data.get("pool_info") or {})
+        data["pool_info"] = pool_info
+        indexes = dict(indexes)
+        changed = False
+        for pool in POOLS:
+            items = data.setdefault(pool, [])
+            if not items:
+                continue
+            index = indexes.get(pool)
+            info = pool_info.get(pool) or {"provider": LEGACY_PROVIDER, "dim": index.dim if index else 0}
+            if index is None or info["provider"] != self.provider.name:
+                stale = np.arange(len(items))
+            else:
+                stale = index.zero_rows()
+            if not len(stale):
+                pool_info[pool] = info
+                continue
+            print(f"[SemanticLayer] Re-embedding {len(stale)} '{pool}' entries ({info['provider']} -> {self.provider.name})")
+            vectors = self._embed([items[i]["text"] for i in stale])
+            if vectors is None:
+                # 다른 벡터 공간과 비교하지 않도록 재임베딩 실패 시 해당 풀은 검색에서 제외
+                pool_info[pool] = info
+                continue
+            if len(stale) == len(items):
+                merged = np.asarray(vectors, dtype=np.float32)
+            else:
+                merged = index.originals().take(np.arange(len(items)))
+                merged[stale] = vectors
+            indexes[pool] = self._build_index(merged)
+            pool_info[pool] = {"provider": self.provider.name, "dim": merged.shape[1]}
+            changed = True
+        return data, indexes, changed
 
     def add_metadata(self, text: str, source: str = "user_input"):
         if not text: return
         emb = self._get_embedding(text)
-        self.data["metadata"].append({
+        if emb is None:
+            print(f"[SemanticLayer] Skipped metadata (no embedding): {text[:20]}...")
+            return
+        if not self._append("metadata", [{
             "text": text,
             "embedding": emb,
             "meta": {"source": source}
-        })
+        }]):
+            return
         print(f"[SemanticLayer] Added metadata: {text[:20]}...")
         self.save_memory()
 
@@ -64,96 +220,241 @@ class SemanticLayer:
         if not terms: return
         print(f"[SemanticLayer] Adding {len(terms)} terms...")
         
-        # Batch addition ? For simplicity, loop. 
-        # OpenAI supports batch input, but let's keep it simple to handle errors per item if needed.
-        # Actually batch is better for speed.
+        # Batch embedding (provider splits large batches itself)
         valid_terms = [t for t in terms if t.strip()]
         if not valid_terms: return
 
-        try:
-            res = self.client.embeddings.create(input=valid_terms, model="text-embedding-3-small")
-            for i, data_item in enumerate(res.data):
-                self.data["terms"].append({
-                    "text": valid_terms[i],
-                    "embedding": data_item.embedding,
-                    "meta": {"type": "glossary"}
-                })
-            print(f"[SemanticLayer] Added {len(valid_terms)} terms.")
-            self.save_memory()
-        except Exception as e:
-            print(f"[SemanticLayer] Batch Embedding Error: {e}")
+        vectors = self._embed(valid_terms)
+        if vectors is None:
+            return
+        if not self._append("terms", [
+            {"text": term, "embedding": vector, "meta": {"type": "glossary"}}
+            for term, vector in zip(valid_terms, vectors)
+        ]):
+            return
+        print(f"[SemanticLayer] Added {len(valid_terms)} terms.")
+        self.save_memory()
 
     def add_history(self, text: str, meeting_id: str):
         if not text: return
         emb = self._get_embedding(text)
-        self.data["history"].append({
+        if emb is None:
+            return
+        if self._append("history", [{
             "text": text,
             "embedding": emb,
             "meta": {"meeting_id": meeting_id}
-        })
+        }]):
+            self.save_memory()
+
+    def add_history_segments(self, texts: List[str], meeting_id: str) -> int:
+        """
+        Bulk add_history for a whole meeting: one embedding batch, one snapshot swap and one save.
+        Returns the number of segments added (0 if the meeting is already stored).
+        """
+        texts = [t for t in texts if t and t.strip()]
+        if not texts:
+            return 0
+        if any(item.get("meta", {}).get("meeting_id") == meeting_id for item in self._snapshot.data["history"]):
+            print(f"[SemanticLayer] History of {meeting_id} already stored; skipped.")
+            return 0
+        vectors = self._embed(texts)
+        if vectors is None:
+            return 0
+        if not self._append("history", [
+            {"text": text, "embedding": vector, "meta": {"meeting_id": meeting_id}}
+            for text, vector in zip(texts, vectors)
+        ]):
+            return 0
+        print(f"[SemanticLayer] Added {len(texts)} history segments ({meeting_id}).")
         self.save_memory()
+        return len(texts)
 
-    def search(self, query: str, n_results=3) -> Dict[str, Any]:
+    # Map our keys to the expected return keys
+    # self.data keys: 'metadata', 'terms', 'history'
+    # return keys: 'relevant_context', 'relevant_terms', 'relevant_history'
+    RESULT_KEYS = {
+        "metadata": "relevant_context",
+        "terms": "relevant_terms",
+        "history": "relevant_history"
+    }
+
+    def is_empty(self) -> bool:
+        return not any(self._snapshot.indexes.values())
+
+    def embed_query(self, query: str) -> Optional[np.ndarray]:
+        """The query vector for search_vector (None if embedding failed)."""
+        q_emb = self._get_embedding(query)
+        return None if q_emb is None else np.asarray(q_emb, dtype=np.float32)
+
+    def search_vector(self, q_emb: np.ndarray, n_results=3) -> Dict[str, List[Tuple[float, str]]]:
         """
-        Returns {'relevant_terms': [], 'relevant_context': [], 'relevant_history': []}
+        Like search(), for an already embedded query, with scores:
+        {'relevant_terms': [(score, text), ...], ...} best first.
         """
-        q_emb = np.array(self._get_embedding(query))
-        results = {}
-        
-        # Map our keys to the expected return keys
-        # self.data keys: 'metadata', 'terms', 'history'
-        # return keys: 'relevant_context', 'relevant_terms', 'relevant_history'
-        key_map = {
-            "metadata": "relevant_context",
-            "terms": "relevant_terms",
-            "history": "relevant_history"
-        }
-        
-        for pool_key, result_key in key_map.items():
-            collection = self.data.get(pool_key, [])
-            if not collection:
-                results[result_key] = []
+        results = {result_key: [] for result_key in self.RESULT_KEYS.values()}
+        # 한 번의 검색은 처음 읽은 스냅샷만 사용 (락 없이, 동시 쓰기와 무관하게 일관된 결과)
+        snapshot = self._snapshot
+        pool_info = snapshot.data.get("pool_info", {})
+        for pool_key, result_key in self.RESULT_KEYS.items():
+            collection = snapshot.data.get(pool_key, [])
+            if not collection or pool_info.get(pool_key, {}).get("provider") != self.provider.name:
                 continue
             
-            # Compute Cosine Similarity
-            # Score = A . B (if normalized)
-            # OpenAI embeddings are normalized to length 1.
-            scores = []
-            for item in collection:
-                v = np.array(item["embedding"])
-                score = np.dot(q_emb, v)
-                scores.append((score, item["text"]))
-            
-            # Sort descending
-            scores.sort(key=lambda x: x[0], reverse=True)
-            
-            # Take top K
-            top_k = [x[1] for x in scores[:n_results]]
-            results[result_key] = top_k
+            index = snapshot.indexes.get(pool_key)
+            if index is None:
+                continue
+            # Cosine similarity = dot product (all providers return unit vectors)
+            top, scores = index.search(q_emb, n_results)
+            results[result_key] = [(float(score), collection[i]["text"]) for i, score in zip(top, scores)]
             
         return results
 
+    def search(self, query: str, n_results=3) -> Dict[str, Any]:
+        """
+        Returns {'relevant_terms': [], 'relevant_context': [], 'relevant_history': []}
+        """
+        results = {result_key: [] for result_key in self.RESULT_KEYS.values()}
+        if self.is_empty():
+            return results
+
+        q_emb = self.embed_query(query)
+        if q_emb is None:
+            # 영벡터로 무작위 결과를 내는 대신 컨텍스트 없이 진행
+            return results
+        return {
+            result_key: [text for _, text in hits]
+            for result_key, hits in self.search_vector(q_emb, n_results).items()
+        }
+
+    def _atomic_write(self, name: str, write: Callable[[str], None]):
+        """Runs write(tmp_path) then renames the temp file over persist_directory/name."""
+        path = os.path.join(self.persist_directory, name)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
     def save_memory(self):
+        """
+        Writes the current snapshot: changed pools to new float32 vectors_<pool>_<version>.npy
+        files, then the JSON that points at them, each via a temp file + rename, so a crash or a
+        concurrent save never leaves a truncated or mismatched pair. Saves are serialized; a save
+        that waited behind another one skips if that one already wrote this version.
+        """
         if not os.path.exists(self.persist_directory):
              os.makedirs(self.persist_directory, exist_ok=True)
-        try:
-            with open(self.memory_file, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, ensure_ascii=False)
-        except Exception as e:
-            print(f"[SemanticLayer] Save Error: {e}")
+        with self._save_lock:
+            snapshot = self._snapshot
+            if snapshot.version == self._saved_version:
+                return
+            written = {}
+            pool_info = {pool: dict(info) for pool, info in snapshot.data["pool_info"].items()}
+            try:
+                for pool, index in snapshot.indexes.items():
+                    file = index.file
+                    if file is None:
+                        file = f"vectors_{pool}_{snapshot.version}.npy"
+                        self._atomic_write(file, index.originals().write)
+                        written[pool] = (index, file)
+                    pool_info.setdefault(pool, {})["vectors"] = file
+
+                def write_json(path):
+                    with open(path, 'w', encoding='utf-8') as f:
+                        json.dump(dict(snapshot.data, pool_info=pool_info), f, ensure_ascii=False)
+
+                self._atomic_write(os.path.basename(self.memory_file), write_json)
+                self._saved_version = snapshot.version
+            except Exception as e:
+                print(f"[SemanticLayer] Save Error: {e}")
+                return
+            self._adopt_saved(written)
+            self._remove_stale_vector_files({info["vectors"] for info in pool_info.values() if "vectors" in info})
+
+    def _adopt_saved(self, written: Dict[str, Any]):
+        """Marks just-saved indexes as saved; compressed pools switch to the memory-mapped originals."""
+        with self._write_lock:
+            current = self._snapshot
+            indexes = dict(current.indexes)
+            swapped = False
+            for pool, (index, file) in written.items():
+                if indexes.get(pool) is not index:
+                    continue  # 저장 중에 새 항목이 추가됨: 다음 저장에서 다시 기록
+                saved = None
+                if index.exact is not None:
+                    saved = np.load(os.path.join(self.persist_directory, file), mmap_mode="r")
+                indexes[pool] = index.with_file(file, saved)
+                swapped = True
+            if swapped:
+                was_saved = current.version == self._saved_version
+                self._publish(current.data, indexes)
+                if was_saved:
+                    self._saved_version = self._snapshot.version
+
+    def _remove_stale_vector_files(self, referenced: set):
+        referenced = referenced | {index.file for index in self._snapshot.indexes.values() if index.file}
+        for name in os.listdir(self.persist_directory):
+            if name.startswith("vectors_") and name.endswith(".npy") and name not in referenced:
+                try:
+                    os.remove(os.path.join(self.persist_directory, name))
+                except OSError:
+                    pass  # Windows: 이전 스냅샷이 아직 메모리 매핑 중이면 다음 저장 때 정리
+
+    def _load_vectors(self, items: List[Dict[str, Any]], info: Optional[Dict[str, Any]]):
+        """Returns (vectors, file) for a loaded pool; (None, None) if its vectors are missing."""
+        file = info.pop("vectors", None) if info else None
+        if file:
+            path = os.path.join(self.persist_directory, file)
+            if os.path.exists(path):
+                vectors = np.load(path, mmap_mode="r")
+                if len(vectors) == len(items):
+                    return vectors, file
+            print(f"[SemanticLayer] Vector file {file} is missing or does not match the items.")
+            return None, None
+        if "embedding" in items[0]:
+            # 예전 형식: 항목 안의 임베딩 리스트
+            vectors = np.asarray([item.pop("embedding") for item in items], dtype=np.float32)
+            return vectors, None
+        return None, None
 
     def load_memory(self):
         if os.path.exists(self.memory_file):
             try:
                 with open(self.memory_file, 'r', encoding='utf-8') as f:
-                    self.data = json.load(f)
+                    loaded = json.load(f)
+                pool_info = loaded.setdefault("pool_info", {})
+                indexes, migrated = {}, False
+                for pool in POOLS:
+                    items = loaded.setdefault(pool, [])
+                    if not items:
+                        continue
+                    vectors, file = self._load_vectors(items, pool_info.get(pool))
+                    if vectors is not None:
+                        indexes[pool] = self._build_index(vectors, file)
+                        migrated = migrated or file is None
                 print(f"[SemanticLayer] Loaded memory from {self.memory_file}")
+                current = self._snapshot
+                data, indexes, changed = self._reconciled(loaded, indexes)
+                with self._write_lock:
+                    if self._snapshot is not current:
+                        # 재임베딩 중에 다른 쓰기가 반영됨: 그 결과를 덮어쓰지 않음
+                        print("[SemanticLayer] Memory changed while loading; kept the newer snapshot.")
+                        return
+                    self._publish(data, indexes)
+                if changed or migrated:
+                    self.save_memory()
+                else:
+                    self._saved_version = self._snapshot.version
             except Exception as e:
                 print(f"[SemanticLayer] Load Error: {e}")
         else:
             print("[SemanticLayer] Initialized new memory.")
 
     def reset_memory(self):
-        self.data = {"metadata": [], "terms": [], "history": []}
+        with self._write_lock:
+            self._publish(_empty_data(), {})
         self.save_memory()
         print("[SemanticLayer] Memory reset.")
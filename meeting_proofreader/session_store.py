@@ -0,0 +1,164 @@
+"""
+세션 저장소 모듈
+서버 메모리에 보관하는 세션 캐시 (용량 상한 + LRU/TTL 만료 + 대용량 텍스트 압축)
+"""
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# 압축/용량 계산 대상이 되는 대용량 텍스트 필드
+TEXT_FIELDS = ("original_text", "corrected_text")
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate in-memory bytes of a field value, including the items of nested lists/tuples/sets/dicts."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item) for item in value)
+    return size
+
+
+class _CompressedText:
+    """zlib으로 압축된 텍스트 (저장 시에만 사용)"""
+    __slots__ = ("payload",)
+
+    def __init__(self, text: str):
+        self.payload = zlib.compress(text.encode("utf-8"), 6)
+
+    def decode(self) -> str:
+        return zlib.decompress(self.payload).decode("utf-8")
+
+    def __len__(self) -> int:
+        return len(self.payload)
+
+
+class SessionStore:
+    """
+    Bounded in-process session cache.
+    - Total size is capped at `max_bytes`; least recently used sessions are evicted first.
+    - Sessions untouched for `ttl_seconds` expire.
+    - Text fields larger than `compress_threshold` bytes are zlib-compressed at rest.
+    Thread-safe: one instance is shared by every Streamlit session in the process.
+    """
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, ttl_seconds: float = 6 * 3600,
+                 compress_threshold: int = 4096):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.compress_threshold = compress_threshold
+
+        # session_id -> (stored_data, size_bytes, last_access)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes_held = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    # --- Encoding ---
+    def _encode(self, data: Dict[str, Any]) -> tuple:
+        stored = {}
+        size = 0
+        for key, value in data.items():
+            if key in TEXT_FIELDS and isinstance(value, str):
+                raw_len = len(value.encode("utf-8"))
+                if raw_len > self.compress_threshold:
+                    value = _CompressedText(value)
+                    size += len(value)
+                else:
+                    size += raw_len
+            else:
+                # 작은 필드(bool, timestamp 등)뿐 아니라 목록/사전(청크 경계, 교정 결과 등)도 내용까지 계산
+                size += estimate_size(value)
+            stored[key] = value
+        return stored, size
+
+    @staticmethod
+    def _decode(stored: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            key: value.decode() if isinstance(value, _CompressedText) else value
+            for key, value in stored.items()
+        }
+
+    # --- Internal (lock must be held) ---
+    def _remove(self, session_id: str):
+        _, size, _ = self._entries.pop(session_id)
+        self._bytes_held -= size
+
+    def _expire(self, now: float):
+        if not self.ttl_seconds:
+            return
+        # OrderedDict는 접근 순서로 정렬되어 있으므로 앞쪽부터 검사
+        while self._entries:
+            session_id, (_, _, last_access) = next(iter(self._entries.items()))
+            if now - last_access <= self.ttl_seconds:
+                break
+            self._remove(session_id)
+            self.expirations += 1
+
+    def _evict(self):
+        while self._bytes_held > self.max_bytes and len(self._entries) > 1:
+            session_id = next(iter(self._entries))
+            self._remove(session_id)
+            self.evictions += 1
+            print(f"[SessionStore] Evicted session {session_id} (held: {self._bytes_held} bytes)")
+
+    # --- Public API ---
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._entries.get(session_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored, size, _ = entry
+            self._entries[session_id] = (stored, size, now)
+            self._entries.move_to_end(session_id)
+            self.hits += 1
+        return self._decode(stored)
+
+    def put(self, session_id: str, data: Dict[str, Any]):
+        # 압축은 락 밖에서 수행 (다른 세션을 막지 않도록)
+        stored, size = self._encode(data)
+        now = time.monotonic()
+        with self._lock:
+            if session_id in self._entries:
+                self._remove(session_id)
+            self._entries[session_id] = (stored, size, now)
+            self._bytes_held += size
+            self._expire(now)
+            self._evict()
+
+    def pop(self, session_id: str) -> None:
+        with self._lock:
+            if session_id in self._entries:
+                self._remove(session_id)
+
+    def __contains__(self, session_id: str) -> bool:
+        with self._lock:
+            return session_id in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes_held": self._bytes_held,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
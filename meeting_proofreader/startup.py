@@ -0,0 +1,194 @@
+"""
+콜드 스타트 모듈
+무거운 백엔드(LangChain/LangGraph/OpenAI/Firestore/임베딩 저장소)를 백그라운드 스레드에서 미리 올려
+로그인 화면이 즉시 뜨도록 하고, 시작 단계별 소요 시간을 기록
+
+환경변수:
+- PROOFREADER_STARTUP_PROFILE=1: 시작 단계/모듈별 import 시간을 로그로 출력
+- PROOFREADER_WARMUP=0: 백그라운드 워밍업 비활성화 (첫 검수 시작 시 로드)
+
+모듈별 import 비용 전체 분석 (CPython -X importtime 결과 집계):
+    python -m meeting_proofreader.startup
+"""
+import importlib
+import os
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+# 첫 화면 렌더링 전에 필요 없는 무거운 모듈 (워밍업 스레드에서 순서대로 import)
+HEAVY_MODULES = [
+    "numpy",
+    "openai",
+    "langchain_core.prompts",
+    "langchain_openai",
+    "langgraph.graph",
+    "google.cloud.firestore",
+]
+
+# app.py가 첫 화면을 그리기 전에 import하는 모듈
+EAGER_MODULES = [
+    "streamlit",
+    "meeting_proofreader.utils.diff_view",
+    "meeting_proofreader.cpu_pool",
+    "meeting_proofreader.instrumentation",
+    "meeting_proofreader.session_store",
+    "meeting_proofreader.startup",
+    "meeting_proofreader.registry",
+]
+
+
+class StartupProfile:
+    """Records named startup phases (wall time since process-level creation) once per process."""
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.origin = time.perf_counter()
+        self.phases: List[Dict[str, object]] = []
+        self._lock = threading.Lock()
+        self._reported = False
+
+    @classmethod
+    def from_env(cls) -> "StartupProfile":
+        flag = os.environ.get("PROOFREADER_STARTUP_PROFILE", "").lower()
+        return cls(enabled=flag not in ("", "0", "false", "no"))
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                self.phases.append({
+                    "phase": name,
+                    "thread": threading.current_thread().name,
+                    "start_ms": round((start - self.origin) * 1000, 1),
+                    "duration_ms": round((end - start) * 1000, 1),
+                })
+
+    def mark(self, name: str):
+        """Records an instant (e.g. 'login page rendered'), only the first time per name."""
+        if not self.enabled or any(p["phase"] == name for p in self.phases):
+            return
+        with self.phase(name):
+            pass
+
+    def report(self, force: bool = False):
+        """Prints the phase table once (or again with force=True)."""
+        if not self.enabled or (self._reported and not force):
+            return
+        self._reported = True
+        with self._lock:
+            phases = sorted(self.phases, key=lambda p: p["start_ms"])
+        print(f"[Startup] {'phase':<48}{'start ms':>9}{'duration ms':>13}  thread")
+        for p in phases:
+            print(f"[Startup] {p['phase']:<48}{p['start_ms']:>9}{p['duration_ms']:>13}  {p['thread']}")
+
+
+STARTUP = StartupProfile.from_env()
+
+_warm_up_thread: Optional[threading.Thread] = None
+_warm_up_lock = threading.Lock()
+
+
+def _warm_up():
+    for module in HEAVY_MODULES:
+        try:
+            with STARTUP.phase(f"import {module}"):
+                importlib.import_module(module)
+        except Exception as e:
+            print(f"[Startup] Warm-up import of {module} failed: {e}")
+
+    try:
+        from .registry import get_firestore_client, get_workflow
+    except ImportError:
+        from registry import get_firestore_client, get_workflow
+    try:
+        with STARTUP.phase("warm-up: firestore client"):
+            get_firestore_client()
+        with STARTUP.phase("warm-up: workflow (LLM client, graph, memory)"):
+            get_workflow()
+    except Exception as e:
+        # 실패해도 첫 검수 시작 시 다시 시도됨
+        print(f"[Startup] Warm-up failed: {e}")
+    STARTUP.report()
+
+
+def start_warm_up() -> Optional[threading.Thread]:
+    """Starts the background warm-up once per process (no-op when PROOFREADER_WARMUP=0)."""
+    global _warm_up_thread
+    if os.environ.get("PROOFREADER_WARMUP", "1").lower() in ("0", "false", "no"):
+        return None
+    with _warm_up_lock:
+        if _warm_up_thread is None:
+            _warm_up_thread = threading.Thread(target=_warm_up, name="warm-up", daemon=True)
+            _warm_up_thread.start()
+    return _warm_up_thread
+
+
+# --- Import-time analysis (python -m meeting_proofreader.startup) ---
+def parse_importtime(stderr: str) -> List[Dict[str, object]]:
+    """Parses `python -X importtime` output into rows of module, self_us, cumulative_us, depth."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            rows.append({
+                "module": name.strip(),
+                "depth": (len(name) - len(name.lstrip())) // 2,
+                "self_us": int(self_us),
+                "cumulative_us": int(cumulative_us),
+            })
+        except ValueError:
+            continue
+    return rows
+
+
+def profile_imports(modules: List[str], cwd: Optional[str] = None) -> List[Dict[str, object]]:
+    """Imports `modules` in a fresh interpreter with -X importtime and returns parsed rows."""
+    code = "\n".join(f"import {m}" for m in modules)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, cwd=cwd,
+    )
+    return parse_importtime(result.stderr)
+
+
+def _print_profile(label: str, rows: List[Dict[str, object]], top: int):
+    total_ms = sum(r["self_us"] for r in rows) / 1000
+    print(f"\n== {label}: {len(rows)} modules, {total_ms:.0f} ms ==")
+    print(f"{'self ms':>9}{'cum ms':>9}  module")
+    for r in sorted(rows, key=lambda r: r["self_us"], reverse=True)[:top]:
+        print(f"{r['self_us'] / 1000:>9.1f}{r['cumulative_us'] / 1000:>9.1f}  {r['module']}")
+
+    by_package: Dict[str, int] = {}
+    for r in rows:
+        package = r["module"].split(".")[0]
+        by_package[package] = by_package.get(package, 0) + r["self_us"]
+    print(f"{'total ms':>9}  top-level package")
+    for package, us in sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)[:top]:
+        print(f"{us / 1000:>9.1f}  {package}")
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Per-module import cost of the app's startup path")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    eager = profile_imports(EAGER_MODULES, cwd=root)
+    _print_profile("before first paint (app.py imports)", eager, args.top)
+    eager_names = {r["module"] for r in eager}
+    lazy = [r for r in profile_imports(EAGER_MODULES + HEAVY_MODULES, cwd=root) if r["module"] not in eager_names]
+    _print_profile("background warm-up (deferred imports)", lazy, args.top)
+
+
+if __name__ == "__main__":
+    main()
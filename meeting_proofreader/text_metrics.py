@@ -0,0 +1,27 @@
+"""
+텍스트 비교 지표 모듈
+CER 계산 등 CPU 연산 전용 함수 (무거운 의존성 없음 → 프로세스 풀 워커에서 가볍게 import 가능)
+"""
+
+
+def levenshtein_distance(s1: str, s2: str) -> int:
+    """Calculates Levenshtein distance between two strings."""
+    if len(s1) < len(s2):
+        return levenshtein_distance(s2, s1)
+    if len(s2) == 0:
+        return len(s1)
+    previous_row = range(len(s2) + 1)
+    for i, c1 in enumerate(s1):
+        current_row = [i + 1]
+        for j, c2 in enumerate(s2):
+            insertions = previous_row[j + 1] + 1
+            deletions = current_row[j] + 1
+            substitutions = previous_row[j] + (c1 != c2)
+            current_row.append(min(insertions, deletions, substitutions))
+        previous_row = current_row
+    return previous_row[-1]
+
+def calculate_cer(s1: str, s2: str) -> float:
+    """Calculates Character Error Rate (CER)."""
+    dist = levenshtein_distance(s1, s2)
+    return dist / max(len(s1), len(s2), 1)
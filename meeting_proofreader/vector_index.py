@@ -0,0 +1,186 @@
+"""
+벡터 인덱스 모듈
+SemanticLayer 풀(메타데이터/용어/이력)별 임베딩 행렬을 압축 저장하고 검색
+
+- float32: 원본 그대로 (기본, 1536차원 기준 항목당 6KB)
+- float16: 절반 크기, 코사인 점수 오차 약 1e-3 (numpy의 float16 변환이 느려 검색은 float32보다 수 배 느림)
+- int8: 벡터별 스케일(max|x| / 127)로 스칼라 양자화, 1/4 크기 (압축 저장 시 권장)
+- 재채점(rescore): 압축 점수로 상위 후보를 넉넉히 뽑은 뒤 float32 원본으로 정확히 다시 계산
+  원본은 디스크의 .npy를 메모리 매핑해서 읽으므로 후보 행만 메모리에 올라옴
+
+환경변수:
+- PROOFREADER_EMBEDDING_DTYPE: "float32" | "float16" | "int8" (기본 float32)
+- PROOFREADER_EMBEDDING_RESCORE: 압축 저장 시 원본 재채점 여부 (기본 1)
+"""
+import os
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+STORAGE_DTYPES = ("float32", "float16", "int8")
+
+# 재채점할 후보 수 = 요청 개수 x RESCORE_CANDIDATES
+RESCORE_CANDIDATES = 4
+# 압축 행렬은 이 행 수 단위로 float32로 풀어서 점수 계산 (1536차원 기준 6MB 버퍼, 캐시에 머무는 크기)
+SCORE_BLOCK_ROWS = 1024
+
+
+def storage_from_env() -> Tuple[str, bool]:
+    """(dtype, rescore) from PROOFREADER_EMBEDDING_DTYPE / PROOFREADER_EMBEDDING_RESCORE."""
+    dtype = os.environ.get("PROOFREADER_EMBEDDING_DTYPE", "float32").strip().lower() or "float32"
+    if dtype not in STORAGE_DTYPES:
+        print(f"[VectorIndex] Unknown PROOFREADER_EMBEDDING_DTYPE '{dtype}', using float32")
+        dtype = "float32"
+    rescore = os.environ.get("PROOFREADER_EMBEDDING_RESCORE", "1").strip().lower() not in ("0", "false", "no", "")
+    return dtype, rescore
+
+
+def _readonly(array: np.ndarray) -> np.ndarray:
+    if array.flags.writeable:
+        array.setflags(write=False)
+    return array
+
+
+def quantize(vectors: np.ndarray, dtype: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Returns (codes, scales). `scales` is only set for int8: row i is approximately codes[i] * scales[i].
+    Works block-wise, so quantizing a memory-mapped matrix never loads it whole as float32.
+    """
+    if dtype == "float32":
+        return np.array(vectors, dtype=np.float32), None
+    if dtype == "float16":
+        return np.asarray(vectors).astype(np.float16), None
+    codes = np.empty(vectors.shape, dtype=np.int8)
+    scales = np.empty(len(vectors), dtype=np.float32)
+    for start in range(0, len(vectors), SCORE_BLOCK_ROWS):
+        block = np.asarray(vectors[start:start + SCORE_BLOCK_ROWS], dtype=np.float32)
+        block_scales = np.abs(block).max(axis=1) / 127.0
+        block_scales[block_scales == 0] = 1.0
+        codes[start:start + len(block)] = np.rint(block / block_scales[:, None])
+        scales[start:start + len(block)] = block_scales
+    return codes, scales
+
+
+class ExactVectors:
+    """
+    Read-only float32 originals, made of parts: the saved .npy (memory-mapped) followed by
+    rows added since the last save (in RAM). Extending returns a new object.
+    """
+    def __init__(self, parts: Sequence[np.ndarray]):
+        self.parts = tuple(_readonly(part) for part in parts if len(part))
+        self._offsets = np.cumsum([0] + [len(part) for part in self.parts])
+
+    def __len__(self) -> int:
+        return int(self._offsets[-1])
+
+    def extend(self, rows: np.ndarray) -> "ExactVectors":
+        return ExactVectors(self.parts + (np.asarray(rows, dtype=np.float32),))
+
+    def take(self, rows: np.ndarray) -> np.ndarray:
+        rows = np.asarray(rows)
+        out = np.empty((len(rows), self.parts[0].shape[1]), dtype=np.float32)
+        part_of = np.searchsorted(self._offsets, rows, side="right") - 1
+        for p in np.unique(part_of):
+            mask = part_of == p
+            out[mask] = self.parts[p][rows[mask] - self._offsets[p]]
+        return out
+
+    def resident_bytes(self) -> int:
+        return sum(part.nbytes for part in self.parts if not isinstance(part, np.memmap))
+
+    def write(self, path: str):
+        """Streams all parts into a float32 .npy at `path`."""
+        total, dim = len(self), self.parts[0].shape[1]
+        out = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=(total, dim))
+        for part, offset in zip(self.parts, self._offsets):
+            out[offset:offset + len(part)] = part
+        out.flush()
+        del out
+
+
+class PoolIndex:
+    """
+    Immutable search index for one pool. `codes` (float32/float16/int8, plus per-row `scales`
+    for int8) are scanned for every query; `exact` keeps the float32 originals of compressed
+    pools for rescoring and persistence. `file` names the saved .npy the vectors came from
+    (None while there are unsaved rows).
+    """
+    __slots__ = ("dtype", "rescore", "codes", "scales", "exact", "file")
+
+    def __init__(self, dtype: str, rescore: bool, codes: np.ndarray, scales: Optional[np.ndarray],
+                 exact: Optional[ExactVectors], file: Optional[str] = None):
+        self.dtype = dtype
+        self.rescore = rescore
+        self.codes = _readonly(codes)
+        self.scales = None if scales is None else _readonly(scales)
+        self.exact = exact
+        self.file = file
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, dtype: str = "float32", rescore: bool = True,
+              file: Optional[str] = None) -> "PoolIndex":
+        """`vectors` may be a memory-mapped float32 matrix; compressed pools keep it as the original."""
+        codes, scales = quantize(vectors, dtype)
+        exact = None if dtype == "float32" else ExactVectors([vectors])
+        return cls(dtype, rescore, codes, scales, exact, file)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @property
+    def dim(self) -> int:
+        return self.codes.shape[1]
+
+    def extend(self, vectors: np.ndarray) -> "PoolIndex":
+        vectors = np.asarray(vectors, dtype=np.float32)
+        codes, scales = quantize(vectors, self.dtype)
+        return PoolIndex(
+            self.dtype, self.rescore,
+            np.concatenate([self.codes, codes]),
+            None if scales is None else np.concatenate([self.scales, scales]),
+            None if self.exact is None else self.exact.extend(vectors),
+        )
+
+    def originals(self) -> ExactVectors:
+        return ExactVectors([self.codes]) if self.exact is None else self.exact
+
+    def with_file(self, file: str, saved: Optional[np.ndarray] = None) -> "PoolIndex":
+        """Same index marked as saved; `saved` (the memory-mapped file) replaces the in-RAM originals."""
+        exact = self.exact if saved is None or self.exact is None else ExactVectors([saved])
+        return PoolIndex(self.dtype, self.rescore, self.codes, self.scales, exact, file)
+
+    def zero_rows(self) -> np.ndarray:
+        return np.flatnonzero(~self.codes.any(axis=1))
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        """Approximate cosine scores (exact for float32); all providers return unit vectors."""
+        if self.dtype == "float32":
+            return self.codes @ query
+        scores = np.empty(len(self.codes), dtype=np.float32)
+        buffer = np.empty((min(SCORE_BLOCK_ROWS, len(self.codes)), self.dim), dtype=np.float32)
+        for start in range(0, len(self.codes), SCORE_BLOCK_ROWS):
+            block = self.codes[start:start + SCORE_BLOCK_ROWS]
+            np.copyto(buffer[:len(block)], block, casting="unsafe")
+            scores[start:start + len(block)] = buffer[:len(block)] @ query
+        if self.scales is not None:
+            scores *= self.scales
+        return scores
+
+    def search(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(row indices, scores) of the top-k rows, best first."""
+        scores = self.scores(query)
+        k = min(k, len(scores))
+        candidates = k
+        if self.rescore and self.exact is not None:
+            candidates = min(len(scores), k * RESCORE_CANDIDATES)
+        top = np.argpartition(-scores, candidates - 1)[:candidates]
+        if candidates > k:
+            scores = self.exact.take(top) @ query
+            order = np.argsort(-scores)[:k]
+            return top[order], scores[order]
+        order = np.argsort(-scores[top])
+        return top[order], scores[top[order]]
+
+    def resident_bytes(self) -> int:
+        size = self.codes.nbytes + (0 if self.scales is None else self.scales.nbytes)
+        return size + (0 if self.exact is None else self.exact.resident_bytes())
@@ -0,0 +1,86 @@
+import threading
+import time
+
+from meeting_proofreader.call_policy import CallPolicy, DeadlineExceeded
+from meeting_proofreader.fakes import server_error
+from meeting_proofreader.governor import Governor
+
+
+class FlakyCall:
+    """Fake LLM call: the first `hang` calls never answer, the next `fail` calls raise a 500, then it answers."""
+    def __init__(self, hang=0, fail=0):
+        self.hang = hang
+        self.fail = fail
+        self.calls = 0
+        self.release = threading.Event()
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+            n = self.calls
+        if n <= self.hang:
+            self.release.wait(5)
+            return "late"
+        if n <= self.hang + self.fail:
+            raise server_error()
+        return "ok"
+
+
+def test_hung_attempt_is_retried_after_attempt_timeout():
+    call = FlakyCall(hang=1)
+    policy = CallPolicy(deadline=5.0, attempt_timeout=0.2, time_scale=0.01)
+    stats = {}
+    start = time.monotonic()
+    try:
+        assert policy.call(call, stats) == "ok"
+    finally:
+        call.release.set()
+    # 마감 시간(5초)을 기다리지 않고 시도 타임아웃 뒤 바로 재시도
+    assert time.monotonic() - start < 1.0
+    assert call.calls == 2
+    assert stats["llm_retries"] == 1
+
+
+def test_transient_server_errors_are_retried():
+    call = FlakyCall(fail=2)
+    stats = {}
+    assert CallPolicy(deadline=5.0, attempt_timeout=1.0, time_scale=0.01).call(call, stats) == "ok"
+    assert call.calls == 3
+    assert stats["llm_retries"] == 2
+
+
+def test_deadline_bounds_hung_attempts():
+    call = FlakyCall(hang=10)
+    policy = CallPolicy(deadline=0.3, attempt_timeout=0.2, max_attempts=10, time_scale=0.01)
+    start = time.monotonic()
+    try:
+        policy.call(call)
+        assert False, "expected DeadlineExceeded"
+    except DeadlineExceeded:
+        pass
+    finally:
+        call.release.set()
+    assert time.monotonic() - start < 1.0
+    assert call.calls == 2
+
+
+def test_admission_wait_is_excluded_from_deadline():
+    governor = Governor(max_concurrency=1)
+    busy = governor.acquire(owner="other")
+    threading.Timer(0.4, governor.release, args=(busy,)).start()
+    call = FlakyCall(fail=1)
+    # 허가 대기(0.4초)가 마감 시간(0.3초)보다 길어도 첫 시도와 재시도 모두 실행됨
+    policy = CallPolicy(deadline=0.3, attempt_timeout=0.2, time_scale=0.01, governor=governor)
+    stats = {}
+    assert policy.call(call, stats) == "ok"
+    assert stats["queue_wait_ms"] >= 300
+    assert call.calls == 2
+
+
+if __name__ == "__main__":
+    test_hung_attempt_is_retried_after_attempt_timeout()
+    test_transient_server_errors_are_retried()
+    test_deadline_bounds_hung_attempts()
+    test_admission_wait_is_excluded_from_deadline()
+    print("OK")
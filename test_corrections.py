@@ -0,0 +1,184 @@
+import os
+import tempfile
+
+from meeting_proofreader import registry
+from meeting_proofreader.corrections import CorrectionTable, extract_edits
+from meeting_proofreader.agents import ProofreaderAgents
+from meeting_proofreader.call_policy import CallPolicy
+from meeting_proofreader.embeddings import HashingEmbeddingProvider
+from meeting_proofreader.fakes import FakeChatModel
+from meeting_proofreader.graph import ProofreadingWorkflow
+from meeting_proofreader.semantic_layer import SemanticLayer
+
+
+def new_table(**kwargs):
+    # 바뀐 규칙을 다음 apply()에서 바로 반영 (지연 컴파일 조건은 test_lazy_recompile에서 따로 확인)
+    return CorrectionTable(recompile_interval=0, **kwargs)
+
+
+def learn(table, times, original="예산 결제 건을 상정합니다", final="예산 결재 건을 상정합니다"):
+    for _ in range(times):
+        table.observe(original, final, "ACCEPT", [])
+
+
+def test_extract_edits():
+    edits = extract_edits("예산 결제 건과 미지금 급이 있습니다", "예산 결재 건과 미지급금이 있습니다")
+    assert [(e.source, e.target) for e in edits] == [("결제", "결재"), ("미지금 급이", "미지급금이")]
+    assert (edits[0].left, edits[0].right) == ("예산", "건과")
+    # 큰 재작성(4단어 이상)은 반복 오타로 학습하지 않음
+    assert extract_edits("가 나 다 라 마", "하 아 자 차 카") == []
+    assert extract_edits("같은 문장", "같은 문장") == []
+
+
+def test_confidence_threshold():
+    table = new_table()
+    learn(table, 2)
+    assert table.rules() == {}
+    assert table.apply("오늘 결제 안건") == ("오늘 결제 안건", [])
+    learn(table, 1)
+    assert table.rules() == {"결제": "결재"}
+    assert table.apply("오늘 결제 안건") == ("오늘 결재 안건", [("결제", "결재")])
+    # 단어 경계에서만 적용
+    assert table.apply("결제금액") == ("결제금액", [])
+
+
+def test_kept_contexts_veto_and_lower_confidence():
+    table = new_table()
+    learn(table, 10)
+    # "카드 결제"는 그대로 유지된 ACCEPT 결과 -> 그 문맥에서는 적용하지 않음
+    table.observe("카드 결제 방식", "카드 결제 방식", "ACCEPT", [])
+    fixed, applied = table.apply("카드 결제 방식과 예산 결제 건")
+    assert fixed == "카드 결제 방식과 예산 결재 건"
+    assert applied == [("결제", "결재")]
+    # 유지된 경우가 쌓이면 확신도가 임계값 아래로 내려가 규칙이 빠짐
+    for _ in range(2):
+        table.observe("카드 결제 방식", "카드 결제 방식", "ACCEPT", [])
+    assert table.confidence("결제", "결재") < 0.9
+    assert table.rules() == {}
+
+
+def test_reject_counter_evidence():
+    table = new_table()
+    learn(table, 3)
+    sent, applied = table.apply("예산 결제 건")
+    table.observe(sent, sent, "REJECT", applied)
+    assert table.patterns["결제"]["rejected"] == {"결재": 1}
+    assert table.rules() == {}
+
+
+def test_local_fixes_do_not_reinforce_themselves():
+    table = new_table()
+    learn(table, 3)
+    sent, applied = table.apply("예산 결제 건을 상정합니다")
+    table.observe(sent, sent, "ACCEPT", applied)
+    entry = table.patterns["결제"]
+    assert entry["targets"] == {"결재": 3}
+    assert entry["confirmed"] == {"결재": 1}
+    # LLM이 로컬 교정을 되돌리면 반대 증거로 기록하고 역방향 규칙은 학습하지 않음
+    table.observe(sent, "예산 결제 건을 상정합니다", "ACCEPT", applied)
+    assert entry["rejected"] == {"결재": 1}
+    assert "결재" not in table.patterns
+
+
+def test_skip_only_previously_accepted_text():
+    table = new_table(local_skip=True)
+    learn(table, 3)
+    text = "예산 결제 건을 상정합니다"
+    # 학습된 단어만 있어도 그대로 통과한 적 없는 텍스트는 LLM을 생략하지 않음
+    assert not table.previously_accepted("예산 건을 상정합니다 결재")
+    sent, applied = table.apply(text)
+    table.observe(sent, sent, "ACCEPT", applied)
+    assert table.previously_accepted(table.apply(text)[0])
+    assert not CorrectionTable(local_skip=False).previously_accepted(sent)
+
+
+def test_persistence_roundtrip():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "corrections.json")
+        table = CorrectionTable(path, local_skip=True)
+        learn(table, 3)
+        table.observe("예산 결재 건", "예산 결재 건", "ACCEPT", [])
+        table.save()
+        loaded = CorrectionTable(path, local_skip=True)
+        assert loaded.rules() == {"결제": "결재"}
+        assert loaded.previously_accepted("예산 결재 건")
+
+
+def test_lazy_recompile_only_when_rules_change():
+    table = CorrectionTable(recompile_changes=2, recompile_interval=3600)
+    learn(table, 2)
+    # 확신 규칙이 생기지 않은 관측은 컴파일을 일으키지 않음
+    table.apply("예산 결제 건")
+    assert table.recompiles == 0
+    learn(table, 1, "위원회 제출 자료", "위원회 제출 자료")
+    table.apply("예산 결제 건")
+    assert table.recompiles == 0
+
+    # 규칙이 생겨도 변경이 recompile_changes만큼 쌓이기 전에는 이전 matcher로 적용
+    learn(table, 1)
+    assert table.stats()["confident"] == 1
+    assert table.apply("예산 결제 건") == ("예산 결제 건", [])
+    learn(table, 3, "미지금 급을 정산", "미지급금을 정산")
+    assert table.apply("예산 결제 건") == ("예산 결재 건", [("결제", "결재")])
+    assert table.recompiles == 1
+    # 같은 규칙을 다시 채택해도 규칙 집합이 그대로면 다시 컴파일하지 않음
+    learn(table, 5)
+    table.apply("예산 결제 건")
+    assert table.recompiles == 1
+
+
+def test_counter_evidence_without_compiled_pattern():
+    table = CorrectionTable(recompile_changes=1000, recompile_interval=3600)
+    learn(table, 3, "미지금 급이 남았습니다", "미지급금이 남았습니다")
+    # 아직 컴파일 전이어도 학습된 원문 구간이 유지되면 반대 증거로 기록 (가장 긴 구간 우선)
+    table.observe("그 미지금 급이 맞습니다", "그 미지금 급이 맞습니다", "ACCEPT", [])
+    assert table.patterns["미지금 급이"]["kept"] == 1
+    assert table.patterns["미지금 급이"]["kept_contexts"] == {"L:그": 1, "R:맞습니다": 1}
+    table.observe("미지금  급이", "미지금  급이", "ACCEPT", [])
+    assert table.patterns["미지금 급이"]["kept"] == 1
+
+
+def make_workflow(directory, **kwargs):
+    agents = ProofreaderAgents(llm=FakeChatModel(latency_kind="constant", latency_ms=0.0), policy=CallPolicy())
+    layer = SemanticLayer(persist_directory=directory, embedding_function=HashingEmbeddingProvider())
+    return ProofreadingWorkflow(persist_directory=directory, agents=agents, semantic_layer=layer, **kwargs)
+
+
+def test_namespaces_do_not_share_corrections():
+    registry.clear()
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            seoul = registry.get_corrections(directory, "서울시의회/예결위")
+            assert registry.get_corrections(directory, " 서울시의회 / 예결위 ") is seoul
+            seoul.recompile_interval = 0
+            learn(seoul, 3)
+            seoul.save()
+            assert os.path.exists(os.path.join(directory, "namespaces", "서울시의회", "예결위", "corrections.json"))
+
+            # 기본 워크플로는 작업의 네임스페이스 교정표만 적용
+            workflow = make_workflow(directory)
+            chunk = {"id": 0, "text": "예산 결제 건"}
+            assert workflow._initial_state(chunk, "", namespace="서울시의회/예결위")["local_text"] == "예산 결재 건"
+            assert workflow._initial_state(chunk, "", namespace="부산시의회")["local_text"] == "예산 결제 건"
+            assert workflow._initial_state(chunk, "")["local_text"] == "예산 결제 건"
+            assert registry.get_corrections(directory, "부산시의회").rules() == {}
+
+            # None은 교정표를 쓰지 않음 (공유 표로 대체되지 않음)
+            disabled = make_workflow(directory, corrections=None)
+            assert disabled._initial_state(chunk, "", namespace="서울시의회/예결위")["local_fixes"] == []
+    finally:
+        registry.clear()
+
+
+if __name__ == "__main__":
+    test_extract_edits()
+    test_confidence_threshold()
+    test_kept_contexts_veto_and_lower_confidence()
+    test_reject_counter_evidence()
+    test_local_fixes_do_not_reinforce_themselves()
+    test_skip_only_previously_accepted_text()
+    test_persistence_roundtrip()
+    test_lazy_recompile_only_when_rules_change()
+    test_counter_evidence_without_compiled_pattern()
+    test_namespaces_do_not_share_corrections()
+    print("OK")
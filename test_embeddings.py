@@ -0,0 +1,78 @@
+import os
+import tempfile
+
+import numpy as np
+
+from meeting_proofreader.embeddings import (
+    CallableEmbeddingProvider, HashingEmbeddingProvider, OpenAIEmbeddingProvider, get_embedding_provider,
+)
+from meeting_proofreader.fakes import FakeEmbeddingsClient
+from meeting_proofreader.semantic_layer import SemanticLayer
+
+TERMS = ["예산결산특별위원회", "미지급금 정산", "행정자치위원회", "추가경정예산안"]
+
+
+class CountingProvider(CallableEmbeddingProvider):
+    """Hashing vectors under another provider name; counts embedded texts."""
+    def __init__(self):
+        self.embedded = 0
+        hashing = HashingEmbeddingProvider(dim=64)
+
+        def embed(texts):
+            self.embedded += len(texts)
+            return hashing.embed(texts)
+        super().__init__(embed, name="counting")
+
+
+def test_hashing_provider_vectors():
+    provider = HashingEmbeddingProvider()
+    vectors = np.asarray(provider.embed(["예산결산특별위원회 개회", "예산결산특별위원회 산회", "카드 결제 방식"]))
+    assert vectors.shape == (3, provider.dim)
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0)
+    assert np.allclose(vectors[0], provider.embed_one("예산결산특별위원회 개회"))
+    # 글자 n-gram이 겹치는 문장이 더 가까움
+    assert vectors[0] @ vectors[1] > vectors[0] @ vectors[2]
+
+
+def test_provider_selection():
+    saved = {key: os.environ.pop(key, None) for key in ("PROOFREADER_EMBEDDINGS", "OPENAI_API_KEY")}
+    try:
+        assert isinstance(get_embedding_provider(), HashingEmbeddingProvider)
+        assert isinstance(get_embedding_provider(client=FakeEmbeddingsClient(dim=8)), OpenAIEmbeddingProvider)
+        os.environ["PROOFREADER_EMBEDDINGS"] = "hashing"
+        assert isinstance(get_embedding_provider(client=FakeEmbeddingsClient(dim=8)), HashingEmbeddingProvider)
+        assert isinstance(get_embedding_provider("openai", client=FakeEmbeddingsClient(dim=8)),
+                          OpenAIEmbeddingProvider)
+    finally:
+        for key, value in saved.items():
+            os.environ.pop(key, None)
+            if value is not None:
+                os.environ[key] = value
+
+
+def test_switching_provider_reembeds_stored_pools():
+    with tempfile.TemporaryDirectory() as directory:
+        layer = SemanticLayer(persist_directory=directory, embedding_function=HashingEmbeddingProvider())
+        layer.add_terms(TERMS)
+        layer.save_memory()
+        assert layer.data["pool_info"]["terms"]["provider"] == HashingEmbeddingProvider().name
+
+        # 다른 제공자로 다시 열면 저장된 용어를 한 번 재임베딩하고, 섞인 벡터 공간으로 비교하지 않음
+        provider = CountingProvider()
+        switched = SemanticLayer(persist_directory=directory, embedding_function=provider)
+        assert provider.embedded == len(TERMS)
+        assert switched.data["pool_info"]["terms"] == {"provider": "callable:counting", "dim": 64}
+        assert switched.search("미지급금 정산 건")["relevant_terms"][0] == "미지급금 정산"
+        switched.save_memory()
+
+        # 같은 제공자로 다시 열면 재임베딩하지 않음
+        provider = CountingProvider()
+        SemanticLayer(persist_directory=directory, embedding_function=provider)
+        assert provider.embedded == 0
+
+
+if __name__ == "__main__":
+    test_hashing_provider_vectors()
+    test_provider_selection()
+    test_switching_provider_reembeds_stored_pools()
+    print("OK")
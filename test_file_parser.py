@@ -0,0 +1,186 @@
+import codecs
+import io
+import random
+import struct
+import zipfile
+import zlib
+
+from meeting_proofreader import file_parser
+from meeting_proofreader.chunker import SlidingWindowChunker
+from meeting_proofreader.file_parser import (
+    HWPTAG_PARA_TEXT, _decode_para_text, _iter_hwp_records, detect_encoding, extract_text_from_file,
+    iter_paragraphs_from_file,
+)
+from meeting_proofreader.parse_cache import ParsedUploadCache, parse_and_chunk
+
+W = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+HP = "http://www.hancom.co.kr/hwpml/2011/paragraph"
+
+
+def docx(body: str) -> bytes:
+    xml = f'<?xml version="1.0" encoding="UTF-8"?><w:document xmlns:w="{W}"><w:body>{body}</w:body></w:document>'
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as archive:
+        archive.writestr("word/document.xml", xml)
+    return buf.getvalue()
+
+
+def hwpx(*sections: str) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as archive:
+        for n, body in enumerate(sections):
+            archive.writestr(f"Contents/section{n}.xml",
+                             f'<?xml version="1.0" encoding="UTF-8"?><hs:sec xmlns:hs="x" xmlns:hp="{HP}">{body}</hs:sec>')
+    return buf.getvalue()
+
+
+def test_docx_tabs_breaks_and_tab_stops():
+    paragraph = ('<w:p><w:pPr><w:tabs><w:tab w:val="left" w:pos="720"/><w:tab w:val="left" w:pos="1440"/></w:tabs>'
+                 '</w:pPr><w:r><w:rPr><w:b/></w:rPr><w:t>위원장</w:t></w:r><w:r><w:tab/><w:t>개회합니다</w:t>'
+                 '<w:br/><w:t xml:space="preserve">다음 안건 </w:t></w:r>'
+                 '<w:r><w:delText>삭제됨</w:delText></w:r></w:p>')
+    # 탭 위치 정의(w:pPr/w:tabs/w:tab)는 글자가 아님
+    assert list(iter_paragraphs_from_file(docx(paragraph), "a.docx")) == ["위원장\t개회합니다\n다음 안건 "]
+
+
+def test_docx_nested_table_paragraphs():
+    cell = '<w:tc><w:p><w:r><w:t>{}</w:t></w:r></w:p></w:tc>'
+    table = f'<w:tbl><w:tr>{cell.format("셀1")}{cell.format("셀2")}</w:tr></w:tbl>'
+    body = f'<w:p><w:r><w:t>앞</w:t></w:r></w:p>{table}<w:p><w:r><w:t>뒤</w:t></w:r></w:p><w:sectPr/>'
+    assert list(iter_paragraphs_from_file(docx(body), "a.docx")) == ["앞", "셀1", "셀2", "뒤"]
+    assert extract_text_from_file(docx(body), "a.docx") == "앞\n셀1\n셀2\n뒤"
+
+
+def test_hwpx_tabs_breaks_nested_and_sections():
+    first = (f'<hp:p><hp:run><hp:t>○위원장<hp:tab/>개회<hp:lineBreak/>합니다</hp:t></hp:run></hp:p>'
+             f'<hp:p><hp:run><hp:tbl><hp:tr><hp:tc><hp:subList><hp:p><hp:run><hp:t>표 안</hp:t></hp:run></hp:p>'
+             f'</hp:subList></hp:tc></hp:tr></hp:tbl><hp:t>표 뒤</hp:t></hp:run></hp:p>')
+    second = '<hp:p><hp:run><hp:t>둘째 구역</hp:t></hp:run></hp:p>'
+    paragraphs = list(iter_paragraphs_from_file(hwpx(first, second), "a.hwpx"))
+    assert paragraphs == ["○위원장\t개회\n합니다", "표 안", "표 뒤", "", "둘째 구역", ""]
+
+
+def test_chunk_stream_matches_chunk_text():
+    rng = random.Random(0)
+    words = ["위원장", "의결", "예산", "심사", "회의", "가", "나"]
+    for window in (40, 100, 1000):
+        chunker = SlidingWindowChunker(window_size=window)
+        for _ in range(30):
+            paragraphs = [" ".join(rng.choice(words) for _ in range(rng.randint(0, 60)))
+                          for _ in range(rng.randint(0, 40))]
+            text = "\n".join(paragraphs)
+            expected = [(c["index"], c["start_char"], c["end_char"], c["text"], c["pre_context"], c["post_context"])
+                        for c in chunker.chunk_text(text)]
+            streamed = [(c["index"], c["start_char"], c["end_char"], c["text"], c["pre_context"], c["post_context"])
+                        for c in chunker.chunk_stream(iter(paragraphs))]
+            assert streamed == expected
+
+
+def test_parse_and_chunk_matches_stored_text():
+    chunker = SlidingWindowChunker(window_size=50)
+    body = "".join(f'<w:p><w:r><w:t xml:space="preserve">{line}</w:t></w:r></w:p>'
+                   for line in ["", "  ", " 1번 안건을 상정합니다.", "", "2번 안건 " * 20, "  ", ""])
+    txt = "첫 줄입니다\r\n\r\n둘째 줄 " * 30 + "\r\n"
+    for data, name in ((docx(body), "a.docx"), (txt.encode("utf-8"), "a.txt")):
+        text, boundaries = parse_and_chunk(data, name, chunker)
+        # 스트림으로 만든 텍스트/경계가 전체 문자열 기준 결과와 같아야 캐시/작업 저장본과 어긋나지 않음
+        assert text == extract_text_from_file(data, name).replace("\r\n", "\n")
+        assert boundaries == [(c["start_char"], c["end_char"]) for c in chunker.chunk_text(text)]
+
+        cached_text, chunks, hit = ParsedUploadCache().get_or_parse(data, name, chunker)
+        assert (cached_text, hit) == (text, False)
+        assert "".join(c["text"] for c in chunks) == text
+
+
+def hwp_record(tag, payload):
+    if len(payload) >= 0xfff:
+        return struct.pack("<II", tag | (0xfff << 20), len(payload)) + payload
+    return struct.pack("<I", tag | (len(payload) << 20)) + payload
+
+
+def hwp_section(records, compressed):
+    body = b"".join(hwp_record(tag, payload) for tag, payload in records)
+    if not compressed:
+        return body
+    deflate = zlib.compressobj(9, zlib.DEFLATED, -15)
+    return deflate.compress(body) + deflate.flush()
+
+
+def test_hwp_records_across_read_blocks():
+    rng = random.Random(1)
+    records = []
+    for i in range(300):
+        if i % 3:
+            records.append((rng.choice([66, 68, 71]), bytes(rng.randrange(256) for _ in range(rng.randint(0, 40)))))
+        else:
+            # 긴 문단은 확장 크기(0xfff + DWORD) 헤더를 사용
+            text = f"{i}번 발언 " * rng.choice([1, 5, 400])
+            records.append((HWPTAG_PARA_TEXT, text.encode("utf-16-le")))
+    expected = [payload for tag, payload in records if tag == HWPTAG_PARA_TEXT]
+    assert any(len(payload) >= 0xfff for payload in expected)
+
+    read_size = file_parser._HWP_READ_SIZE
+    try:
+        # 읽기 블록을 작게 해서 레코드 헤더/본문이 블록 경계에 걸치게 함
+        for block in (7, 1000, read_size):
+            file_parser._HWP_READ_SIZE = block
+            for compressed in (False, True):
+                stream = io.BytesIO(hwp_section(records, compressed))
+                assert [payload for _, payload in _iter_hwp_records(stream, compressed)] == expected
+    finally:
+        file_parser._HWP_READ_SIZE = read_size
+
+
+def test_hwp_para_text_controls():
+    def wide(code, params="\x00" * 7):
+        return code + params
+    text = ("위원장" + wide("\t", "\x10" * 7) + "개회" + wide("\x0b", "\ud800abcdef") + "합니다"
+            + "\x18" + "끝" + "\x1e" + "\x1f" + "\x0d")
+    assert _decode_para_text(text.encode("utf-16-le", errors="surrogatepass")) == "위원장\t개회합니다-끝  "
+    assert _decode_para_text("평문 그대로".encode("utf-16-le")) == "평문 그대로"
+
+
+KOREAN_TXT = "○위원장 김철수 제3차 예산결산특별위원회를 개회하겠습니다.\n(10시 05분 개의)\n" * 50
+
+
+def test_detect_encoding():
+    cases = [
+        (KOREAN_TXT.encode("utf-8"), "utf-8"),
+        (codecs.BOM_UTF8 + KOREAN_TXT.encode("utf-8"), "utf-8-sig"),
+        (KOREAN_TXT.encode("utf-16"), "utf-16"),
+        (codecs.BOM_UTF16_BE + KOREAN_TXT.encode("utf-16-be"), "utf-16"),
+        ("Meeting minutes\n".encode("utf-16-le") * 50, "utf-16-le"),
+        ("Meeting minutes\n".encode("utf-16-be") * 50, "utf-16-be"),
+        (KOREAN_TXT.encode("cp949"), "cp949"),
+        # 완성형(EUC-KR)에 없는 글자가 섞인 CP949
+        (("똠방각하 " + KOREAN_TXT).encode("cp949"), "cp949"),
+        (b"", "utf-8"),
+    ]
+    for data, expected in cases:
+        assert detect_encoding(data) == expected, expected
+    # 샘플 경계에서 잘린 UTF-8 멀티바이트 문자는 UTF-8로 판별
+    data = KOREAN_TXT.encode("utf-8")
+    assert detect_encoding(data, sample_size=100) == "utf-8"
+    assert data[:100].decode("utf-8", errors="ignore") != data[:100].decode("utf-8", errors="replace")
+
+
+def test_txt_roundtrip_in_every_encoding():
+    for encoding in ("utf-8", "utf-8-sig", "utf-16", "cp949"):
+        data = KOREAN_TXT.encode(encoding)
+        assert extract_text_from_file(data, "회의록.txt") == KOREAN_TXT, encoding
+    # 앞부분은 UTF-8처럼 보이지만 뒤에서 깨지면 순차 시도로 폴백
+    mixed = ("a" * 70000).encode("ascii") + KOREAN_TXT.encode("cp949")
+    assert extract_text_from_file(mixed, "a.txt").endswith("(10시 05분 개의)\n")
+
+
+if __name__ == "__main__":
+    test_docx_tabs_breaks_and_tab_stops()
+    test_docx_nested_table_paragraphs()
+    test_hwpx_tabs_breaks_nested_and_sections()
+    test_chunk_stream_matches_chunk_text()
+    test_parse_and_chunk_matches_stored_text()
+    test_hwp_records_across_read_blocks()
+    test_hwp_para_text_controls()
+    test_detect_encoding()
+    test_txt_roundtrip_in_every_encoding()
+    print("OK")
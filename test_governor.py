@@ -0,0 +1,101 @@
+import threading
+import time
+
+from meeting_proofreader.governor import Governor, owner_scope
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_free_slot_goes_to_the_owner_with_fewest_active_calls():
+    governor = Governor(max_concurrency=2)
+    held = [governor.acquire(owner="big-file"), governor.acquire(owner="big-file")]
+    order, permits = [], []
+    lock = threading.Lock()
+
+    def worker(owner):
+        permit = governor.acquire(owner=owner)
+        with lock:
+            order.append(owner)
+            permits.append(permit)
+
+    threads = []
+    # 큰 작업이 먼저 대기열을 채운 뒤 짧은 작업이 들어옴
+    for n, owner in enumerate(["big-file"] * 4 + ["short"]):
+        thread = threading.Thread(target=worker, args=(owner,))
+        thread.start()
+        threads.append(thread)
+        wait_until(lambda: governor.stats()["queued"] == n + 1)
+    assert governor.stats()["queued_by_owner"] == {"big-file": 4, "short": 1}
+
+    governor.release(held[0])
+    wait_until(lambda: len(order) == 1)
+    assert order == ["short"]
+    governor.release(held[1])
+    for n in range(5):
+        wait_until(lambda: len(permits) > n)
+        governor.release(permits[n])
+    for thread in threads:
+        thread.join(timeout=5)
+    assert order == ["short"] + ["big-file"] * 4
+    stats = governor.stats()
+    assert stats["active"] == 0 and stats["queued"] == 0 and stats["granted_total"] == 7
+
+
+def test_token_bucket_charges_estimates_and_settles_actual_usage():
+    governor = Governor(max_concurrency=8, tokens_per_minute=6000)
+    first = governor.acquire(5000, owner="a")
+    # 남은 예산(약 1000)보다 큰 요청은 바로 허가되지 않음
+    assert governor.try_acquire(3000, owner="b") is None
+    assert governor.acquire(3000, owner="b", timeout=0.05) is None
+    # 실제 사용량으로 정산하면 추정치와의 차이만큼 돌려받음
+    governor.release(first, used_tokens=1000)
+    second = governor.try_acquire(3000, owner="b")
+    assert second is not None
+    governor.release(second, used_tokens=3000)
+    assert 2000 <= governor.stats()["tokens_available"] <= 2100
+
+
+def test_request_larger_than_budget_waits_for_a_full_bucket():
+    governor = Governor(tokens_per_minute=60000)
+    # 초당 1000 토큰씩 다시 차므로 1000 토큰 부족분은 약 1초 뒤에 채워짐
+    governor.release(governor.acquire(1000, owner="a"), used_tokens=1000)
+    start = time.monotonic()
+    # 예산(분당 60000)보다 큰 요청도 버킷이 가득 차면 허가 (영원히 막히지 않음)
+    permit = governor.acquire(100000, owner="a", timeout=5)
+    assert permit is not None
+    assert 0.5 < time.monotonic() - start < 3
+    governor.release(permit)
+
+
+def test_queued_request_can_be_aborted_and_owner_comes_from_scope():
+    governor = Governor(max_concurrency=1)
+    busy = governor.acquire(owner="other")
+    aborted = threading.Event()
+    result = []
+
+    def worker():
+        with owner_scope("session-1"):
+            result.append(governor.acquire(should_abort=aborted.is_set, poll=0.01))
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    wait_until(lambda: governor.stats()["queued_by_owner"] == {"session-1": 1})
+    aborted.set()
+    thread.join(timeout=5)
+    assert result == [None]
+    assert governor.stats()["queued"] == 0
+    governor.release(busy)
+    assert governor.stats()["active"] == 0
+
+
+if __name__ == "__main__":
+    test_free_slot_goes_to_the_owner_with_fewest_active_calls()
+    test_token_bucket_charges_estimates_and_settles_actual_usage()
+    test_request_larger_than_budget_waits_for_a_full_bucket()
+    test_queued_request_can_be_aborted_and_owner_comes_from_scope()
+    print("OK")
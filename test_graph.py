@@ -0,0 +1,31 @@
+import tempfile
+
+from meeting_proofreader import graph
+from meeting_proofreader.agents import ProofreaderAgents
+from meeting_proofreader.call_policy import CallPolicy
+from meeting_proofreader.embeddings import HashingEmbeddingProvider
+from meeting_proofreader.fakes import FakeChatModel
+from meeting_proofreader.graph import ProofreadingWorkflow
+from meeting_proofreader.semantic_layer import SemanticLayer
+
+
+def make_workflow(directory):
+    agents = ProofreaderAgents(llm=FakeChatModel(latency_kind="constant", latency_ms=0.0), policy=CallPolicy())
+    layer = SemanticLayer(persist_directory=directory, embedding_function=HashingEmbeddingProvider())
+    return ProofreadingWorkflow(persist_directory=directory, agents=agents, semantic_layer=layer, corrections=None)
+
+
+def test_process_batch_empty_and_larger_than_worker_cap():
+    with tempfile.TemporaryDirectory() as directory:
+        workflow = make_workflow(directory)
+        assert workflow.process_batch([]) == []
+
+        chunks = [{"id": i, "text": f"○위원장 {i}번 안건을 상정합니다."} for i in range(graph.MAX_BATCH_WORKERS + 3)]
+        results = workflow.process_batch(chunks)
+        assert [r["chunk_id"] for r in results] == list(range(len(chunks)))
+        assert all(not isinstance(r, Exception) for r in results)
+
+
+if __name__ == "__main__":
+    test_process_batch_empty_and_larger_than_worker_cap()
+    print("OK")
@@ -0,0 +1,131 @@
+import tempfile
+import time
+
+from pydantic import PrivateAttr
+
+from meeting_proofreader.agents import ProofreaderAgents
+from meeting_proofreader.call_policy import CallPolicy
+from meeting_proofreader.chunker import SlidingWindowChunker
+from meeting_proofreader.corrections import CorrectionTable
+from meeting_proofreader.embeddings import HashingEmbeddingProvider
+from meeting_proofreader.fakes import FakeChatModel
+from meeting_proofreader.governor import Governor
+from meeting_proofreader.graph import ProofreadingWorkflow
+from meeting_proofreader.jobs import JobManager, JobStore
+from meeting_proofreader.persistence import InMemoryFirestore
+from meeting_proofreader.semantic_layer import SemanticLayer
+
+HISTORY_LINE = "\nRelated Past Meetings (for names/terms only"
+PAST_MEETING = ("○위원장 김철수 제3차 예산결산특별위원회를 개회하겠습니다.\n"
+                "○위원장 김철수 오늘은 추경예산 미지급금 정산 건을 심사하겠습니다.\n")
+NEXT_MEETING = ("○위원장 김철수 지난 회의에 이어 미지금 급 정산 건을 심사하겠습니다.\n"
+                "○위원장 김철수 추경에산 질의를 시작하겠습니다.\n")
+
+
+class RecordingChatModel(FakeChatModel):
+    """FakeChatModel that keeps every prompt it received."""
+    _prompts: list = PrivateAttr(default_factory=list)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self._prompts.append("\n".join(str(m.content) for m in messages))
+        return super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+
+def make_manager(directory, batch_chars=0):
+    llm = RecordingChatModel(latency_kind="constant", latency_ms=0.0)
+    agents = ProofreaderAgents(llm=llm, policy=CallPolicy())
+    layer = SemanticLayer(persist_directory=directory, embedding_function=HashingEmbeddingProvider())
+    workflow = ProofreadingWorkflow(persist_directory=directory, agents=agents, semantic_layer=layer,
+                                    corrections=CorrectionTable())
+    manager = JobManager(JobStore(InMemoryFirestore()), SlidingWindowChunker(window_size=60), lambda: workflow,
+                         max_workers=2, batch_chars=batch_chars, governor=Governor())
+    return manager, llm
+
+
+def run_job(manager, text, namespace="서울시의회/예결위"):
+    chunks = manager.chunker.chunk_text(text)
+    job_id = manager.submit("s1", text, chunks, rules="", namespace=namespace)
+    deadline = time.time() + 10
+    while manager.progress(job_id)["status"] not in ("done", "failed", "cancelled"):
+        assert time.time() < deadline
+        time.sleep(0.02)
+    return job_id
+
+
+def test_later_job_prompt_contains_history():
+    for batch_chars in (0, 4000):
+        with tempfile.TemporaryDirectory() as directory:
+            manager, llm = make_manager(directory, batch_chars=batch_chars)
+            first = run_job(manager, PAST_MEETING)
+            assert manager.wait_history(first, timeout=10)
+            assert manager.store.get(first)["history"] == "done"
+
+            del llm._prompts[:]
+            run_job(manager, NEXT_MEETING)
+            corrector_prompts = [p for p in llm._prompts if "## 컨텍스트" in p]
+            assert corrector_prompts
+            if batch_chars:
+                assert any("## 원본 텍스트 목록" in p for p in corrector_prompts)
+            # 이전 회의록 구간이 교정 프롬프트 컨텍스트에 들어감 (단건/배치 모두)
+            assert all(HISTORY_LINE in p and "예산결산특별위원회" in p for p in corrector_prompts)
+
+
+def test_first_job_prompt_has_no_history_section():
+    with tempfile.TemporaryDirectory() as directory:
+        manager, llm = make_manager(directory)
+        run_job(manager, NEXT_MEETING)
+        assert not any(HISTORY_LINE in p for p in llm._prompts)
+
+
+class FailingWorkflow:
+    """Fails chunk 1; counts history ingestion calls on its memory."""
+    def __init__(self, fail=(1,)):
+        self.fail = set(fail)
+        self.memory = self
+        self.ingested = []
+
+    def process_chunk(self, chunk, global_rules="", glossary=None, namespace=""):
+        if chunk["index"] in self.fail:
+            raise RuntimeError("LLM unavailable")
+        return {"final_text": chunk["text"]}
+
+    def add_history_segments(self, texts, meeting_id, namespace=None):
+        self.ingested.append(meeting_id)
+        return len(texts)
+
+
+def test_failed_chunks_skip_history():
+    workflow = FailingWorkflow()
+    manager = JobManager(JobStore(InMemoryFirestore()), SlidingWindowChunker(window_size=60), lambda: workflow,
+                         max_workers=1, batch_chars=0, governor=Governor())
+    job_id = run_job(manager, PAST_MEETING * 3)
+    assert manager.wait_history(job_id, timeout=5)
+    assert manager.store.get(job_id)["history"] == "skipped"
+    assert workflow.ingested == []
+
+
+def test_history_waits_for_governor_and_can_be_cancelled():
+    workflow = FailingWorkflow(fail=())
+    governor = Governor(max_concurrency=1)
+    busy = governor.acquire(owner="other-session")
+    manager = JobManager(JobStore(InMemoryFirestore()), SlidingWindowChunker(window_size=60), lambda: workflow,
+                         max_workers=1, batch_chars=0, governor=governor)
+    job_id = run_job(manager, PAST_MEETING * 3)
+    # 작업은 이력 적재를 기다리지 않고 done으로 저장됨
+    assert manager.store.get(job_id)["status"] == "done"
+    assert not manager.wait_history(job_id, timeout=0.3)
+    assert governor.stats()["queued_by_owner"] == {"s1": 1}
+
+    assert manager.cancel(job_id)
+    assert manager.wait_history(job_id, timeout=5)
+    governor.release(busy)
+    assert manager.store.get(job_id)["history"] == "cancelled"
+    assert workflow.ingested == []
+
+
+if __name__ == "__main__":
+    test_later_job_prompt_contains_history()
+    test_first_job_prompt_has_no_history_section()
+    test_failed_chunks_skip_history()
+    test_history_waits_for_governor_and_can_be_cancelled()
+    print("OK")
@@ -0,0 +1,116 @@
+import threading
+import time
+
+from meeting_proofreader.chunker import SlidingWindowChunker
+from meeting_proofreader.jobs import JobManager, JobStore, STALE_AFTER
+from meeting_proofreader.persistence import InMemoryFirestore
+
+TEXT = "".join(f"{i}번 안건을 상정합니다.\n" for i in range(12))
+
+
+class CountingWorkflow:
+    """Stand-in for ProofreadingWorkflow: rewrites 안건 -> 의안, counts calls, fails chunks in `fail`."""
+    def __init__(self, delay=0.0, fail=()):
+        self.delay = delay
+        self.fail = set(fail)
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def process_chunk(self, chunk, global_rules="", glossary=None, namespace=""):
+        with self._lock:
+            self.calls.append(chunk["index"])
+        time.sleep(self.delay)
+        if chunk["index"] in self.fail:
+            raise RuntimeError("LLM unavailable")
+        return {"final_text": chunk["text"].replace("안건", "의안")}
+
+
+def wait_finished(manager, job_id, timeout=10):
+    # 작업 스레드는 마지막 저장 후 _running에서 빠짐
+    deadline = time.time() + timeout
+    while job_id in manager._running:
+        assert time.time() < deadline
+        time.sleep(0.02)
+
+
+def orphaned_job(store, chunker):
+    """A running job whose owner stopped heartbeating, with no checkpoints."""
+    chunks = chunker.chunk_text(TEXT)
+    job = {
+        "job_id": "job-1", "session_id": "s1", "status": "running", "rules": "", "glossary": [], "namespace": "",
+        "boundaries": [[c["start_char"], c["end_char"]] for c in chunks], "total_chunks": len(chunks),
+        "completed_indices": [], "errors": {}, "owner": "dead-instance",
+        "heartbeat": time.time() - STALE_AFTER - 1, "created_at": time.time(),
+    }
+    store.create(job, TEXT)
+    return job
+
+
+def test_concurrent_attach_resumes_once():
+    store, chunker = JobStore(InMemoryFirestore()), SlidingWindowChunker(window_size=40)
+    job = orphaned_job(store, chunker)
+    workflows = [CountingWorkflow(delay=0.01), CountingWorkflow(delay=0.01)]
+    managers = [JobManager(store, chunker, lambda w=w: w, max_workers=2, batch_chars=0, instance_id=f"i{n}")
+                for n, w in enumerate(workflows)]
+    barrier = threading.Barrier(len(managers))
+
+    def attach(manager):
+        barrier.wait()
+        manager.attach("s1")
+    threads = [threading.Thread(target=attach, args=(m,)) for m in managers]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for manager in managers:
+        wait_finished(manager, "job-1")
+
+    # 정확히 한 인스턴스만 이어서 실행하고, 각 청크는 한 번만 처리됨
+    assert sorted(workflows[0].calls + workflows[1].calls) == list(range(job["total_chunks"]))
+    stored = store.get("job-1")
+    assert stored["status"] == "done"
+    assert stored["owner"] in ("i0", "i1")
+
+
+def test_previous_owner_stops_after_takeover():
+    store, chunker = JobStore(InMemoryFirestore()), SlidingWindowChunker(window_size=40)
+    chunks = chunker.chunk_text(TEXT)
+    workflow = CountingWorkflow(delay=0.05)
+    manager = JobManager(store, chunker, lambda: workflow, max_workers=1, batch_chars=0, instance_id="old")
+    job_id = manager.submit("s1", TEXT, chunks, rules="", workflow=workflow)
+    time.sleep(0.12)
+    # 다른 인스턴스가 작업을 가져감 (이전 소유자는 다음 저장에서 이를 알아채고 중단해야 함)
+    store.update(job_id, {"owner": "new"})
+    deadline = time.time() + 5
+    while job_id in manager._running and time.time() < deadline:
+        time.sleep(0.02)
+    assert job_id not in manager._running
+    assert len(workflow.calls) < len(chunks)
+    assert store.get(job_id)["owner"] == "new"
+    assert store.get(job_id)["status"] == "running"
+
+
+def test_failed_chunks_are_not_checkpointed():
+    store, chunker = JobStore(InMemoryFirestore()), SlidingWindowChunker(window_size=40)
+    chunks = chunker.chunk_text(TEXT)
+    workflow = CountingWorkflow(fail={1})
+    manager = JobManager(store, chunker, lambda: workflow, max_workers=2, batch_chars=0, instance_id="i0")
+    job_id = manager.submit("s1", TEXT, chunks, rules="", workflow=workflow)
+    wait_finished(manager, job_id)
+
+    stored = store.get(job_id)
+    assert 1 not in stored["completed_indices"]
+    assert "1" in stored["errors"]
+    assert 1 not in store.load_checkpoints(stored)
+    # 실패한 청크는 원문 그대로, 나머지는 교정본
+    result = manager.result(job_id)
+    assert chunks[1]["text"] in result
+    assert chunks[0]["text"].replace("안건", "의안") in result
+    assert chunks[0]["text"] not in result
+
+
+if __name__ == "__main__":
+    test_concurrent_attach_resumes_once()
+    test_previous_owner_stops_after_takeover()
+    test_failed_chunks_are_not_checkpointed()
+    print("OK")
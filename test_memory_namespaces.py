@@ -0,0 +1,84 @@
+import os
+import tempfile
+import time
+
+from meeting_proofreader.embeddings import HashingEmbeddingProvider
+from meeting_proofreader.memory_namespaces import NamespacedMemory, namespace_chain, normalize_namespace
+from meeting_proofreader.semantic_layer import SemanticLayer
+
+SEOUL_ADMIN = "서울시의회/행정자치위원회"
+TERMS = {
+    "": ["회의록 공통 용어"],
+    "서울시의회": ["서울시의회 의사국 용어"],
+    SEOUL_ADMIN: ["서울시의회 행정자치위원회 용어"],
+    "서울시의회/교육위원회": ["서울시의회 교육위원회 용어"],
+    "부산시의회/행정자치위원회": ["부산시의회 행정자치위원회 용어"],
+}
+
+
+def make_memory(directory, **kwargs):
+    layer = SemanticLayer(persist_directory=directory, embedding_function=HashingEmbeddingProvider())
+    return NamespacedMemory(directory, global_layer=layer, **kwargs)
+
+
+def populate(memory):
+    for namespace, terms in TERMS.items():
+        memory.add_terms(terms, namespace)
+        memory.layer(namespace).save_memory()
+
+
+def found_terms(memory, namespace):
+    return set(memory.search("용어", namespace, n_results=10)["relevant_terms"])
+
+
+def test_normalize_and_chain():
+    assert normalize_namespace(" 서울시의회 / 행정자치위원회 ") == SEOUL_ADMIN
+    assert normalize_namespace("..\\서울시의회/<행정>") == "서울시의회/행정"
+    assert namespace_chain(SEOUL_ADMIN) == [SEOUL_ADMIN, "서울시의회", ""]
+    assert namespace_chain(None) == [""]
+
+
+def test_search_only_reads_the_namespace_chain():
+    with tempfile.TemporaryDirectory() as directory:
+        memory = make_memory(directory)
+        populate(memory)
+        assert found_terms(memory, SEOUL_ADMIN) == set(TERMS[SEOUL_ADMIN] + TERMS["서울시의회"] + TERMS[""])
+        # 같은 기관의 다른 위원회 / 다른 기관의 같은 이름 위원회 용어는 섞이지 않음
+        assert found_terms(memory, "서울시의회/교육위원회") == set(
+            TERMS["서울시의회/교육위원회"] + TERMS["서울시의회"] + TERMS[""])
+        assert found_terms(memory, "부산시의회/행정자치위원회") == set(TERMS["부산시의회/행정자치위원회"] + TERMS[""])
+        assert found_terms(memory, "") == set(TERMS[""])
+        # 저장된 적 없는 네임스페이스는 검색해도 디렉터리를 만들지 않고 전역만 조회
+        assert found_terms(memory, "대구시의회") == set(TERMS[""])
+        assert not os.path.exists(memory.directory("대구시의회"))
+        assert os.path.exists(os.path.join(directory, "namespaces", "서울시의회", "행정자치위원회",
+                                           "simple_memory.json"))
+
+
+def test_lru_and_idle_unload_reload_from_disk():
+    with tempfile.TemporaryDirectory() as directory:
+        populate(make_memory(directory))
+        memory = make_memory(directory, max_loaded=2)
+        assert found_terms(memory, SEOUL_ADMIN) >= set(TERMS[SEOUL_ADMIN])
+        assert found_terms(memory, "부산시의회/행정자치위원회") >= set(TERMS["부산시의회/행정자치위원회"])
+        # 가장 오래 쓰지 않은 행정자치위원회가 밀려남 (저장본 없는 "부산시의회"는 로드하지 않음)
+        stats = memory.stats()
+        assert set(stats["loaded"]) == {"서울시의회", "부산시의회/행정자치위원회"}
+        assert (stats["loads"], stats["evictions"]) == (3, 1)
+        # 언로드된 네임스페이스는 다음 검색에서 디스크에서 다시 로드
+        assert found_terms(memory, SEOUL_ADMIN) >= set(TERMS[SEOUL_ADMIN])
+        # 위원회를 다시 로드하면서 가장 오래 쓰지 않은 기관이 밀려나므로 기관도 다시 로드됨
+        assert memory.stats()["loads"] == 5
+
+        memory = make_memory(directory, idle_ttl=0.05)
+        found_terms(memory, SEOUL_ADMIN)
+        time.sleep(0.1)
+        stats = memory.stats()
+        assert stats["loaded"] == {} and stats["expirations"] == 2
+
+
+if __name__ == "__main__":
+    test_normalize_and_chain()
+    test_search_only_reads_the_namespace_chain()
+    test_lru_and_idle_unload_reload_from_disk()
+    print("OK")
@@ -0,0 +1,52 @@
+import urllib.request
+
+from meeting_proofreader.instrumentation import TRACE
+from meeting_proofreader.metrics import MetricsRegistry, start_http_server
+from meeting_proofreader.session_store import SessionStore
+
+
+def scrape(url):
+    """Minimal scraper: {'name{labels}': value} from the text exposition format."""
+    with urllib.request.urlopen(url, timeout=5) as response:
+        assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+        text = response.read().decode("utf-8")
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_metrics_endpoint():
+    registry = MetricsRegistry()
+    store = SessionStore()
+    registry.register_stats("session_cache", store.stats, counters=("hits", "misses"))
+    server = start_http_server(0, host="127.0.0.1", registry=registry)
+    try:
+        # PROOFREADER_TRACE가 꺼져 있어도 스팬이 메트릭으로 집계되어야 함
+        with TRACE.stage("correct", "job/0") as span:
+            span.update(model="gpt-4o-mini", llm_calls=1, input_tokens=1200, output_tokens=300, cached_tokens=1024)
+        with TRACE.stage("chunk", "job/0") as span:
+            span.update(status="ACCEPT", chars=1000)
+        store.put("s1", {"original_text": "회의록"})
+        store.get("s1")
+        store.get("missing")
+
+        samples = scrape(f"http://127.0.0.1:{server.server_address[1]}/metrics")
+        assert samples['proofreader_chunks_total{status="ACCEPT"}'] == 1
+        assert samples["proofreader_chunk_chars_total"] == 1000
+        assert samples['proofreader_llm_tokens_total{stage="correct",model="gpt-4o-mini",kind="cached"}'] == 1024
+        assert samples['proofreader_stage_duration_seconds_count{stage="correct"}'] == 1
+        assert samples['proofreader_stage_duration_seconds_bucket{stage="chunk",le="+Inf"}'] == 1
+        assert samples["proofreader_session_cache_hits_total"] == 1
+        assert samples["proofreader_session_cache_misses_total"] == 1
+        assert samples["proofreader_session_cache_entries"] == 1
+    finally:
+        server.shutdown()
+        TRACE.remove_listener(registry.observe_event)
+
+
+if __name__ == "__main__":
+    test_metrics_endpoint()
+    print("OK")
@@ -0,0 +1,143 @@
+import os
+import time
+import zlib
+
+from meeting_proofreader.persistence import SessionPersister, InMemoryFirestore, _FakeBatch
+
+
+def test_write_behind_roundtrip():
+    db = InMemoryFirestore()
+    persister = SessionPersister(db, flush_interval=0.05, chunk_bytes=1024)
+    try:
+        # 같은 세션에 대한 연속 저장은 하나로 병합되어야 함
+        for i in range(5):
+            persister.submit("s1", {"authenticated": True, "original_text": f"원문 {i}", "corrected_text": ""})
+        long_text = "".join(f"{i} 회의록 본문입니다.\n" for i in range(20000))
+        persister.submit("s2", {"authenticated": True, "original_text": long_text, "corrected_text": long_text})
+        assert persister.flush(timeout=5)
+
+        loaded = persister.load("s1")
+        assert loaded["original_text"] == "원문 4"
+        assert loaded["authenticated"] is True
+
+        loaded = persister.load("s2")
+        assert loaded["original_text"] == long_text
+        assert loaded["corrected_text"] == long_text
+        # 대용량 텍스트는 여러 서브문서로 분할 저장됨
+        assert sum("/s2/chunks/original_text_" in path for path in db.documents) > 1
+        assert persister.load("missing") is None
+    finally:
+        persister.close()
+
+
+def incompressible(n):
+    # 압축해도 줄지 않는 텍스트 (청크 수를 예측할 수 있도록)
+    return os.urandom(n).hex()
+
+
+def chunk_paths(db, session_id):
+    return sorted(path for path in db.documents if f"/{session_id}/chunks/" in path)
+
+
+def test_shrinking_text_deletes_stale_chunks():
+    db = InMemoryFirestore()
+    persister = SessionPersister(db, flush_interval=0.05, chunk_bytes=1024)
+    try:
+        persister.submit("s1", {"original_text": incompressible(4000), "corrected_text": "짧음"})
+        assert persister.flush(timeout=5)
+        assert len(chunk_paths(db, "s1")) > 5
+
+        persister.submit("s1", {"original_text": "짧은 원문", "corrected_text": "짧음"})
+        assert persister.flush(timeout=5)
+        assert chunk_paths(db, "s1") == ["meeting_sessions/s1/chunks/corrected_text_0",
+                                         "meeting_sessions/s1/chunks/original_text_0"]
+        # 다른 인스턴스(재시작)도 저장된 메인 문서 기준으로 정리함
+        restarted = SessionPersister(db, flush_interval=0.05, chunk_bytes=1024)
+        restarted.submit("s1", {"original_text": incompressible(4000)})
+        assert restarted.flush(timeout=5)
+        restarted.submit("s1", {"corrected_text": "짧음"})
+        assert restarted.flush(timeout=5)
+        restarted.close()
+        assert chunk_paths(db, "s1") == ["meeting_sessions/s1/chunks/corrected_text_0"]
+        assert restarted.load("s1") == {"corrected_text": "짧음"}
+    finally:
+        persister.close()
+
+
+class RecordingFirestore(InMemoryFirestore):
+    """Records the sessions in each committed batch; fails the first `fail` commits."""
+    def __init__(self, fail=0):
+        super().__init__()
+        self.fail = fail
+        self.batches = []
+
+    def batch(self):
+        client = self
+
+        class Batch(_FakeBatch):
+            def commit(self):
+                if client.fail:
+                    client.fail -= 1
+                    self._ops = []
+                    raise RuntimeError("unavailable")
+                client.batches.append([doc_ref.path.split("/")[1] for doc_ref, _ in self._ops])
+                super().commit()
+
+        return Batch(self)
+
+
+def test_session_is_never_split_across_batches():
+    db = RecordingFirestore()
+    persister = SessionPersister(db, flush_interval=0.05, chunk_bytes=1024, max_batch_ops=10)
+    try:
+        # 세션마다 청크 여러 개 + 메인 문서: 10개 한도에서 한 배치에 최대 두 세션
+        texts = {f"s{i}": incompressible(1800) for i in range(5)}
+        for session_id, text in texts.items():
+            persister.submit(session_id, {"original_text": text})
+        assert persister.flush(timeout=5)
+        assert len(db.batches) >= 3 and all(len(ops) <= 10 for ops in db.batches)
+        for session_id, text in texts.items():
+            assert sum(session_id in ops for ops in db.batches) == 1
+            assert persister.load(session_id)["original_text"] == text
+    finally:
+        persister.close()
+
+
+def stored_text(db, session_id, field):
+    count = db.documents[f"meeting_sessions/{session_id}"]["_text_chunks"][field]
+    parts = [db.documents[f"meeting_sessions/{session_id}/chunks/{field}_{i}"]["data"] for i in range(count)]
+    return zlib.decompress(b"".join(parts)).decode("utf-8")
+
+
+def test_failed_batch_keeps_previous_version():
+    db = RecordingFirestore()
+    persister = SessionPersister(db, flush_interval=0.5, chunk_bytes=1024)
+    try:
+        old = incompressible(3000)
+        persister.submit("s1", {"original_text": old})
+        assert persister.flush(timeout=5)
+
+        db.fail = 1
+        persister.submit("s1", {"original_text": "새 원문"})
+        persister._wakeup.set()
+        deadline = time.time() + 5
+        while persister.stats()["errors"] == 0:
+            assert time.time() < deadline
+            time.sleep(0.01)
+        # 실패한 배치는 아무것도 반영하지 않으므로 저장본은 이전 버전 그대로
+        assert stored_text(db, "s1", "original_text") == old
+
+        # 재시도가 성공하면 새 버전으로 바뀌고 남은 청크가 정리됨
+        assert persister.flush(timeout=5)
+        assert stored_text(db, "s1", "original_text") == "새 원문"
+        assert chunk_paths(db, "s1") == ["meeting_sessions/s1/chunks/original_text_0"]
+    finally:
+        persister.close()
+
+
+if __name__ == "__main__":
+    test_write_behind_roundtrip()
+    test_shrinking_text_deletes_stale_chunks()
+    test_session_is_never_split_across_batches()
+    test_failed_batch_keeps_previous_version()
+    print("OK")
@@ -0,0 +1,71 @@
+import time
+
+from meeting_proofreader.chunker import SlidingWindowChunker
+from meeting_proofreader.parse_cache import ParsedUploadCache
+from meeting_proofreader.session_store import SessionStore, _CompressedText
+
+
+def test_lists_and_dicts_count_toward_the_cap():
+    store = SessionStore(max_bytes=1024 * 1024)
+    store.put("small", {"authenticated": True})
+    small = store.stats()["bytes_held"]
+    store.pop("small")
+    # 텍스트가 아닌 큰 필드(결과 목록 등)도 크기에 반영
+    store.put("results", {"authenticated": True, "results": [{"chunk_id": i, "final_text": "교정문 " * 20}
+                                                             for i in range(200)]})
+    assert store.stats()["bytes_held"] > small + 200 * 100
+
+
+def test_parse_cache_charges_chunk_boundaries():
+    cache = ParsedUploadCache(SessionStore(max_bytes=64 * 1024 * 1024))
+    text = "\n".join(f"{i}번 발언입니다." for i in range(3000))
+    cache.get_or_parse(text.encode("utf-8"), "a.txt", SlidingWindowChunker(window_size=20))
+    held = cache.stats()["bytes_held"]
+    boundaries = cache.store.get(next(iter(cache.store._entries)))["boundaries"]
+    # 압축된 원문보다 경계 목록이 크더라도 함께 계산됨
+    assert len(boundaries) > 1000
+    assert held > len(boundaries) * 50
+
+
+def test_lru_eviction_keeps_recently_used():
+    text = "x" * 1000
+    store = SessionStore(max_bytes=2500, compress_threshold=1 << 20)
+    store.put("a", {"original_text": text})
+    store.put("b", {"original_text": text})
+    assert store.get("a") is not None
+    store.put("c", {"original_text": text})
+    # 가장 오래 쓰지 않은 b가 먼저 밀려남
+    assert "a" in store and "c" in store and "b" not in store
+    assert store.stats()["evictions"] == 1
+    assert store.stats()["bytes_held"] <= store.max_bytes
+
+
+def test_ttl_expiration():
+    store = SessionStore(ttl_seconds=0.05)
+    store.put("a", {"authenticated": True})
+    time.sleep(0.1)
+    store.put("b", {"authenticated": True})
+    assert "a" not in store and store.get("b") == {"authenticated": True}
+    assert store.stats()["expirations"] == 1
+    assert store.get("a") is None
+
+
+def test_compression_roundtrip():
+    store = SessionStore(compress_threshold=4096)
+    long_text = "".join(f"○위원장 {i}번 안건을 상정합니다.\n" for i in range(2000))
+    data = {"original_text": long_text, "corrected_text": "짧은 텍스트", "authenticated": True}
+    store.put("s1", data)
+    stored = store._entries["s1"][0]
+    assert isinstance(stored["original_text"], _CompressedText)
+    assert stored["corrected_text"] == "짧은 텍스트"
+    assert store.stats()["bytes_held"] < len(long_text.encode("utf-8")) // 4
+    assert store.get("s1") == data
+
+
+if __name__ == "__main__":
+    test_lists_and_dicts_count_toward_the_cap()
+    test_parse_cache_charges_chunk_boundaries()
+    test_lru_eviction_keeps_recently_used()
+    test_ttl_expiration()
+    test_compression_roundtrip()
+    print("OK")
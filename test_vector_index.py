@@ -0,0 +1,89 @@
+import tempfile
+
+import numpy as np
+
+from meeting_proofreader.embeddings import HashingEmbeddingProvider
+from meeting_proofreader.semantic_layer import SemanticLayer
+from meeting_proofreader.vector_index import PoolIndex
+
+
+def unit(rows):
+    return (rows / np.linalg.norm(rows, axis=1, keepdims=True)).astype(np.float32)
+
+
+def dataset(n=3000, dim=256, queries=40, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = unit(rng.standard_normal((n, dim)))
+    # 저장된 벡터 근처의 질의 (상위 결과가 의미 있도록)
+    picks = rng.choice(n, queries, replace=False)
+    return vectors, unit(vectors[picks] + 0.05 * rng.standard_normal((queries, dim)))
+
+
+def test_compressed_scores_and_size():
+    vectors, queries = dataset()
+    exact = PoolIndex.build(vectors, "float32")
+    for dtype, tolerance, ratio in (("float16", 2e-3, 2), ("int8", 2e-2, 4)):
+        index = PoolIndex.build(vectors, dtype, rescore=False)
+        assert index.codes.nbytes * ratio == exact.codes.nbytes
+        for query in queries:
+            assert np.abs(index.scores(query) - exact.scores(query)).max() < tolerance
+
+
+def test_rescoring_matches_float32_results():
+    vectors, queries = dataset()
+    exact = PoolIndex.build(vectors, "float32")
+    for dtype in ("float16", "int8"):
+        rescored = PoolIndex.build(vectors, dtype, rescore=True)
+        approximate = PoolIndex.build(vectors, dtype, rescore=False)
+        recall = 0
+        for query in queries:
+            rows, scores = exact.search(query, 10)
+            rescored_rows, rescored_scores = rescored.search(query, 10)
+            # 재채점 결과는 float32 원본 점수 그대로
+            assert list(rescored_rows) == list(rows)
+            assert np.allclose(rescored_scores, scores, atol=1e-6)
+            recall += len(set(approximate.search(query, 10)[0]) & set(rows))
+        assert recall / (10 * len(queries)) > 0.9
+
+
+def test_extended_index_searches_new_rows():
+    vectors, queries = dataset(n=1200)
+    index = PoolIndex.build(vectors[:700], "int8").extend(vectors[700:])
+    exact = PoolIndex.build(vectors, "float32")
+    assert len(index) == 1200 and len(index.exact.parts) == 2
+    for query in queries:
+        assert list(index.search(query, 5)[0]) == list(exact.search(query, 5)[0])
+
+
+def test_semantic_layer_int8_roundtrip_matches_float32():
+    terms = [f"{n}차 {name}" for n in range(1, 40) for name in ("예산결산특별위원회", "행정자치위원회", "교육위원회")]
+    queries = ["제3차 예산결산특별위원회", "12차 교육위원회 회의", "행정자치위원회 7차"]
+    with tempfile.TemporaryDirectory() as float_dir, tempfile.TemporaryDirectory() as int8_dir:
+        layers = {}
+        for dtype, directory in (("float32", float_dir), ("int8", int8_dir)):
+            layer = SemanticLayer(persist_directory=directory, embedding_function=HashingEmbeddingProvider(),
+                                  storage_dtype=dtype, rescore=True)
+            layer.add_terms(terms)
+            layer.save_memory()
+            # 다시 열면 .npy 원본(메모리 매핑)으로 재채점
+            layers[dtype] = SemanticLayer(persist_directory=directory, embedding_function=HashingEmbeddingProvider(),
+                                          storage_dtype=dtype, rescore=True)
+        for query in queries:
+            q_emb = layers["float32"].embed_query(query)
+            expected = layers["float32"].search_vector(q_emb, n_results=5)["relevant_terms"]
+            found = layers["int8"].search_vector(q_emb, n_results=5)["relevant_terms"]
+            # 동점끼리는 순서가 다를 수 있으므로 점수 목록과, 각 결과의 float32 점수를 비교
+            assert np.allclose([score for score, _ in found], [score for score, _ in expected], atol=1e-6)
+            exact = {text: score for score, text in
+                     layers["float32"].search_vector(q_emb, n_results=len(terms))["relevant_terms"]}
+            assert all(abs(exact[text] - score) < 1e-6 for score, text in found)
+        stats = layers["int8"].index_stats()["pools"]["terms"]
+        assert stats["resident_bytes"] < layers["float32"].index_stats()["pools"]["terms"]["resident_bytes"] // 3
+
+
+if __name__ == "__main__":
+    test_compressed_scores_and_size()
+    test_rescoring_matches_float32_results()
+    test_extended_index_searches_new_rows()
+    test_semantic_layer_int8_roundtrip_matches_float32()
+    print("OK")